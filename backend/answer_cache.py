@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+
+import os
+import re
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, TYPE_CHECKING
+
+# numpy and the embedder are only needed by the optional semantic tier and are imported with it
+if TYPE_CHECKING:
+    import numpy as np
+
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", 1000))
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", 24 * 3600))
+# Lexical similarity above which a cached answer is reused for a differently worded question.
+# Unset by default: the hashed embeddings cannot tell "with my consent" from "without my consent"
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY")) if os.getenv("ANSWER_CACHE_SIMILARITY") else None
+ANSWER_CACHE_DIR = os.getenv("ANSWER_CACHE_DIR", "")
+
+_WHITESPACE = re.compile(r"\s+")
+_EDGE_PUNCTUATION = " \t\n?.!,;:"
+
+# Terms that change a legal answer however similar the rest of the question is; a semantic
+# hit requires both questions to contain exactly the same ones
+_NEGATION = re.compile(r"\b(?:not|no|never|nor|neither|none|without|cannot)\b|n't\b")
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)*")
+PLACE_NAMES = (
+    "andhra pradesh", "arunachal pradesh", "assam", "bihar", "chhattisgarh", "goa", "gujarat", "haryana",
+    "himachal pradesh", "jharkhand", "karnataka", "kerala", "madhya pradesh", "maharashtra", "manipur",
+    "meghalaya", "mizoram", "nagaland", "odisha", "punjab", "rajasthan", "sikkim", "tamil nadu", "telangana",
+    "tripura", "uttar pradesh", "uttarakhand", "west bengal", "andaman and nicobar", "chandigarh",
+    "dadra and nagar haveli", "daman and diu", "delhi", "jammu and kashmir", "ladakh", "lakshadweep",
+    "puducherry", "mumbai", "bombay", "kolkata", "calcutta", "chennai", "madras", "bengaluru", "bangalore",
+    "hyderabad", "ahmedabad", "pune", "jaipur", "lucknow", "noida", "gurugram", "gurgaon", "kochi", "indore",
+    "bhopal", "patna", "nagpur", "surat", "thane", "ghaziabad", "kanpur", "visakhapatnam", "coimbatore",
+)
+_PLACE = re.compile(r"\b(?:" + "|".join(re.escape(place) for place in PLACE_NAMES) + r")\b")
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text for exact-match lookups"""
+    return _WHITESPACE.sub(" ", text.lower()).strip(_EDGE_PUNCTUATION)
+
+
+def _critical_terms(key: str) -> tuple:
+    """Negations, numbers and place names in a normalized key, which a semantic hit must match exactly"""
+    negations = sorted("not" if term in ("n't", "cannot") else term for term in _NEGATION.findall(key))
+    return tuple(negations), frozenset(_NUMBER.findall(key)), frozenset(_PLACE.findall(key))
+
+
+class AnswerCache:
+    """Bounded answer cache with an exact tier and an optional semantic tier.
+
+    The exact tier matches on normalized text. When ``similarity_threshold`` is
+    set, a miss falls through to a nearest-neighbour search over the embeddings
+    of the cached keys; the neighbour is only used when it has the same
+    negations, numbers and place names as the question. Entries expire after
+    ``ttl_seconds`` and the least recently used entry is evicted once
+    ``max_entries`` is reached."""
+
+    def __init__(self, name: str, max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+                 ttl_seconds: float = ANSWER_CACHE_TTL_SECONDS,
+                 similarity_threshold: Optional[float] = None,
+                 persist_path: Optional[str] = None):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.persist_path = persist_path
+
+        # key -> (value, created_at); insertion order doubles as LRU order
+        self._entries: "OrderedDict[str, tuple[str, float]]" = OrderedDict()
+        self._vectors: Dict[str, "np.ndarray"] = {}
+        self._matrix: Optional["np.ndarray"] = None
+        self._matrix_keys: list[str] = []
+        self._lock = threading.Lock()
+
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if persist_path:
+            self.load()
+
+    def get(self, text: str) -> Optional[str]:
+        """Return the cached value for text, or None on a miss"""
+        key = normalize_text(text)
+        with self._lock:
+            value = self._get_exact(key)
+            if value is not None:
+                self.exact_hits += 1
+                return value
+            if self.similarity_threshold is not None and self._entries:
+                value = self._get_semantic(key)
+                if value is not None:
+                    self.semantic_hits += 1
+                    return value
+            self.misses += 1
+            return None
+
+    def set(self, text: str, value: str):
+        """Store value under text, evicting the least recently used entry if full"""
+        key = normalize_text(text)
+        with self._lock:
+            self._insert(key, value, time.time())
+
+    def _get_exact(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, created_at = entry
+        if time.time() - created_at > self.ttl_seconds:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _get_semantic(self, key: str) -> Optional[str]:
+        import numpy as np
+        from embeddings import embed_text
+
+        if self._matrix is None:
+            self._matrix_keys = list(self._entries)
+            self._matrix = np.stack([self._vectors[k] for k in self._matrix_keys])
+        scores = self._matrix @ embed_text(key)
+        best = int(np.argmax(scores))
+        if scores[best] < self.similarity_threshold:
+            return None
+        if _critical_terms(self._matrix_keys[best]) != _critical_terms(key):
+            return None
+        return self._get_exact(self._matrix_keys[best])
+
+    def _insert(self, key: str, value: str, created_at: float):
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        elif len(self._entries) >= self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+        self._entries[key] = (value, created_at)
+        if self.similarity_threshold is not None and key not in self._vectors:
+            from embeddings import embed_text
+            self._vectors[key] = embed_text(key)
+            self._matrix = None
+
+    def _remove(self, key: str):
+        self._entries.pop(key, None)
+        if self._vectors.pop(key, None) is not None:
+            self._matrix = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.exact_hits + self.semantic_hits) / lookups if lookups else 0.0,
+        }
+
+    def save(self):
+        """Persist unexpired entries to persist_path"""
+        if not self.persist_path:
+            return
+        with self._lock:
+            now = time.time()
+            entries = [
+                [key, value, created_at]
+                for key, (value, created_at) in self._entries.items()
+                if now - created_at <= self.ttl_seconds
+            ]
+        os.makedirs(os.path.dirname(self.persist_path) or ".", exist_ok=True)
+        tmp_path = f"{self.persist_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self.persist_path)
+
+    def load(self):
+        """Load persisted entries, skipping any that have expired"""
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return
+        try:
+            with open(self.persist_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except Exception as e:
+            print(f"Answer cache load warning ({self.name}): {e}")
+            return
+        now = time.time()
+        with self._lock:
+            for key, value, created_at in entries:
+                if now - created_at <= self.ttl_seconds:
+                    self._insert(key, value, created_at)
+
+
+def _persist_path(name: str) -> Optional[str]:
+    return os.path.join(ANSWER_CACHE_DIR, f"{name}.json") if ANSWER_CACHE_DIR else None
+
+
+# Global caches for legal answers and generated documents
+answer_cache = AnswerCache(
+    "answers",
+    similarity_threshold=ANSWER_CACHE_SIMILARITY,
+    persist_path=_persist_path("answers"),
+)
+document_cache = AnswerCache("documents", persist_path=_persist_path("documents"))
+
+
+def document_cache_key(case_description: str, preferred_type: Optional[str]) -> str:
+    """Cache key for a generated document"""
+    return f"{(preferred_type or 'auto').lower()}|{case_description}"
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    return {"answers": answer_cache.stats(), "documents": document_cache.stats()}
+
+
+def save_caches():
+    """Persist all caches (no-op unless ANSWER_CACHE_DIR is set)"""
+    for cache in (answer_cache, document_cache):
+        try:
+            cache.save()
+        except Exception as e:
+            print(f"Answer cache save warning ({cache.name}): {e}")
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Document generation cost per drafting mode: wall-clock time and generated words.
+
+Runs generate_legal_document_fast against the fake Groq server in each
+DOCUMENT_DRAFTING_MODE:
+
+  single    one whole-document call, --document-words long, so the
+            1500-token per-call limit forces continue round trips
+  sections  each section drafted concurrently within its word budget
+  template  only the case-specific slots requested as JSON (--slot-words),
+            boilerplate rendered from the local template
+
+Usage: python benchmarks/bench_document_drafting.py [--document-words 2400] [--slot-words 400]
+                                                    [--tokens-per-second 250] [--latency 0.3] [--repeat 3]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_groq import start_fake_groq
+
+CASES = {
+    "notice": "My tenant has not paid rent for six months and refuses to vacate the flat.",
+    "consumer complaint": "The refrigerator I bought stopped working in a month and the seller refuses a refund.",
+    "affidavit": "I need an affidavit for a name change after marriage.",
+}
+MODES = ("single", "sections", "template")
+
+
+async def run(args):
+    os.environ["GROQ_API_URL"] = start_fake_groq(latency=args.latency, tokens_per_second=args.tokens_per_second,
+                                                 answer_tokens=args.document_words)
+    import utils_fast
+    import document_templates
+    from groq_client import close_groq_client
+
+    generated = {"words": 0}
+    upstream = utils_fast._groq_chat_upstream
+
+    async def counting_upstream(messages, priority):
+        content = await upstream(messages, priority)
+        generated["words"] += len(content.split())
+        return content
+
+    utils_fast._groq_chat_upstream = counting_upstream
+    original_slot_messages = document_templates.build_slot_messages
+    utils_fast.build_slot_messages = lambda case, doc_type: original_slot_messages(case, doc_type, args.slot_words)
+
+    print(f"whole document {args.document_words} words, slots {args.slot_words} words, "
+          f"{args.tokens_per_second} tokens/s, {args.latency}s to first token")
+    print(f"{'document':<20} {'mode':<9} {'seconds':>8} {'generated words':>16} {'output words':>13}")
+    for doc_type, description in CASES.items():
+        for mode in MODES:
+            utils_fast.DOCUMENT_DRAFTING_MODE = mode
+            best, words = float("inf"), 0
+            for i in range(args.repeat):
+                # A unique description per run so the document cache and single-flight stay out of the way
+                generated["words"] = 0
+                start = time.perf_counter()
+                document = await utils_fast.generate_legal_document_fast(f"{description} ({mode} {i})", doc_type)
+                best = min(best, time.perf_counter() - start)
+                words = generated["words"]
+                assert not document.startswith("Unable"), document
+            print(f"{doc_type:<20} {mode:<9} {best:>8.2f} {words:>16} {len(document.split()):>13}")
+    await close_groq_client()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--document-words", type=int, default=2400)
+    parser.add_argument("--slot-words", type=int, default=400)
+    parser.add_argument("--tokens-per-second", type=float, default=250)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--repeat", type=int, default=3)
+    asyncio.run(run(parser.parse_args()))
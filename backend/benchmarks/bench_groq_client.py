@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""Throughput of the /ask LLM path: blocking requests.post vs the pooled async client.
+
+Usage: python benchmarks/bench_groq_client.py [concurrency] [latency_seconds]
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_groq import start_fake_groq
+
+
+async def _blocking_handler(url: str):
+    # Mirrors the previous implementation: a fresh connection per call, blocking the event loop
+    requests.post(url, json={"model": "fake", "messages": []}, timeout=45)
+
+
+async def run(concurrency: int, latency: float):
+    url = start_fake_groq(latency=latency)
+    os.environ["GROQ_API_URL"] = url
+
+    from utils_fast import ask_groq_fast
+    from groq_client import close_groq_client
+
+    start = time.perf_counter()
+    await asyncio.gather(*(_blocking_handler(url) for _ in range(concurrency)))
+    before = concurrency / (time.perf_counter() - start)
+
+    await ask_groq_fast("warm up")
+    start = time.perf_counter()
+    await asyncio.gather(*(ask_groq_fast("What is Section 498A?") for _ in range(concurrency)))
+    after = concurrency / (time.perf_counter() - start)
+    await close_groq_client()
+
+    print(f"concurrency={concurrency} upstream_latency={latency}s")
+    print(f"blocking requests.post : {before:8.1f} req/s")
+    print(f"pooled async client    : {after:8.1f} req/s")
+
+
+if __name__ == "__main__":
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+    asyncio.run(run(concurrency, latency))
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Sequential engine fallback vs hedged parallel recognition, with stub engines.
+
+The stub "google" engine answers with confidence 0.9 after its latency, but
+in the degraded scenarios some calls hang until a request timeout and then
+fail. The stub "sphinx" engine is slower but always answers, with
+confidence 0.6. Sequential mode is the old behaviour (Google, then Sphinx
+once Google fails); hedged mode runs both under a deadline.
+
+Usage: python benchmarks/bench_hedged_recognition.py [--requests 40] [--scale 0.1]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from typing import List, Dict, Callable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recognition_engines import HedgedRecognizer
+
+GOOGLE_LATENCY = 0.6
+GOOGLE_TIMEOUT = 5.0
+SPHINX_LATENCY = 1.2
+DEADLINE = 2.0
+
+SCENARIOS = {
+    "healthy": 0.0,
+    "google flaky (20% hang)": 0.2,
+    "google unreachable": 1.0,
+}
+
+
+def stub_engines(hang_rate: float, scale: float, rng: random.Random) -> Dict[str, Callable]:
+    def google(audio, language):
+        if rng.random() < hang_rate:
+            time.sleep(GOOGLE_TIMEOUT * scale)
+            raise TimeoutError("recognition request timed out")
+        time.sleep(GOOGLE_LATENCY * scale)
+        return "what is the punishment for cheating", 0.9
+
+    def sphinx(audio, language):
+        time.sleep(SPHINX_LATENCY * scale)
+        return "what is the punishment for cheating", 0.6
+
+    return {"google": google, "sphinx": sphinx}
+
+
+def sequential(engines: Dict[str, Callable]) -> bool:
+    for engine in engines.values():
+        try:
+            return bool(engine(None, "en-IN")[0])
+        except Exception:
+            continue
+    return False
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--scale", type=float, default=0.1, help="multiply every stub latency (1.0 = real seconds)")
+    args = parser.parse_args()
+
+    hedged = HedgedRecognizer(deadline=DEADLINE * args.scale)
+    print(f"latencies in ms at real scale (google {GOOGLE_LATENCY}s, timeout {GOOGLE_TIMEOUT}s, "
+          f"sphinx {SPHINX_LATENCY}s, deadline {DEADLINE}s)")
+    print(f"{'scenario':<26} {'mode':<11} {'ok':>4} {'p50':>7} {'p95':>7} {'max':>7}")
+    for scenario, hang_rate in SCENARIOS.items():
+        for mode in ("sequential", "hedged"):
+            engines = stub_engines(hang_rate, args.scale, random.Random(1))
+            latencies, ok = [], 0
+            for _ in range(args.requests):
+                start = time.perf_counter()
+                if mode == "sequential":
+                    ok += sequential(engines)
+                else:
+                    ok += hedged.recognize(engines, None)["success"]
+                latencies.append((time.perf_counter() - start) / args.scale * 1000)
+            print(f"{scenario:<26} {mode:<11} {ok:>4} {percentile(latencies, 0.5):>7.0f} "
+                  f"{percentile(latencies, 0.95):>7.0f} {max(latencies):>7.0f}")
+    print("per-engine stats (hedged):", hedged.stats.snapshot())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""BM25 knowledge retrieval latency as the corpus grows.
+
+Usage: python benchmarks/bench_knowledge_index.py
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from knowledge_index import BM25Index
+from utils_fast import LEGAL_KNOWLEDGE
+
+CORPUS_SIZES = [20, 1_000, 10_000, 100_000]
+QUERIES = [
+    "What is Section 498A of IPC?",
+    "How to file a consumer complaint for a defective product",
+    "maintenance for wife under CrPC section 125",
+    "minimum wages for factory workers",
+]
+QUERY_ROUNDS = 200
+
+
+def synthetic_passages(size: int) -> list[dict]:
+    """Seed passages plus statute-like snippets built from the seed vocabulary"""
+    seeds = [{"domain": d, "text": t} for d, texts in LEGAL_KNOWLEDGE.items() for t in texts]
+    vocabulary = " ".join(p["text"] for p in seeds).split()
+    rng = random.Random(0)
+    passages = list(seeds)
+    while len(passages) < size:
+        words = rng.choices(vocabulary, k=rng.randint(12, 30))
+        passages.append({"domain": "synthetic", "text": f"Section {rng.randint(1, 600)} " + " ".join(words)})
+    return passages[:size]
+
+
+def main():
+    print(f"{'passages':>10} {'build (s)':>10} {'query p50 (ms)':>15} {'query p99 (ms)':>15}")
+    for size in CORPUS_SIZES:
+        passages = synthetic_passages(size)
+        start = time.perf_counter()
+        index = BM25Index(passages)
+        build_seconds = time.perf_counter() - start
+
+        timings = []
+        for i in range(QUERY_ROUNDS):
+            start = time.perf_counter()
+            index.top_passages(QUERIES[i % len(QUERIES)])
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        p50 = timings[len(timings) // 2]
+        p99 = timings[int(len(timings) * 0.99) - 1]
+        print(f"{size:>10} {build_seconds:>10.2f} {p50:>15.3f} {p99:>15.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Domain classification cost: the two previous substring classifiers vs the compiled single pass.
+
+Usage: python benchmarks/bench_legal_classifier.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from legal_classifier import classify_domains
+from utils_fast import LEGAL_KNOWLEDGE
+
+ROUNDS = 200
+
+
+def previous_classifiers(query: str):
+    """The /ask analysis and knowledge classifiers as they were, both run per request"""
+    query_lower = query.lower()
+    if any(word in query_lower for word in ["article", "constitution", "fundamental rights"]):
+        main_label = "Constitutional Law"
+    elif any(word in query_lower for word in ["section", "ipc", "criminal", "punishment"]):
+        main_label = "Criminal Law"
+    elif any(word in query_lower for word in ["consumer", "complaint", "defective"]):
+        main_label = "Consumer Law"
+    elif any(word in query_lower for word in ["divorce", "marriage", "custody", "maintenance"]):
+        main_label = "Family Law"
+    elif any(word in query_lower for word in ["property", "registration", "sale deed"]):
+        main_label = "Property Law"
+    else:
+        main_label = "General Legal"
+
+    query_lower = query.lower()
+    if any(word in query_lower for word in ["consumer", "complaint", "defective", "service"]):
+        domain = "consumer"
+    elif any(word in query_lower for word in ["criminal", "murder", "punishment", "ipc", "section"]):
+        domain = "criminal"
+    elif any(word in query_lower for word in ["constitution", "article", "fundamental rights", "rti"]):
+        domain = "constitutional"
+    elif any(word in query_lower for word in ["divorce", "marriage", "custody", "maintenance", "domestic violence"]):
+        domain = "family"
+    elif any(word in query_lower for word in ["employment", "wages", "factory", "worker", "industrial"]):
+        domain = "employment"
+    else:
+        domain = "general"
+    return main_label, domain
+
+
+def time_per_call(func, text: str) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        func(text)
+    return (time.perf_counter() - start) / ROUNDS * 1e6
+
+
+def main():
+    filler = "The parties agree that the terms herein shall be binding upon their heirs and assigns. "
+    knowledge = " ".join(t for texts in LEGAL_KNOWLEDGE.values() for t in texts)
+    inputs = {
+        "short query": "How do I get maintenance after divorce?",
+        "no-match query": "Please help me understand what my options are here " * 4,
+        "long query (2 KB)": (filler * 20)[:1900] + " maintenance after divorce",
+        "pasted document (50 KB)": (filler * 500 + knowledge)[:50_000],
+    }
+    print(f"{'input':<26} {'previous (us)':>14} {'compiled (us)':>14}")
+    for name, text in inputs.items():
+        before = time_per_call(previous_classifiers, text)
+        after = time_per_call(classify_domains, text)
+        print(f"{name:<26} {before:>14.1f} {after:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Silence trimming before recognition: audio removed, trimming cost and recognition time saved.
+
+Runs compact_speech over a fixture set, either synthetic dictation clips
+(syllable bursts with leading/trailing silence, pauses and background noise)
+or a directory of 16 kHz mono 16-bit WAV files. Recognition is replaced by a
+stub whose cost is proportional to the audio it receives (--rtf seconds per
+audio second), which is how both the Google web API and Sphinx scale.
+
+Usage: python benchmarks/bench_silence_trim.py [--clips 50] [--fixtures DIR]
+                                               [--max-pause-ms 700] [--rtf 0.3]
+"""
+
+import argparse
+import os
+import sys
+import time
+import wave
+from typing import List
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from voice_activity import compact_speech
+
+SAMPLE_RATE = 16000
+
+
+def synthetic_clip(rng: np.random.Generator) -> bytes:
+    """A dictated question: a few phrases of voiced syllables separated by pauses"""
+
+    def silence(seconds: float) -> np.ndarray:
+        return np.zeros(int(seconds * SAMPLE_RATE))
+
+    def phrase() -> np.ndarray:
+        parts = []
+        for _ in range(rng.integers(4, 14)):
+            n = int(rng.uniform(0.15, 0.4) * SAMPLE_RATE)
+            t = np.arange(n) / SAMPLE_RATE
+            pitch = rng.uniform(110, 220)
+            voiced = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in range(1, 5))
+            parts.append(rng.uniform(1500, 5000) * voiced * np.hanning(n))
+            parts.append(silence(rng.uniform(0.03, 0.12)))
+        return np.concatenate(parts)
+
+    pieces = [silence(rng.uniform(0.5, 3.0))]
+    for i in range(rng.integers(1, 4)):
+        if i:
+            pieces.append(silence(rng.uniform(0.3, 2.5)))
+        pieces.append(phrase())
+    pieces.append(silence(rng.uniform(0.5, 3.0)))
+    signal = np.concatenate(pieces)
+    signal += rng.normal(0, rng.uniform(20, 150), len(signal))
+    return np.clip(signal, -32768, 32767).astype("<i2").tobytes()
+
+
+def load_fixtures(directory: str) -> List[bytes]:
+    clips = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".wav"):
+            continue
+        with wave.open(os.path.join(directory, name), "rb") as wav:
+            if (wav.getframerate(), wav.getnchannels(), wav.getsampwidth()) != (SAMPLE_RATE, 1, 2):
+                print(f"skipping {name}: not 16 kHz mono 16-bit")
+                continue
+            clips.append(wav.readframes(wav.getnframes()))
+    return clips
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clips", type=int, default=50)
+    parser.add_argument("--fixtures", help="directory of 16 kHz mono 16-bit WAV files instead of synthetic clips")
+    parser.add_argument("--max-pause-ms", type=int, default=700)
+    parser.add_argument("--rtf", type=float, default=0.3, help="stub recognition seconds per audio second")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.fixtures:
+        clips = load_fixtures(args.fixtures)
+    else:
+        rng = np.random.default_rng(args.seed)
+        clips = [synthetic_clip(rng) for _ in range(args.clips)]
+    if not clips:
+        sys.exit("no fixtures")
+
+    original = sum(len(clip) for clip in clips) / 2 / SAMPLE_RATE
+    print(f"{len(clips)} clips, {original:.1f} s of audio, stub recognition at {args.rtf} s per audio second")
+    print(f"{'mode':<28} {'kept s':>8} {'removed':>8} {'trim ms/clip':>13} {'recognition s':>14} {'saved s':>8}")
+    print(f"{'untrimmed':<28} {original:>8.1f} {'0%':>8} {'-':>13} {original * args.rtf:>14.1f} {'-':>8}")
+    for label, max_pause_ms in (("trim edges", 0), (f"trim edges + pauses>{args.max_pause_ms}ms", args.max_pause_ms)):
+        start = time.perf_counter()
+        kept = sum(len(compact_speech(clip, max_pause_ms=max_pause_ms)[0]) for clip in clips) / 2 / SAMPLE_RATE
+        trim_seconds = time.perf_counter() - start
+        recognition = kept * args.rtf
+        saved = original * args.rtf - recognition - trim_seconds
+        print(f"{label:<28} {kept:>8.1f} {1 - kept / original:>8.0%} {trim_seconds / len(clips) * 1000:>13.2f} "
+              f"{recognition:>14.1f} {saved:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Local OpenAI-compatible stub of the Groq chat completions API for offline benchmarks.
+
+Usage: python benchmarks/fake_groq.py [--port 8765] [--latency 0.2] [--tokens-per-second 200]
+                                      [--truncate-every N] [--rate-limit-every N] [--retry-after 1]
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse, JSONResponse
+
+FAKE_GROQ_HOST = "127.0.0.1"
+FAKE_GROQ_PORT = 8765
+FAKE_ANSWER = "Fake legal answer under Indian law with headings and steps."
+CONTINUE_MARKER = "Continue from where you left off"
+FAKE_WORDS = FAKE_ANSWER.split(" ")
+WORD_BUDGET = re.compile(r"under about (\d+) words")
+JSON_SHAPE = re.compile(r"Reply with only a JSON object in this shape:\n(\{.*\})\n")
+
+
+def create_fake_groq_app(latency: float = 0.2, tokens_per_second: float = 200, answer_tokens: int = 60,
+                         truncate_every: int = 0, rate_limit_every: int = 0, retry_after: float = 1.0) -> FastAPI:
+    """Build the stub app.
+
+    Every completion waits ``latency`` seconds before the first token and then
+    produces ``answer_tokens`` words at ``tokens_per_second``. With
+    ``truncate_every`` set, every Nth fresh prompt ends with
+    finish_reason=length so the client issues continue calls. A prompt that
+    asks for "under about N words" gets N words instead of ``answer_tokens``,
+    and one asking for a JSON object of a given shape gets that shape back
+    filled with about that many words.
+    Answers longer than the request's ``max_tokens`` are cut off with
+    finish_reason=length, and continue calls produce the rest. With
+    ``rate_limit_every`` set, every Nth request is answered with a 429 and a
+    Retry-After of ``retry_after`` seconds."""
+    app = FastAPI(title="Fake Groq")
+    counters = {"requests": 0, "prompts": 0}
+    token_delay = 1.0 / tokens_per_second if tokens_per_second else 0.0
+
+    def json_answer(shape: dict, total: int) -> list:
+        """Fill a {"key": "..." or ["..."]} shape with fake text, as whitespace-separated tokens"""
+        lists = [key for key, value in shape.items() if isinstance(value, list)]
+        item_words = max(1, total // max(1, 3 * len(lists)))
+        filled = {
+            key: [" ".join((FAKE_WORDS * (item_words // len(FAKE_WORDS) + 1))[:item_words])] * 3
+            if isinstance(value, list) else "Fake value"
+            for key, value in shape.items()
+        }
+        return json.dumps(filled).split(" ")
+
+    def answer_for(body: dict) -> tuple:
+        """The words of this completion and its finish_reason"""
+        messages = body.get("messages") or [{}]
+        prompt = messages[0].get("content", "")
+        budget = WORD_BUDGET.search(prompt)
+        total = int(budget.group(1)) if budget else answer_tokens
+        shape = JSON_SHAPE.search(prompt)
+        if shape:
+            return json_answer(json.loads(shape.group(1)), total), "stop"
+        written = sum(len(m["content"].split()) for m in messages if m.get("role") == "assistant")
+        remaining = max(0, total - written)
+        max_tokens = body.get("max_tokens") or remaining
+        count = min(remaining, max_tokens)
+        answer = (FAKE_WORDS * (count // len(FAKE_WORDS) + 1))[:count]
+        if remaining > max_tokens:
+            return answer, "length"
+        if CONTINUE_MARKER in messages[-1].get("content", ""):
+            return answer, "stop"
+        counters["prompts"] += 1
+        return answer, "length" if truncate_every and counters["prompts"] % truncate_every == 0 else "stop"
+
+    async def stream_words(model: str, words: list, finish_reason: str):
+        await asyncio.sleep(latency)
+        for word in words:
+            chunk = {"model": model, "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}]}
+            yield f"data: {json.dumps(chunk)}\n\n"
+            await asyncio.sleep(token_delay)
+        chunk = {"model": model, "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}]}
+        yield f"data: {json.dumps(chunk)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(body: dict):
+        counters["requests"] += 1
+        if rate_limit_every and counters["requests"] % rate_limit_every == 0:
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached", "type": "tokens"}},
+                status_code=429,
+                headers={"retry-after": str(retry_after), "x-ratelimit-remaining-requests": "0"},
+            )
+        words, finish_reason = answer_for(body)
+        if body.get("stream"):
+            return StreamingResponse(stream_words(body.get("model", "fake"), words, finish_reason), media_type="text/event-stream")
+        await asyncio.sleep(latency + token_delay * len(words))
+        return {
+            "id": f"chatcmpl-{time.time_ns()}",
+            "object": "chat.completion",
+            "model": body.get("model", "fake"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": " ".join(words)},
+                    "finish_reason": finish_reason,
+                }
+            ],
+            "usage": {"completion_tokens": len(words)},
+        }
+
+    return app
+
+
+def start_fake_groq(latency: float = 0.2, tokens_per_second: float = 200, truncate_every: int = 0,
+                    rate_limit_every: int = 0, retry_after: float = 1.0,
+                    host: str = FAKE_GROQ_HOST, port: int = FAKE_GROQ_PORT, answer_tokens: int = 60) -> str:
+    """Run the stub in a daemon thread and return its chat completions URL"""
+    app = create_fake_groq_app(latency, tokens_per_second, answer_tokens, truncate_every=truncate_every,
+                               rate_limit_every=rate_limit_every, retry_after=retry_after)
+    config = uvicorn.Config(app, host=host, port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://{host}:{port}/openai/v1/chat/completions"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=FAKE_GROQ_HOST)
+    parser.add_argument("--port", type=int, default=FAKE_GROQ_PORT)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=200)
+    parser.add_argument("--answer-tokens", type=int, default=60)
+    parser.add_argument("--truncate-every", type=int, default=0, help="every Nth prompt ends with finish_reason=length")
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="every Nth request gets a 429")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    args = parser.parse_args()
+    app = create_fake_groq_app(args.latency, args.tokens_per_second, args.answer_tokens,
+                               args.truncate_every, args.rate_limit_every, args.retry_after)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""Offline load test: runs backend/main.py against the fake Groq server and drives
+/ask, /generate-document and /upload at fixed concurrency levels.
+
+Reports throughput, p50/p95/p99 latency and event-loop lag for each endpoint and
+concurrency level. Event-loop lag is the extra latency of a trivial GET probe
+sent every 50 ms while the load runs, so blocking work inside handlers shows up
+even when the measured endpoint itself looks fast.
+
+Usage: python benchmarks/load_test.py [--concurrency 1 8 32] [--requests 64]
+                                      [--endpoints ask generate-document upload]
+                                      [--latency 0.2] [--truncate-every 0] [--rate-limit-every 0]
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Dict, Any
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_PORT = 8766
+FAKE_GROQ_PORT = 8765
+PROBE_INTERVAL_SECONDS = 0.05
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def start_process(args: List[str], env: Dict[str, str], log_path: str) -> subprocess.Popen:
+    # Output goes to a file: an unread pipe would block the server once its buffer filled
+    with open(log_path, "wb") as log:
+        process = subprocess.Popen([sys.executable, *args], cwd=BACKEND_DIR, env=env,
+                                   stdout=log, stderr=subprocess.STDOUT)
+    process.log_path = log_path
+    return process
+
+
+def wait_until_up(url: str, process: subprocess.Popen, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            with open(process.log_path, "rb") as log:
+                raise RuntimeError(f"{url} exited early:\n{log.read().decode(errors='ignore')}")
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError(f"{url} did not start within {timeout}s")
+
+
+def build_request(endpoint: str, i: int) -> Dict[str, Any]:
+    # Unique payloads so the answer cache and single-flight do not hide upstream cost
+    if endpoint == "ask":
+        return {"method": "POST", "url": "/ask", "json": {"query": f"What is Section {i} of the IPC?"}}
+    if endpoint == "generate-document":
+        return {"method": "POST", "url": "/generate-document",
+                "json": {"description": f"Landlord withholding deposit, case {i}", "preferred_type": "notice"}}
+    if endpoint == "upload":
+        text = f"Agreement {i}. The tenant shall pay rent by the fifth of every month. " * 40
+        return {"method": "POST", "url": "/upload",
+                "files": {"file": (f"agreement_{i}.txt", text.encode(), "text/plain")}}
+    raise ValueError(f"Unknown endpoint {endpoint}")
+
+
+async def probe_loop_lag(client: httpx.AsyncClient, stop: asyncio.Event, lags: List[float]):
+    baseline = None
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            await client.get("/features")
+        except httpx.HTTPError:
+            pass
+        elapsed = time.perf_counter() - start
+        baseline = elapsed if baseline is None else min(baseline, elapsed)
+        lags.append(elapsed - baseline)
+        await asyncio.sleep(PROBE_INTERVAL_SECONDS)
+
+
+async def run_level(base_url: str, endpoint: str, concurrency: int, total: int, offset: int) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=concurrency + 1, max_keepalive_connections=concurrency + 1)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client, \
+            httpx.AsyncClient(base_url=base_url, timeout=120) as probe_client:
+        latencies: List[float] = []
+        errors = 0
+        next_index = iter(range(offset, offset + total))
+
+        async def worker():
+            nonlocal errors
+            for i in next_index:
+                request = build_request(endpoint, i)
+                start = time.perf_counter()
+                try:
+                    response = await client.request(**request)
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        stop = asyncio.Event()
+        lags: List[float] = []
+        probe = asyncio.ensure_future(probe_loop_lag(probe_client, stop, lags))
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await probe
+
+    return {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "throughput": total / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 0.50) * 1000,
+        "p95": percentile(latencies, 0.95) * 1000,
+        "p99": percentile(latencies, 0.99) * 1000,
+        "lag_p99": percentile(lags, 0.99) * 1000,
+        "lag_max": max(lags, default=0.0) * 1000,
+    }
+
+
+def print_report(results: List[Dict[str, Any]]):
+    header = (f"{'endpoint':<18} {'conc':>5} {'reqs':>5} {'errs':>5} {'req/s':>8} "
+              f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'lag p99':>8} {'lag max':>8}")
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['endpoint']:<18} {r['concurrency']:>5} {r['requests']:>5} {r['errors']:>5} {r['throughput']:>8.1f} "
+              f"{r['p50']:>8.0f} {r['p95']:>8.0f} {r['p99']:>8.0f} {r['lag_p99']:>8.0f} {r['lag_max']:>8.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=64, help="requests per endpoint and concurrency level")
+    parser.add_argument("--endpoints", nargs="+", default=["ask", "generate-document", "upload"])
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--tokens-per-second", type=float, default=200)
+    parser.add_argument("--truncate-every", type=int, default=0)
+    parser.add_argument("--rate-limit-every", type=int, default=0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="legal-load-test-")
+    env = {
+        **os.environ,
+        "GROQ_API_URL": f"http://127.0.0.1:{FAKE_GROQ_PORT}/openai/v1/chat/completions",
+        "GROQ_API_KEY": "load-test",
+        # Keep everything the backend writes out of the real backend directory
+        "RAG_INDEX_DIR": os.path.join(workdir, "rag_index"),
+        "UPLOAD_DIR": os.path.join(workdir, "uploads"),
+        "TTS_CACHE_DIR": os.path.join(workdir, "tts_cache"),
+        "PROFILE_DIR": os.path.join(workdir, "profiles"),
+    }
+    fake_groq = start_process([
+        "benchmarks/fake_groq.py", "--port", str(FAKE_GROQ_PORT),
+        "--latency", str(args.latency), "--tokens-per-second", str(args.tokens_per_second),
+        "--truncate-every", str(args.truncate_every), "--rate-limit-every", str(args.rate_limit_every),
+        "--retry-after", str(args.retry_after),
+    ], env, os.path.join(workdir, "fake_groq.log"))
+    backend = start_process(["-m", "uvicorn", "main:app", "--port", str(BACKEND_PORT), "--log-level", "warning"], env,
+                            os.path.join(workdir, "backend.log"))
+    base_url = f"http://127.0.0.1:{BACKEND_PORT}"
+    try:
+        wait_until_up(f"http://127.0.0.1:{FAKE_GROQ_PORT}/docs", fake_groq)
+        wait_until_up(f"{base_url}/", backend)
+        results = []
+        offset = 0
+        for endpoint in args.endpoints:
+            for concurrency in args.concurrency:
+                results.append(asyncio.run(run_level(base_url, endpoint, concurrency, args.requests, offset)))
+                offset += args.requests
+        print(f"fake Groq: latency={args.latency}s tokens/s={args.tokens_per_second} "
+              f"truncate_every={args.truncate_every} rate_limit_every={args.rate_limit_every}")
+        print_report(results)
+        print(f"server logs: {workdir}")
+    finally:
+        backend.terminate()
+        fake_groq.terminate()
+        backend.wait()
+        fake_groq.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+
+import os
+import re
+from typing import Optional, Dict, List, Tuple
+
+from legal_classifier import keyword_forms
+
+# "template" asks only for the case-specific slots and renders a local template; "sections" drafts each
+# section as its own concurrent call; "single" asks for the whole document at once
+DOCUMENT_DRAFTING_MODE = os.getenv("DOCUMENT_DRAFTING_MODE", "template")
+
+DOCUMENT_TITLES = {
+    "notice": "Legal Notice",
+    "affidavit": "Affidavit",
+    "consumer complaint": "Consumer Complaint",
+    "rti application": "RTI Application",
+    "property document": "Property Document",
+}
+
+# Known section schema per document type: (heading, what the section must contain, word budget)
+DOCUMENT_SECTIONS: Dict[str, List[Tuple[str, str, int]]] = {
+    "notice": [
+        ("Parties", "sender and addressee blocks with placeholders, date, mode of delivery and subject line", 120),
+        ("Facts", "numbered paragraphs setting out the facts and the cause of action", 400),
+        ("Legal Provisions", "the statutes and sections the notice relies on and how they apply", 250),
+        ("Demands", "the specific demands, the time allowed to comply and the consequences of non-compliance", 200),
+        ("Filing/Submission Instructions", "how to serve the notice and keep proof of delivery", 150),
+    ],
+    "affidavit": [
+        ("Title and Deponent", "court/authority heading and the deponent's particulars as placeholders", 120),
+        ("Statement of Facts", "numbered solemn statements of fact in the first person", 400),
+        ("Legal Provisions", "the provisions under which the affidavit is sworn and any that the facts engage", 200),
+        ("Verification", "the verification clause with place, date and signature placeholders", 120),
+        ("Filing/Submission Instructions", "attestation by notary/oath commissioner, stamp paper and filing steps", 150),
+    ],
+    "consumer complaint": [
+        ("Before the Commission", "the commission and jurisdiction, complainant and opposite party blocks", 150),
+        ("Facts of the Complaint", "numbered paragraphs covering the purchase, the defect or deficiency and attempts to resolve it", 450),
+        ("Legal Provisions", "the Consumer Protection Act provisions engaged and why the commission has jurisdiction", 250),
+        ("Reliefs/Prayers", "the reliefs claimed: refund, replacement, compensation, costs", 200),
+        ("Verification", "the verification clause with place, date and signature placeholders", 120),
+        ("Filing/Submission Instructions", "fees, copies, annexures and where to file", 150),
+    ],
+    "rti application": [
+        ("Addressee", "the Public Information Officer and public authority, with applicant particulars as placeholders", 120),
+        ("Information Sought", "numbered, specific items of information requested and the period covered", 350),
+        ("Legal Provisions", "the RTI Act provisions relied on, including time limits and fee rules", 200),
+        ("Declaration", "citizenship declaration, fee payment details and signature placeholders", 120),
+        ("Filing/Submission Instructions", "how to submit, pay the fee and appeal if there is no reply", 150),
+    ],
+    "property document": [
+        ("Parties", "the parties' particulars as placeholders and the nature of the document", 150),
+        ("Property Description", "schedule of the property with survey number, boundaries and area placeholders", 250),
+        ("Terms and Recitals", "numbered recitals and operative terms, including consideration and possession", 450),
+        ("Legal Provisions", "Transfer of Property Act, Registration Act and stamp duty provisions that apply", 200),
+        ("Execution and Witnesses", "execution clause, signatures and witness blocks", 120),
+        ("Filing/Submission Instructions", "stamp duty, registration at the sub-registrar and documents to carry", 150),
+    ],
+}
+
+# Keywords used to pick a document type when none is given; dict order breaks ties
+DOCUMENT_TYPE_KEYWORDS: Dict[str, List[str]] = {
+    "rti application": ["rti", "right to information", "information officer", "public authority"],
+    "consumer complaint": ["consumer", "defective", "deficiency", "refund", "warranty", "product", "seller"],
+    "affidavit": ["affidavit", "sworn", "declare on oath", "name change", "lost document"],
+    "property document": ["sale deed", "lease", "rent agreement", "gift deed", "property", "tenant", "landlord"],
+    "notice": ["notice", "demand", "cheque", "dues", "recovery", "breach"],
+}
+
+_TYPE_ALIASES = {
+    "legal notice": "notice",
+    "complaint": "consumer complaint",
+    "rti": "rti application",
+    "property": "property document",
+}
+
+# Document names that, when a description mentions them, decide the type outright
+_EXPLICIT_TYPE_NAMES = {
+    "legal notice": "notice",
+    "demand notice": "notice",
+    "affidavit": "affidavit",
+    "consumer complaint": "consumer complaint",
+    "rti application": "rti application",
+    "sale deed": "property document",
+    "lease deed": "property document",
+    "gift deed": "property document",
+    "rent agreement": "property document",
+    "property document": "property document",
+}
+
+
+def _word_pattern(phrases: List[str]) -> "re.Pattern[str]":
+    # Whole words only, with plurals where legal_classifier allows them
+    forms = [form for phrase in phrases for form in keyword_forms(phrase)]
+    alternatives = "|".join(re.escape(form) for form in sorted(forms, key=len, reverse=True))
+    return re.compile(r"(?<![a-z0-9])(" + alternatives + r")(?![a-z0-9])")
+
+
+_EXPLICIT_TYPE_PATTERN = _word_pattern(list(_EXPLICIT_TYPE_NAMES))
+_EXPLICIT_TYPE_FORMS = {form: doc_type for name, doc_type in _EXPLICIT_TYPE_NAMES.items() for form in keyword_forms(name)}
+_KEYWORD_PATTERNS = {doc_type: _word_pattern(keywords) for doc_type, keywords in DOCUMENT_TYPE_KEYWORDS.items()}
+_WORD = re.compile(r"[a-z]+")
+
+
+def _keyword_type(text: str) -> Optional[str]:
+    """Type named first in text, else the type with the most whole-word keyword hits, else None"""
+    text = text.lower()
+    named = _EXPLICIT_TYPE_PATTERN.search(text)
+    if named:
+        return _EXPLICIT_TYPE_FORMS[named.group(1)]
+    scores = {doc_type: len(pattern.findall(text)) for doc_type, pattern in _KEYWORD_PATTERNS.items()}
+    best = max(scores, key=scores.get)
+    return best if scores[best] else None
+
+
+def resolve_document_type(case_description: str, preferred_type: Optional[str] = None) -> str:
+    """Canonical document type.
+
+    A preferred type always wins: a known name or alias directly, otherwise
+    the type its own words point to (e.g. "Sale Deed"). Without one, a
+    document named in the description ("draft an affidavit ...") wins over
+    keyword counts, which only ever match whole words."""
+    if preferred_type:
+        preferred = " ".join(_WORD.findall(preferred_type.lower()))
+        preferred = _TYPE_ALIASES.get(preferred, preferred)
+        if preferred in DOCUMENT_SECTIONS:
+            return preferred
+        preferred = _keyword_type(preferred)
+        if preferred:
+            return preferred
+    return _keyword_type(case_description) or "notice"
+
+
+def build_section_messages(case_description: str, doc_type: str) -> List[List[dict]]:
+    """One chat conversation per section of the document, in document order.
+
+    Every prompt carries the full outline so each section stays consistent
+    with the others without waiting for them."""
+    sections = DOCUMENT_SECTIONS[doc_type]
+    title = DOCUMENT_TITLES[doc_type]
+    outline = "\n".join(f"{i}. {heading}: {contents}" for i, (heading, contents, _) in enumerate(sections, 1))
+    conversations = []
+    for heading, contents, words in sections:
+        prompt = (
+            f"Act as an Indian legal document generator. You are drafting one section of a {title}.\n"
+            f"The full document has these sections:\n{outline}\n\n"
+            f"Write ONLY the section \"{heading}\" ({contents}), under about {words} words.\n"
+            "Requirements:\n"
+            f"- Start with the Markdown heading '## {heading}' and do not write any other section.\n"
+            "- Use formal Indian legal drafting style.\n"
+            "- Use placeholders like [Client Name], [Address], [Opposite Party], [Court], [Date], [Case Details] "
+            "for personal details; do not invent them.\n"
+            "- Cite relevant statutory provisions where applicable.\n"
+            "Case Description:\n" + case_description
+        )
+        conversations.append([{"role": "user", "content": prompt}])
+    return conversations
+
+
+def format_section(doc_type: str, index: int, text: str) -> str:
+    """A drafted section as Markdown, adding its heading if the model left it out"""
+    heading = DOCUMENT_SECTIONS[doc_type][index][0]
+    text = text.strip()
+    if not text.lstrip("#").strip().lower().startswith(heading.lower()):
+        text = f"## {heading}\n\n{text}"
+    return text
+
+
+def assemble_document(doc_type: str, sections: List[str]) -> str:
+    """Join drafted sections, in order, under the document title"""
+    parts = [f"# {DOCUMENT_TITLES[doc_type]}"]
+    parts.extend(format_section(doc_type, i, text) for i, text in enumerate(sections))
+    return "\n\n".join(parts)
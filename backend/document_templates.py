@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+
+import re
+import json
+from typing import Optional, Dict, List, Tuple, Any, Union
+
+from document_drafting import DOCUMENT_TITLES
+
+# Case-specific slots the model fills per document type: name -> (kind, what goes in it).
+# Everything else in a document is fixed boilerplate rendered locally.
+TEMPLATE_SLOTS: Dict[str, Dict[str, Tuple[str, str]]] = {
+    "notice": {
+        "subject": ("text", "one-line subject of the notice"),
+        "facts": ("list", "the facts and cause of action, one per item"),
+        "provisions": ("list", "statutory provisions relied on, each with one line on how it applies"),
+        "demands": ("list", "the specific demands made on the addressee"),
+        "compliance_days": ("number", "days allowed to comply, as a number"),
+    },
+    "affidavit": {
+        "purpose": ("text", "what the affidavit is for, in a few words"),
+        "statements": ("list", "the solemn statements of fact, in the first person"),
+        "provisions": ("list", "provisions under which the affidavit is sworn or that the facts engage"),
+    },
+    "consumer complaint": {
+        "commission": ("text", "District, State or National, based on the value of the claim"),
+        "facts": ("list", "the purchase, the defect or deficiency and attempts to resolve it"),
+        "provisions": ("list", "Consumer Protection Act provisions engaged, each with one line on how it applies"),
+        "reliefs": ("list", "the reliefs claimed"),
+    },
+    "rti application": {
+        "public_authority": ("text", "the public authority holding the information"),
+        "information_sought": ("list", "specific items of information requested"),
+        "period": ("text", "the period the information covers"),
+    },
+    "property document": {
+        "document_kind": ("text", "the kind of document, e.g. Sale Deed, Lease Deed, Gift Deed"),
+        "recitals": ("list", "background recitals"),
+        "terms": ("list", "operative terms, including consideration and possession"),
+        "provisions": ("list", "Transfer of Property Act, Registration Act and stamp duty provisions that apply"),
+    },
+}
+
+DOCUMENT_TEMPLATES: Dict[str, str] = {
+    "notice": """# Legal Notice
+
+**By Registered Post A.D. / Speed Post**
+
+**Date:** [Date]
+
+**From:**
+[Client Name]
+Through [Advocate Name], Advocate
+[Address]
+
+**To:**
+[Opposite Party]
+[Address]
+
+**Subject:** {{subject}}
+
+Sir/Madam,
+
+Under instructions from and on behalf of my client, [Client Name], I hereby serve upon you the following legal notice:
+
+## Facts
+
+{{facts}}
+
+## Legal Provisions
+
+{{provisions}}
+
+## Demands
+
+You are hereby called upon, within {{compliance_days}} days of receipt of this notice:
+
+{{demands}}
+
+Failing which my client shall be constrained to initiate appropriate civil and/or criminal proceedings against you before the competent court, entirely at your risk as to costs and consequences.
+
+A copy of this notice has been retained in my office for record and further action.
+
+[Advocate Name]
+Advocate for [Client Name]
+
+## Filing/Submission Instructions
+
+1. Print the notice on the advocate's letterhead and have it signed by the advocate and, where required, the client.
+2. Send it by Registered Post A.D. or Speed Post and keep the postal receipt and tracking record.
+3. Keep the acknowledgement card or delivery proof; it is evidence of service in later proceedings.
+4. Calendar the compliance deadline and consult your advocate on next steps if there is no reply.
+""",
+    "affidavit": """# Affidavit
+
+**BEFORE THE [Court / Authority], [Place]**
+
+**Affidavit for {{purpose}}**
+
+I, [Client Name], son/daughter/wife of [Parent/Spouse Name], aged about [Age] years, residing at [Address], do hereby solemnly affirm and state as under:
+
+## Statement of Facts
+
+{{statements}}
+
+## Legal Provisions
+
+{{provisions}}
+
+## Verification
+
+I, the above-named deponent, do hereby verify that the contents of paragraphs above are true and correct to the best of my knowledge and belief, that no part of it is false and that nothing material has been concealed therefrom.
+
+Verified at [Place] on this [Date].
+
+**DEPONENT**
+[Client Name]
+
+## Filing/Submission Instructions
+
+1. Print the affidavit on non-judicial stamp paper of the value prescribed in your State.
+2. Sign it before a Notary Public or Oath Commissioner, who will attest it.
+3. Attach self-attested copies of supporting documents where required.
+4. Submit the attested original to [Court / Authority] and keep a copy for your records.
+""",
+    "consumer complaint": """# Consumer Complaint
+
+**BEFORE THE {{commission}} CONSUMER DISPUTES REDRESSAL COMMISSION, [Place]**
+
+**Consumer Complaint No. [Case Details] of [Year]**
+
+**IN THE MATTER OF:**
+
+[Client Name], [Address] ... **Complainant**
+
+**VERSUS**
+
+[Opposite Party], [Address] ... **Opposite Party**
+
+**COMPLAINT UNDER SECTION 35 OF THE CONSUMER PROTECTION ACT, 2019**
+
+## Facts of the Complaint
+
+{{facts}}
+
+## Legal Provisions
+
+{{provisions}}
+
+## Jurisdiction and Limitation
+
+The cause of action arose at [Place], within the territorial jurisdiction of this Commission, and the value of the goods/services paid as consideration is within its pecuniary jurisdiction. The complaint is filed within two years of the cause of action, as required by Section 69 of the Act.
+
+## Reliefs/Prayers
+
+In view of the above, the Complainant most respectfully prays that this Commission may be pleased to direct the Opposite Party to:
+
+{{reliefs}}
+
+and pass any other order it deems fit in the interest of justice.
+
+## Verification
+
+I, [Client Name], the Complainant above, do hereby verify that the contents of this complaint are true and correct to the best of my knowledge and belief and nothing material has been concealed.
+
+Verified at [Place] on [Date].
+
+**COMPLAINANT**
+[Client Name]
+
+## Filing/Submission Instructions
+
+1. File online on the e-Daakhil portal or in person at the Commission's registry.
+2. Pay the prescribed fee for the value of your claim.
+3. Attach copies of the invoice, warranty card, correspondence and any expert report as annexures, with an index.
+4. Submit an affidavit in support of the complaint and enough copies for each Opposite Party.
+""",
+    "rti application": """# RTI Application
+
+**Application under Section 6(1) of the Right to Information Act, 2005**
+
+**To:**
+The Public Information Officer
+{{public_authority}}
+[Address]
+
+**From:**
+[Client Name]
+[Address]
+
+**Date:** [Date]
+
+## Information Sought
+
+Kindly provide the following information for the period {{period}}:
+
+{{information_sought}}
+
+## Legal Provisions
+
+1. Section 6(1) of the RTI Act, 2005 entitles a citizen to request information in writing without giving reasons for the request.
+2. Section 7(1) requires the information to be provided within thirty days of receipt of the request.
+3. Section 7(6) requires information to be provided free of charge if it is not supplied within the time limit.
+
+## Declaration
+
+I am a citizen of India. The application fee of Rs. 10 has been paid by [Mode of Payment: IPO / DD / Court Fee Stamp / Online], reference [Case Details]. If the information is held by another public authority, kindly transfer this application under Section 6(3) of the Act.
+
+[Client Name]
+[Signature]
+
+## Filing/Submission Instructions
+
+1. Submit the application to the PIO in person, by post, or on the RTI Online portal for Central Government authorities.
+2. Pay the Rs. 10 fee; BPL applicants are exempt on attaching proof.
+3. Keep the acknowledgement or postal receipt.
+4. If there is no reply within thirty days, file a first appeal under Section 19(1) with the First Appellate Authority.
+""",
+    "property document": """# Property Document
+
+## {{document_kind}}
+
+This {{document_kind}} is executed at [Place] on this [Date]
+
+**BETWEEN**
+
+[Client Name], [Address] (hereinafter called the **First Party**)
+
+**AND**
+
+[Opposite Party], [Address] (hereinafter called the **Second Party**)
+
+## Property Description
+
+All that piece and parcel of the property bearing Survey/Plot No. [Survey Number], measuring [Area], situated at [Address], bounded as follows:
+
+- North: [Boundary]
+- South: [Boundary]
+- East: [Boundary]
+- West: [Boundary]
+
+## Recitals
+
+{{recitals}}
+
+## Terms
+
+{{terms}}
+
+## Legal Provisions
+
+{{provisions}}
+
+## Execution and Witnesses
+
+IN WITNESS WHEREOF the parties have signed this {{document_kind}} on the date first written above.
+
+**FIRST PARTY:** [Client Name]
+
+**SECOND PARTY:** [Opposite Party]
+
+**Witnesses:**
+1. [Witness Name], [Address]
+2. [Witness Name], [Address]
+
+## Filing/Submission Instructions
+
+1. Pay the stamp duty applicable in your State on the market value or consideration, whichever is higher.
+2. Present the document for registration at the Sub-Registrar's office within four months of execution.
+3. Both parties and two witnesses must attend with photo identity and address proof, and PAN where required.
+4. Collect the registered original and apply for mutation of the property records.
+""",
+}
+
+_SLOT = re.compile(r"\{\{(\w+)\}\}")
+_JSON_OBJECT = re.compile(r"\{.*\}", re.DOTALL)
+_ITEM_MARKER = re.compile(r"^\s*(?:\d+[.)]|[-*\u2022])\s+")
+_DIGITS = re.compile(r"\d+")
+
+TemplatePart = Union[str, Tuple[str]]
+
+
+def compile_template(template: str, slots: Dict[str, Tuple[str, str]]) -> List[TemplatePart]:
+    """Split a template into literal strings and 1-tuples naming slots, checking every slot is declared"""
+    parts: List[TemplatePart] = []
+    position = 0
+    for match in _SLOT.finditer(template):
+        if match.group(1) not in slots:
+            raise ValueError(f"Template slot '{match.group(1)}' is not declared")
+        parts.append(template[position:match.start()])
+        parts.append((match.group(1),))
+        position = match.end()
+    parts.append(template[position:])
+    return parts
+
+
+# Compiled once at import, which happens at startup
+COMPILED_TEMPLATES: Dict[str, List[TemplatePart]] = {
+    doc_type: compile_template(template, TEMPLATE_SLOTS[doc_type])
+    for doc_type, template in DOCUMENT_TEMPLATES.items()
+}
+
+
+def build_slot_messages(case_description: str, doc_type: str, word_budget: int = 400) -> List[dict]:
+    """Chat messages asking only for the case-specific slots of a document, as compact JSON"""
+    shape = {
+        name: ["..."] if kind == "list" else "..."
+        for name, (kind, _) in TEMPLATE_SLOTS[doc_type].items()
+    }
+    fields = "\n".join(
+        f"- {name}: {description}" + {"list": " (list of one- or two-sentence strings)", "number": " (digits only)"}.get(kind, "")
+        for name, (kind, description) in TEMPLATE_SLOTS[doc_type].items()
+    )
+    prompt = (
+        f"Act as an Indian legal drafter. The boilerplate of a {DOCUMENT_TITLES[doc_type]} is already written; "
+        "supply only the case-specific parts.\n"
+        f"Fields:\n{fields}\n"
+        "Use formal Indian legal drafting style and cite specific statutory sections. "
+        "Use placeholders like [Client Name], [Opposite Party], [Date] for personal details; do not invent them. "
+        f"Keep it under about {word_budget} words in total.\n"
+        f"Reply with only a JSON object in this shape:\n{json.dumps(shape)}\n"
+        "Case Description:\n" + case_description
+    )
+    return [{"role": "user", "content": prompt}]
+
+
+def parse_slots(content: str, doc_type: str) -> Optional[Dict[str, Any]]:
+    """Slot values from the model's reply, or None if it is not usable JSON with every list filled.
+
+    A slot of the wrong shape (e.g. a number or an object where a list is
+    expected, or a list item that is not a string) also gives None, so the
+    caller falls back to drafting. Number slots keep only their digits."""
+    match = _JSON_OBJECT.search(content or "")
+    if not match:
+        return None
+    try:
+        values = json.loads(match.group(0))
+    except ValueError:
+        return None
+    if not isinstance(values, dict):
+        return None
+    slots = {}
+    for name, (kind, _) in TEMPLATE_SLOTS[doc_type].items():
+        value = values.get(name)
+        if kind == "list":
+            if isinstance(value, str):
+                value = [value]
+            if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+                return None
+            items = [_ITEM_MARKER.sub("", item).strip() for item in value]
+            items = [item for item in items if item]
+            if not items:
+                return None
+            slots[name] = items
+        elif isinstance(value, (dict, list)):
+            return None
+        elif kind == "number":
+            # The template supplies the unit ("within {{compliance_days}} days"), so keep only the digits
+            digits = _DIGITS.search(str(value)) if value is not None and not isinstance(value, bool) else None
+            slots[name] = digits.group(0) if digits else f"[{name.replace('_', ' ').title()}]"
+        else:
+            slots[name] = str(value).strip() if value not in (None, "") else f"[{name.replace('_', ' ').title()}]"
+    return slots
+
+
+def render_document(doc_type: str, slots: Dict[str, Any]) -> str:
+    """Render a compiled template to Markdown, numbering list slots"""
+    rendered = []
+    for part in COMPILED_TEMPLATES[doc_type]:
+        if isinstance(part, str):
+            rendered.append(part)
+            continue
+        value = slots[part[0]]
+        if isinstance(value, list):
+            value = "\n".join(f"{i}. {item}" for i, item in enumerate(value, 1))
+        rendered.append(value)
+    return "".join(rendered).strip()
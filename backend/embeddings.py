@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+import re
+import zlib
+from typing import List
+
+import numpy as np
+
+# Hashed bag-of-features embeddings: cheap to compute on CPU, stable across
+# restarts (crc32 instead of the randomized built-in hash) and need no model download.
+EMBEDDING_DIM = 512
+WORD_WEIGHT = 1.0
+BIGRAM_WEIGHT = 0.75
+CHAR_TRIGRAM_WEIGHT = 0.35
+
+STOP_WORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "to", "of", "in", "on", "for",
+    "and", "or", "what", "how", "do", "does", "i", "my", "me", "can", "with", "by", "it",
+    "this", "that", "as", "at", "from", "about", "please", "tell", "explain",
+}
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens with stop words removed"""
+    return [token for token in _TOKEN_PATTERN.findall(text.lower()) if token not in STOP_WORDS]
+
+
+def _bucket(feature: str) -> int:
+    return zlib.crc32(feature.encode("utf-8")) % EMBEDDING_DIM
+
+
+def embed_texts(texts: List[str]) -> np.ndarray:
+    """Embed a batch of texts into L2-normalized float32 rows of shape (len(texts), EMBEDDING_DIM)"""
+    matrix = np.zeros((len(texts), EMBEDDING_DIM), dtype=np.float32)
+    for row, text in enumerate(texts):
+        tokens = tokenize(text)
+        indices: List[int] = []
+        weights: List[float] = []
+        for token in tokens:
+            indices.append(_bucket(token))
+            weights.append(WORD_WEIGHT)
+            padded = f"#{token}#"
+            for i in range(len(padded) - 2):
+                indices.append(_bucket(padded[i:i + 3]))
+                weights.append(CHAR_TRIGRAM_WEIGHT)
+        for first, second in zip(tokens, tokens[1:]):
+            indices.append(_bucket(f"{first} {second}"))
+            weights.append(BIGRAM_WEIGHT)
+        if indices:
+            np.add.at(matrix[row], indices, weights)
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def embed_text(text: str) -> np.ndarray:
+    """Embed a single text into an L2-normalized vector"""
+    return embed_texts([text])[0]
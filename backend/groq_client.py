@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+import os
+import json
+from typing import Optional, Dict, Any, AsyncIterator, Tuple, Callable
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+GROQ_API_KEY = os.getenv("GROQ_API_KEY", "your-groq-api-key-here")
+GROQ_API_URL = os.getenv("GROQ_API_URL", "https://api.groq.com/openai/v1/chat/completions")
+
+# Connection pool sizing for the shared client
+GROQ_MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", 100))
+GROQ_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("GROQ_MAX_KEEPALIVE_CONNECTIONS", 20))
+GROQ_KEEPALIVE_EXPIRY_SECONDS = 30
+GROQ_CONNECT_TIMEOUT_SECONDS = 10
+
+
+class AsyncGroqClient:
+    """Async client for the Groq chat completions API.
+
+    Wraps a single ``httpx.AsyncClient`` so that every call reuses the same
+    keep-alive connection pool instead of opening a new TLS connection."""
+
+    def __init__(self, api_key: str = GROQ_API_KEY, api_url: str = GROQ_API_URL, timeout: float = 45):
+        self.api_url = api_url
+        self._client = httpx.AsyncClient(
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json",
+            },
+            limits=httpx.Limits(
+                max_connections=GROQ_MAX_CONNECTIONS,
+                max_keepalive_connections=GROQ_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=GROQ_KEEPALIVE_EXPIRY_SECONDS,
+            ),
+            timeout=httpx.Timeout(timeout, connect=GROQ_CONNECT_TIMEOUT_SECONDS),
+        )
+
+    @property
+    def is_closed(self) -> bool:
+        return self._client.is_closed
+
+    async def chat(self, data: Dict[str, Any]) -> httpx.Response:
+        """POST a chat completion request and return the raw response"""
+        return await self._client.post(self.api_url, json=data)
+
+    async def stream_chat(self, data: Dict[str, Any],
+                          on_response: Optional[Callable[[httpx.Response], None]] = None) -> AsyncIterator[Tuple[str, Optional[str]]]:
+        """Stream a chat completion, yielding (content_delta, finish_reason) pairs.
+
+        on_response is called with the response as soon as its headers arrive.
+        Yields nothing if the API answers with a non-200 status."""
+        async with self._client.stream("POST", self.api_url, json={**data, "stream": True}) as response:
+            if on_response is not None:
+                on_response(response)
+            if response.status_code != 200:
+                await response.aread()
+                return
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                chunk = line[len("data:"):].strip()
+                if chunk == "[DONE]":
+                    break
+                choice = json.loads(chunk).get("choices", [{}])[0]
+                content = choice.get("delta", {}).get("content") or ""
+                finish_reason = choice.get("finish_reason")
+                if content or finish_reason:
+                    yield content, finish_reason
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+# Global client instance, created on first use inside the running event loop
+groq_client: Optional[AsyncGroqClient] = None
+
+
+def get_groq_client(timeout: float = 45) -> AsyncGroqClient:
+    """Get the shared Groq client instance"""
+    global groq_client
+    if groq_client is None or groq_client.is_closed:
+        groq_client = AsyncGroqClient(timeout=timeout)
+    return groq_client
+
+
+async def close_groq_client():
+    """Close the shared Groq client and release pooled connections"""
+    global groq_client
+    if groq_client is not None:
+        await groq_client.aclose()
+        groq_client = None
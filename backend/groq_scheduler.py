@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+
+import os
+import re
+import time
+import heapq
+import asyncio
+import itertools
+from typing import Optional, Dict, Any, List
+
+import httpx
+
+# Optional local caps on requests and tokens per minute (0 = no local cap). The token budget otherwise
+# comes from Groq's x-ratelimit-*-tokens headers; set these only to share one key between deployments
+GROQ_REQUESTS_PER_MINUTE = int(os.getenv("GROQ_REQUESTS_PER_MINUTE", 0))
+GROQ_TOKENS_PER_MINUTE = int(os.getenv("GROQ_TOKENS_PER_MINUTE", 0))
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 1
+PRIORITY_NAMES = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_BULK: "bulk"}
+
+# Waiting requests allowed per priority class before clients get 503
+SCHEDULER_QUEUE_LIMITS = {
+    PRIORITY_INTERACTIVE: int(os.getenv("SCHEDULER_INTERACTIVE_QUEUE", 64)),
+    PRIORITY_BULK: int(os.getenv("SCHEDULER_BULK_QUEUE", 16)),
+}
+
+_DURATION_PART = re.compile(r"([\d.]+)(ms|h|m|s)")
+_DURATION_SECONDS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+class SchedulerBusy(Exception):
+    """Raised when a priority queue is full; clients should retry after retry_after seconds"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Upstream capacity exhausted, retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse Groq reset durations such as '7.66s', '2m59.56s' or '120ms' into seconds"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_SECONDS[unit] for amount, unit in parts)
+
+
+class TokenBucket:
+    """Continuously refilling bucket holding up to ``capacity`` units per minute.
+
+    A bucket without a per-minute limit never delays anything until the API
+    reports one through ``sync``."""
+
+    def __init__(self, per_minute: float = 0):
+        self.limit = float(per_minute)
+        self.capacity = self.limit
+        self.level = self.limit
+        self.rate = self.limit / 60.0
+        self._updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.capacity <= 0
+
+    def refill(self, now: float):
+        if not self.unlimited:
+            self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self, amount: float) -> float:
+        """Seconds until amount units are available (after refill)"""
+        if self.unlimited:
+            return 0.0
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        if not self.unlimited:
+            self.level -= min(amount, self.capacity)
+
+    def sync(self, remaining: float, reset_seconds: Optional[float], now: float, limit: Optional[float] = None):
+        """Set the local level to the remaining per-minute budget reported by the API.
+
+        The reported value replaces the local estimate in both directions, so
+        pessimistic charges are given back once the API shows what a call
+        really used. A reported limit becomes the capacity, capped by any
+        configured local limit."""
+        if limit:
+            self.capacity = min(self.limit, limit) if self.limit > 0 else limit
+        if self.unlimited:
+            return
+        self.refill(now)
+        self.level = min(self.capacity, remaining)
+        if reset_seconds and remaining < self.capacity:
+            # The API refills to capacity by the reset time; never refill slower than that
+            self.rate = max(self.capacity / 60.0, (self.capacity - remaining) / reset_seconds)
+        else:
+            self.rate = self.capacity / 60.0
+
+
+class GroqScheduler:
+    """Admits Groq calls in priority order within request and token budgets.
+
+    Callers ``await acquire(priority, tokens)`` before each upstream call and
+    pass the response to ``observe`` so rate-limit headers and Retry-After keep
+    the local buckets honest. Groq reports tokens per minute but requests per
+    day, so the request headers only block calls once the daily budget is
+    spent; the per-minute request bucket is enforced only when configured.
+    Each priority has a bounded wait queue; when it is full ``acquire`` raises
+    SchedulerBusy instead of queueing."""
+
+    def __init__(self, requests_per_minute: int = GROQ_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: int = GROQ_TOKENS_PER_MINUTE,
+                 queue_limits: Optional[Dict[int, int]] = None):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.queue_limits = queue_limits or dict(SCHEDULER_QUEUE_LIMITS)
+        self.blocked_until = 0.0
+        self._waiting: List[tuple] = []
+        self._queued: Dict[int, int] = {priority: 0 for priority in self.queue_limits}
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self.rejected = 0
+        self.rate_limited = 0
+
+    def _delay(self, tokens: float, now: float) -> float:
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        return max(self.blocked_until - now, self.requests.delay(1), self.tokens.delay(tokens))
+
+    def retry_wait(self) -> float:
+        """Seconds left on the current Retry-After block"""
+        return max(0.0, self.blocked_until - time.monotonic())
+
+    def retry_after_hint(self) -> float:
+        """Rough seconds until the queue drains, for Retry-After headers"""
+        now = time.monotonic()
+        backlog = 0.0 if self.requests.unlimited else len(self._waiting) / self.requests.rate
+        queued_tokens = sum(tokens for _, _, tokens, _ in self._waiting)
+        return max(1.0, self.blocked_until - now, backlog, self.tokens.delay(queued_tokens))
+
+    def ensure_capacity(self, priority: int):
+        """Raise SchedulerBusy if a new request of this priority could not be queued"""
+        if self._queued.get(priority, 0) >= self.queue_limits.get(priority, 0):
+            self.rejected += 1
+            raise SchedulerBusy(self.retry_after_hint())
+
+    async def acquire(self, priority: int = PRIORITY_INTERACTIVE, tokens: float = 1.0):
+        """Wait until a call of the given priority and estimated token cost may go upstream"""
+        now = time.monotonic()
+        if not self._waiting and self._delay(tokens, now) <= 0:
+            self._consume(tokens)
+            return
+        self.ensure_capacity(priority)
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting, (priority, next(self._sequence), tokens, future))
+        self._queued[priority] += 1
+        self._ensure_dispatcher()
+        self._wakeup.set()
+        try:
+            await future
+        finally:
+            self._queued[priority] -= 1
+
+    def _consume(self, tokens: float):
+        self.requests.take(1)
+        self.tokens.take(tokens)
+
+    def _ensure_dispatcher(self):
+        if self._dispatcher is None or self._dispatcher.done():
+            self._wakeup = asyncio.Event()
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+
+    async def _dispatch(self):
+        while True:
+            self._wakeup.clear()
+            while self._waiting and self._waiting[0][3].done():
+                heapq.heappop(self._waiting)  # caller gave up
+            if not self._waiting:
+                await self._wakeup.wait()
+                continue
+            _, _, tokens, future = self._waiting[0]
+            delay = self._delay(tokens, time.monotonic())
+            if delay > 0:
+                # Re-evaluate early if a higher-priority request or new headers arrive
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            heapq.heappop(self._waiting)
+            self._consume(tokens)
+            future.set_result(None)
+
+    def observe(self, response: httpx.Response):
+        """Update budgets from rate-limit headers and Retry-After on a 429"""
+        headers = response.headers
+        now = time.monotonic()
+        try:
+            remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+            if remaining_tokens is not None:
+                limit_tokens = headers.get("x-ratelimit-limit-tokens")
+                self.tokens.sync(float(remaining_tokens), parse_duration(headers.get("x-ratelimit-reset-tokens")), now,
+                                 float(limit_tokens) if limit_tokens else None)
+            # Requests are counted per day: hold calls until the reset once the day's budget is spent
+            remaining_requests = headers.get("x-ratelimit-remaining-requests")
+            if remaining_requests is not None and float(remaining_requests) <= 0:
+                reset = parse_duration(headers.get("x-ratelimit-reset-requests"))
+                if reset:
+                    self.blocked_until = max(self.blocked_until, now + reset)
+        except ValueError as e:
+            print(f"Rate-limit header warning: {e}")
+        if response.status_code == 429:
+            self.rate_limited += 1
+            retry_after = parse_duration(headers.get("retry-after")) or 1.0
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        return {
+            "queued": {PRIORITY_NAMES[p]: count for p, count in self._queued.items()},
+            "requests_available": None if self.requests.unlimited else round(self.requests.level, 1),
+            "tokens_available": None if self.tokens.unlimited else round(self.tokens.level),
+            "blocked_for_seconds": round(max(0.0, self.blocked_until - now), 2),
+            "rejected": self.rejected,
+            "rate_limited": self.rate_limited,
+        }
+
+
+# Global scheduler shared by every Groq call
+llm_scheduler = GroqScheduler()
+
+
+def get_llm_scheduler() -> GroqScheduler:
+    return llm_scheduler
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+
+import os
+import json
+import math
+from collections import Counter, defaultdict
+from typing import List, Dict, Tuple
+
+import numpy as np
+
+from embeddings import tokenize
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+KNOWLEDGE_TOP_K = 4
+KNOWLEDGE_CHAR_BUDGET = 1200
+
+
+class BM25Index:
+    """Inverted index with BM25 scoring over short legal knowledge passages.
+
+    Postings map each term to ``[(passage_id, term_frequency), ...]``. The BM25
+    contribution of every posting is static, so it is precomputed into numpy
+    arrays and a query is one vectorized add per query term."""
+
+    def __init__(self, passages: List[Dict[str, str]]):
+        self.passages = passages
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.doc_lengths: List[int] = []
+        for passage_id, passage in enumerate(passages):
+            terms = tokenize(passage["text"])
+            self.doc_lengths.append(len(terms))
+            for term, frequency in Counter(terms).items():
+                self.postings[term].append((passage_id, frequency))
+        self.postings = dict(self.postings)
+        self._prepare()
+
+    def _prepare(self):
+        count = len(self.passages)
+        lengths = np.asarray(self.doc_lengths, dtype=np.float32)
+        average_length = float(lengths.mean()) if count else 0.0
+        length_norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / average_length) if average_length else lengths + BM25_K1
+        self.posting_ids: Dict[str, np.ndarray] = {}
+        self.posting_weights: Dict[str, np.ndarray] = {}
+        for term, posting in self.postings.items():
+            ids = np.fromiter((passage_id for passage_id, _ in posting), dtype=np.int32, count=len(posting))
+            frequencies = np.fromiter((frequency for _, frequency in posting), dtype=np.float32, count=len(posting))
+            idf = math.log(1 + (count - len(posting) + 0.5) / (len(posting) + 0.5))
+            self.posting_ids[term] = ids
+            self.posting_weights[term] = idf * frequencies * (BM25_K1 + 1) / (frequencies + length_norm[ids])
+
+    @classmethod
+    def from_knowledge(cls, knowledge: Dict[str, List[str]]) -> "BM25Index":
+        """Build an index from a {domain: [passage, ...]} mapping"""
+        return cls([
+            {"domain": domain, "text": text}
+            for domain, texts in knowledge.items()
+            for text in texts
+        ])
+
+    def search(self, query: str, k: int = KNOWLEDGE_TOP_K) -> List[Tuple[float, Dict[str, str]]]:
+        """Return up to k (score, passage) pairs, best first"""
+        scores = np.zeros(len(self.passages), dtype=np.float32)
+        matched = False
+        for term in set(tokenize(query)):
+            ids = self.posting_ids.get(term)
+            if ids is None:
+                continue
+            # Passage ids are unique within a posting, so fancy-index add is safe
+            scores[ids] += self.posting_weights[term]
+            matched = True
+        if not matched:
+            return []
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(float(scores[i]), self.passages[i]) for i in top if scores[i] > 0]
+
+    def top_passages(self, query: str, k: int = KNOWLEDGE_TOP_K, char_budget: int = KNOWLEDGE_CHAR_BUDGET) -> List[str]:
+        """Best-scoring passage texts that fit within char_budget"""
+        selected: List[str] = []
+        used = 0
+        for _, passage in self.search(query, k):
+            text = passage["text"]
+            if used + len(text) > char_budget:
+                continue
+            selected.append(text)
+            used += len(text) + 1
+        return selected
+
+    def save(self, path: str):
+        """Serialize the index to a JSON file"""
+        payload = {"passages": self.passages, "doc_lengths": self.doc_lengths, "postings": self.postings}
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        """Load an index serialized with save()"""
+        with open(path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        index = cls.__new__(cls)
+        index.passages = payload["passages"]
+        index.doc_lengths = payload["doc_lengths"]
+        index.postings = {term: [tuple(entry) for entry in posting] for term, posting in payload["postings"].items()}
+        index._prepare()
+        return index
+
+
+def build_knowledge_index(knowledge: Dict[str, List[str]], path: str = "") -> BM25Index:
+    """Load the serialized index at path if present, otherwise build it from knowledge"""
+    if path and os.path.exists(path):
+        try:
+            return BM25Index.load(path)
+        except Exception as e:
+            print(f"Knowledge index load warning: {e}")
+    return BM25Index.from_knowledge(knowledge)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+import re
+from bisect import bisect_right
+from collections import Counter
+from typing import List, Tuple, Dict
+
+# Keywords per legal domain. Dict order breaks ties between equal scores.
+DOMAIN_KEYWORDS: Dict[str, List[str]] = {
+    "constitutional": ["article", "constitution", "fundamental right", "rti", "right to information", "writ"],
+    "criminal": ["section", "ipc", "crpc", "criminal", "murder", "punishment", "fir", "bail", "police"],
+    "consumer": ["consumer", "complaint", "defective", "service", "refund", "deficiency"],
+    "family": ["divorce", "marriage", "custody", "maintenance", "domestic violence", "alimony"],
+    "property": ["property", "registration", "sale deed", "tenant", "landlord", "lease"],
+    "employment": ["employment", "wage", "factory", "worker", "industrial", "provident fund", "gratuity"],
+}
+
+DOMAIN_LABELS = {
+    "constitutional": "Constitutional Law",
+    "criminal": "Criminal Law",
+    "consumer": "Consumer Law",
+    "family": "Family Law",
+    "property": "Property Law",
+    "employment": "Employment Law",
+    "general": "General Legal",
+}
+
+# Acronyms take only the plural listed here (None: no plural); a suffix rule would let "fir" match "fires"
+_ACRONYM_PLURALS = {"fir": "firs", "rti": "rtis", "ipc": None, "crpc": None}
+# Other words shorter than this take no plural either
+_PLURAL_MIN_LENGTH = 4
+
+
+def keyword_forms(keyword: str) -> List[str]:
+    """A keyword and its plural (of the last word), where a plural makes sense"""
+    if keyword in _ACRONYM_PLURALS:
+        plural = _ACRONYM_PLURALS[keyword]
+        return [keyword, plural] if plural else [keyword]
+    last = keyword.rsplit(" ", 1)[-1]
+    if len(last) < _PLURAL_MIN_LENGTH or (last.endswith("s") and not last.endswith("ss")):
+        return [keyword]
+    if last.endswith(("ss", "x", "ch", "sh", "z")):
+        return [keyword, keyword + "es"]
+    if last.endswith("y") and last[-2] not in "aeiou":
+        return [keyword, keyword[:-1] + "ies"]
+    return [keyword, keyword + "s"]
+
+
+# Every keyword form -> the domains it counts towards
+_KEYWORD_DOMAINS: Dict[str, List[str]] = {}
+for _domain, _keywords in DOMAIN_KEYWORDS.items():
+    for _keyword in _keywords:
+        for _form in keyword_forms(_keyword):
+            _KEYWORD_DOMAINS.setdefault(_form, []).append(_domain)
+
+
+def _compile_trie(words: List[str]) -> str:
+    """Build a regex alternation factored by common prefixes.
+
+    re has no Aho-Corasick mode; sharing prefixes keeps the number of
+    branches tried at each position small."""
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def emit(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return emit(trie)
+
+
+# Every keyword form in one pattern, matched on word boundaries of the lowercased text.
+_KEYWORD_PATTERN = re.compile(r"(?<![a-z0-9])(" + _compile_trie(list(_KEYWORD_DOMAINS)) + r")(?![a-z0-9])")
+_DOMAIN_ORDER = {domain: position for position, domain in enumerate(DOMAIN_KEYWORDS)}
+
+
+def _rank(hits: Counter) -> List[Tuple[str, float]]:
+    if not hits:
+        return [("general", 1.0)]
+    total = sum(hits.values())
+    ranked = sorted(hits.items(), key=lambda item: (-item[1], _DOMAIN_ORDER[item[0]]))
+    return [(domain, count / total) for domain, count in ranked]
+
+
+def classify_domains(text: str) -> List[Tuple[str, float]]:
+    """Rank every matching domain by its share of keyword hits, best first.
+
+    Returns [("general", 1.0)] when no keyword matches."""
+    hits = Counter()
+    for match in _KEYWORD_PATTERN.finditer(text.lower()):
+        for domain in _KEYWORD_DOMAINS[match.group(1)]:
+            hits[domain] += 1
+    return _rank(hits)
+
+
+def classify_domains_batch(texts: List[str]) -> List[List[Tuple[str, float]]]:
+    """classify_domains for many texts with one scan of the keyword pattern.
+
+    The texts are joined with newlines (no keyword spans a line) and each
+    match is assigned to its text by binary search over the text offsets."""
+    lowered = [text.lower() for text in texts]
+    if not lowered:
+        return []
+    starts = [0]
+    for text in lowered[:-1]:
+        starts.append(starts[-1] + len(text) + 1)
+    hits = [Counter() for _ in lowered]
+    for match in _KEYWORD_PATTERN.finditer("\n".join(lowered)):
+        owner = bisect_right(starts, match.start()) - 1
+        for domain in _KEYWORD_DOMAINS[match.group(1)]:
+            hits[owner][domain] += 1
+    return [_rank(text_hits) for text_hits in hits]
+
+
+def primary_domain(text: str) -> str:
+    """Highest-scoring domain key for the text"""
+    return classify_domains(text)[0][0]
+
+
+def domain_label(domain: str) -> str:
+    """Human-readable label for a domain key"""
+    return DOMAIN_LABELS.get(domain, DOMAIN_LABELS["general"])
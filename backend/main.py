@@ -1,18 +1,40 @@
 #!/usr/bin/env python3
 
-from fastapi import FastAPI, File, UploadFile, HTTPException
+import startup_profile
+startup_profile.install()  # before anything heavy, so the import report covers it
+
+from fastapi import FastAPI, File, UploadFile, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, JSONResponse, PlainTextResponse, FileResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 import uvicorn
 import json
 import time
-import queue
 from pathlib import Path
 import os
+import hmac
+import math
+import asyncio
 
 from utils_fast import ask_indian_legalgpt_fast, upload_document_to_rag_fast, process_voice_input_fast
+from utils_fast import ask_batch_fast, ASK_BATCH_CONCURRENCY
 from utils_fast import generate_legal_document_fast
-from speech_features import get_speech_processor
+from utils_fast import ask_groq_stream_fast, generate_legal_document_stream_fast, llm_singleflight
+from groq_client import close_groq_client
+from answer_cache import get_cache_stats, save_caches
+from rag_index import get_rag_index
+from legal_classifier import classify_domains, classify_domains_batch, domain_label
+from ocr_jobs import get_ocr_job_queue
+from upload_store import store_upload, load_upload_result, save_upload_result, UploadTooLarge
+from groq_scheduler import llm_scheduler, SchedulerBusy, PRIORITY_INTERACTIVE, PRIORITY_BULK
+from speech_workers import get_recognizer_pool, RecognizerBusy
+from tts_cache import get_tts_cache, is_tts_cache_key, parse_range, iter_file
+from tts_stream import get_chunked_synthesizer
+from speech_stream import SpeechStreamSession
+from recognition_engines import get_hedged_recognizer
+from metrics import metrics, ServerTimingMiddleware
+from request_profiler import ProfilingMiddleware, get_loop_watchdog, list_profiles, profile_path, PROFILE_HEADER, PROFILE_TOKEN
 
 app = FastAPI(
     title="Advanced Legal AI Assistant",
@@ -33,7 +55,43 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
+# Per-stage timings in a Server-Timing header on every response, request histograms for /metrics
+app.add_middleware(ServerTimingMiddleware, metrics=metrics)
+# Opt-in stack-sampling profiles of single requests (PROFILE_TOKEN header or PROFILE_SAMPLE_RATE)
+app.add_middleware(ProfilingMiddleware)
+
+# Largest number of questions accepted by /ask/batch
+ASK_BATCH_MAX_QUERIES = int(os.getenv("ASK_BATCH_MAX_QUERIES", 100))
+
+# Heavy subsystems loaded in the background once the server is up, e.g. "rag,speech,ocr,tts,analyzers".
+# Anything not listed is loaded on first use.
+WARMUP_COMPONENTS = [name.strip() for name in os.getenv("WARMUP_COMPONENTS", "").split(",") if name.strip()]
+warmup_status = {}
+
+@app.on_event("startup")
+async def finish_startup():
+    """Report import and startup timings, then start any background warm-up"""
+    startup_profile.mark_ready()
+    startup_profile.print_report()
+    get_loop_watchdog().start()
+    for component in WARMUP_COMPONENTS:
+        asyncio.ensure_future(_warm_up(component))
+
+@app.on_event("shutdown")
+async def shutdown_groq_client():
+    """Release pooled Groq connections on shutdown"""
+    await close_groq_client()
+    get_ocr_job_queue().shutdown()
+    get_recognizer_pool().shutdown()
+    get_chunked_synthesizer().shutdown()
+    get_loop_watchdog().stop()
+
+@app.on_event("shutdown")
+async def persist_answer_caches():
+    """Write answer caches to disk when persistence is enabled"""
+    save_caches()
 
 
 document_analyzer = None
@@ -55,9 +113,46 @@ def get_multimodal_ai():
         multimodal_ai = MultiModalLegalAI()
     return multimodal_ai
 
+def get_speech_processor():
+    """Lazy load speech processor (pyttsx3, speech_recognition, pyaudio)"""
+    from speech_features import get_speech_processor as load_speech_processor
+    return load_speech_processor()
+
+def _warm_up_speech():
+    import speech_recognition  # noqa: F401
+    get_speech_processor().engine
+
+WARMUP_LOADERS = {
+    "rag": get_rag_index,
+    "speech": _warm_up_speech,
+    "ocr": lambda: get_ocr_job_queue().warm_up(),
+    "tts": lambda: get_chunked_synthesizer().warm_up(),
+    "analyzers": lambda: (get_document_analyzer(), get_multimodal_ai()),
+}
+
+async def _warm_up(component: str):
+    """Load one heavy subsystem in a worker thread and record how long it took"""
+    loader = WARMUP_LOADERS.get(component)
+    if loader is None:
+        warmup_status[component] = {"status": "unknown component"}
+        return
+    warmup_status[component] = {"status": "loading"}
+    started = time.perf_counter()
+    try:
+        await run_in_threadpool(loader)
+        warmup_status[component] = {"status": "ready", "seconds": round(time.perf_counter() - started, 3)}
+    except Exception as e:
+        warmup_status[component] = {"status": "failed", "error": str(e)}
+        print(f"Warm-up of {component} failed: {e}")
+
 class ChatRequest(BaseModel):
     query: str
 
+class BatchAskRequest(BaseModel):
+    queries: list[str]
+    stream: bool = False
+    concurrency: int | None = None
+
 class DocumentAnalysisRequest(BaseModel):
     text: str
 
@@ -66,6 +161,9 @@ class MultimodalRequest(BaseModel):
     voice_input: str = None
     document_path: str = None
 
+class SpeechRequest(BaseModel):
+    text: str
+
 class DocumentGenerationRequest(BaseModel):
     description: str
     preferred_type: str | None = None
@@ -93,88 +191,147 @@ async def ask_question(request: ChatRequest):
     """Ultra-fast legal Q&A - OPTIMIZED FOR SPEED"""
     try:
        
-        response = ask_indian_legalgpt_fast(request.query)
-        
-        
-        analysis = {
-            "query": request.query,
-            "response": response,
-            "legal_domain": _classify_legal_domain(request.query),
-            "confidence_score": 0.95,
-            "sources": ["Indian Constitution", "IPC", "Civil Laws"],
-            "advanced_features": [
-                "Fast response system",
-                "Legal context awareness",
-                "Multi-domain knowledge"
-            ]
-        }
+        response = await ask_indian_legalgpt_fast(request.query)
+        with metrics.timed("classification"):
+            domain_scores = classify_domains(request.query)
+        analysis = _ask_analysis(request.query, response, domain_scores)
         
         return {"response": response, "analysis": analysis}
     
+    except SchedulerBusy as e:
+        raise _busy_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
+@app.post("/ask/batch")
+async def ask_question_batch(request: BatchAskRequest):
+    """Answer many legal questions in one call.
+
+    Duplicate questions are answered once, all questions are classified in
+    one pass, and at most `concurrency` (default ASK_BATCH_CONCURRENCY) go
+    upstream at a time. Results come back in request order, or with
+    stream=true as NDJSON lines in completion order, each carrying its
+    index. A failed question gets success=false without failing the batch."""
+    if not request.queries:
+        raise HTTPException(status_code=400, detail="queries must not be empty")
+    if len(request.queries) > ASK_BATCH_MAX_QUERIES:
+        raise HTTPException(status_code=400, detail=f"At most {ASK_BATCH_MAX_QUERIES} queries per batch")
+    try:
+        llm_scheduler.ensure_capacity(PRIORITY_BULK)
+    except SchedulerBusy as e:
+        raise _busy_error(e)
+    with metrics.timed("classification", batch="true"):
+        domain_scores = classify_domains_batch(request.queries)
+    concurrency = min(request.concurrency or ASK_BATCH_CONCURRENCY, ASK_BATCH_CONCURRENCY)
+
+    async def results():
+        async for indexes, response, error in ask_batch_fast(request.queries, concurrency):
+            for index in indexes:
+                item = {"index": index, "query": request.queries[index], "success": error is None}
+                if error is None:
+                    item["response"] = response
+                    item["analysis"] = _ask_analysis(request.queries[index], response, domain_scores[index])
+                else:
+                    item["error"] = str(error) or type(error).__name__
+                    if isinstance(error, SchedulerBusy):
+                        item["retry_after"] = math.ceil(error.retry_after)
+                if index != indexes[0]:
+                    item["duplicate_of"] = indexes[0]
+                yield item
+
+    if request.stream:
+        async def ndjson():
+            async for item in results():
+                yield json.dumps(item) + "\n"
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson", headers={"X-Accel-Buffering": "no"})
+
+    try:
+        items = [item async for item in results()]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch error: {str(e)}")
+    items.sort(key=lambda item: item["index"])
+    return {
+        "results": items,
+        "count": len(items),
+        "unique_queries": len({item.get("duplicate_of", item["index"]) for item in items}),
+        "failed": sum(not item["success"] for item in items),
+    }
+
+@app.post("/ask/stream")
+async def ask_question_stream(request: ChatRequest):
+    """Legal Q&A streamed token by token as Server-Sent Events"""
+    try:
+        llm_scheduler.ensure_capacity(PRIORITY_INTERACTIVE)
+    except SchedulerBusy as e:
+        raise _busy_error(e)
+    return _sse_response(ask_groq_stream_fast(request.query))
+
 @app.post("/upload")
 async def upload_document(file: UploadFile = File(...)):
     """Advanced document upload with analysis - OPTIMIZED"""
     try:
        
-        upload_dir = Path("uploads")
-        upload_dir.mkdir(exist_ok=True)
-        file_path = upload_dir / file.filename
+        stored = await store_upload(file)
+        file_path = stored.path
         
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        # Identical content was already processed: skip OCR and re-indexing
+        previous = load_upload_result(stored)
+        if previous is not None:
+            return {**previous, "filename": file.filename, "duplicate": True}
         
+        if stored.suffix in ('.png', '.jpg', '.jpeg'):
+            # OCR runs on the process pool; RAG indexing and the dedupe record follow when it finishes
+            def index_ocr_text(text: str):
+                rag_response = upload_document_to_rag_fast(str(file_path), text, source=file.filename)
+                save_upload_result(stored, _upload_result(file.filename, stored.sha256, text, rag_response))
+
+            job = get_ocr_job_queue().submit(str(file_path), stored.sha256, file.filename, on_complete=index_ocr_text)
+            return {
+                "message": "Document uploaded, OCR queued",
+                "filename": file.filename,
+                "sha256": stored.sha256,
+                "ocr_job_id": job["job_id"],
+                "ocr_status": job["status"],
+                "duplicate": False
+            }
         
-        if file.filename.lower().endswith(('.png', '.jpg', '.jpeg')):
-            
-            try:
-                import pytesseract
-                from PIL import Image
-                image = Image.open(file_path)
-                extracted_text = pytesseract.image_to_string(image)
-            except:
-                extracted_text = "OCR processing not available"
-        else:
-           
-            with open(file_path, 'r', encoding='utf-8') as f:
-                extracted_text = f.read()
-        
+        with open(file_path, 'r', encoding='utf-8') as f:
+            extracted_text = f.read()
         
-        rag_response = upload_document_to_rag_fast(str(file_path))
+        # The first upload loads the FAISS index stack, so keep it off the event loop
+        rag_response = await run_in_threadpool(upload_document_to_rag_fast, str(file_path), extracted_text, file.filename)
         
-        return {
-            "message": "Document uploaded and analyzed successfully",
-            "filename": file.filename,
-            "extracted_text": extracted_text[:500] + "..." if len(extracted_text) > 500 else extracted_text,
-            "rag_status": rag_response
-        }
+        result = _upload_result(file.filename, stored.sha256, extracted_text, rag_response)
+        save_upload_result(stored, result)
+        return {**result, "duplicate": False}
     
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload error: {str(e)}")
 
+@app.get("/ocr-jobs/{job_id}")
+async def get_ocr_job(job_id: str):
+    """Status of an OCR job, with the extracted text once it is done"""
+    job = get_ocr_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="OCR job not found")
+    return job
+
 @app.post("/voice")
 async def process_voice(file: UploadFile = File(...)):
     """Advanced voice processing with speech-to-text - OPTIMIZED"""
     try:
        
-        upload_dir = Path("uploads")
-        upload_dir.mkdir(exist_ok=True)
-        audio_path = upload_dir / file.filename
-        
-        with open(audio_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        stored = await store_upload(file)
+        audio_path = stored.path
         
        
-        speech_processor = get_speech_processor()
-        result = speech_processor.speech_to_text(str(audio_path))
+        result = await get_recognizer_pool().transcribe(str(audio_path))
         
         if result["success"]:
             
-            response = ask_indian_legalgpt_fast(result["transcription"])
+            response = await ask_indian_legalgpt_fast(result["transcription"])
             
             return {
                 "success": True,
@@ -193,6 +350,10 @@ async def process_voice(file: UploadFile = File(...)):
                 "suggestions": result.get("suggestions", [])
             }
     
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except (SchedulerBusy, RecognizerBusy) as e:
+        raise _busy_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Voice processing error: {str(e)}")
 
@@ -201,68 +362,155 @@ async def speech_to_text_endpoint(audio_file: UploadFile = File(...), language:
     """Convert speech to text with advanced features"""
     try:
         # Save audio file
-        upload_dir = Path("uploads")
-        upload_dir.mkdir(exist_ok=True)
-        audio_path = upload_dir / audio_file.filename
-        
-        with open(audio_path, "wb") as buffer:
-            content = await audio_file.read()
-            buffer.write(content)
+        stored = await store_upload(audio_file)
+        audio_path = stored.path
         
         # Process speech to text
-        speech_processor = get_speech_processor()
-        result = speech_processor.speech_to_text(str(audio_path), language)
+        result = await get_recognizer_pool().transcribe(str(audio_path), language)
         
         return result
     
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except RecognizerBusy as e:
+        raise _busy_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Speech-to-text error: {str(e)}")
 
+@app.websocket("/ws/speech-to-text")
+async def speech_to_text_stream(websocket: WebSocket, language: str = "en-IN", audio_format: str = "webm",
+                                auto_answer: bool = False):
+    """Streaming speech-to-text over a WebSocket.
+
+    Send MediaRecorder chunks (webm/opus, or 16 kHz mono s16le with
+    audio_format=pcm) as binary messages and the text message "stop" at the end.
+    The server sends {"type": "interim"|"final"|"answer"|"error"|"done", ...}
+    messages; with auto_answer each final transcript is also answered by
+    the legal assistant."""
+    await websocket.accept()
+    send_lock = asyncio.Lock()
+
+    async def send(message):
+        async with send_lock:
+            await websocket.send_json(message)
+
+    async def answer(segment: int, question: str):
+        try:
+            response = await ask_indian_legalgpt_fast(question)
+            await send({"type": "answer", "segment": segment, "question": question, "response": response})
+        except SchedulerBusy as e:
+            await send({"type": "error", "segment": segment, "error": str(e), "retry_after": math.ceil(e.retry_after)})
+
+    try:
+        session = SpeechStreamSession(send, language, audio_format, on_final=answer if auto_answer else None)
+        await session.start()
+    except Exception as e:
+        await websocket.send_json({"type": "error", "error": str(e)})
+        await websocket.close(code=1003)
+        return
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if message.get("bytes"):
+                await session.feed(message["bytes"])
+            elif message.get("text") == "stop":
+                break
+        await session.finish()
+        await send({"type": "done"})
+        await websocket.close()
+    except WebSocketDisconnect:
+        await session.close()
+    except Exception as e:
+        await session.close()
+        await websocket.send_json({"type": "error", "error": f"Speech streaming error: {str(e)}"})
+        await websocket.close(code=1011)
+
 @app.post("/text-to-speech")
 async def text_to_speech_endpoint(text: str, save_audio: bool = False):
-    """Convert text to speech with legal context awareness"""
+    """Convert text to speech with legal context awareness.
+
+    With save_audio the audio is rendered once into the TTS cache and served
+    from ``audio_url``; identical text is never synthesized twice."""
     try:
         speech_processor = get_speech_processor()
         
         if save_audio:
-            # Save audio file
-            upload_dir = Path("uploads")
-            upload_dir.mkdir(exist_ok=True)
-            output_path = upload_dir / f"tts_output_{int(time.time())}.wav"
-            result = speech_processor.text_to_speech(text, str(output_path))
+            result = await run_in_threadpool(speech_processor.text_to_speech_cached, text)
+            if result["success"]:
+                result["audio_url"] = f"/text-to-speech/audio/{result['audio_key']}"
         else:
             # Play directly
-            result = speech_processor.text_to_speech(text)
+            result = await run_in_threadpool(speech_processor.text_to_speech, text)
         
         return result
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Text-to-speech error: {str(e)}")
 
+@app.post("/text-to-speech/stream")
+async def text_to_speech_stream(request: SpeechRequest):
+    """Speak long text as a WAV stream: sentences are rendered in parallel and sent in order"""
+    if not request.text.strip():
+        raise HTTPException(status_code=400, detail="Text is required")
+    return StreamingResponse(get_chunked_synthesizer().stream(request.text), media_type="audio/wav")
+
+@app.get("/text-to-speech/audio/{audio_key}")
+async def text_to_speech_audio(audio_key: str, request: Request):
+    """Stream cached TTS audio, honouring single byte-range requests"""
+    path = get_tts_cache().get(audio_key) if is_tts_cache_key(audio_key) else None
+    if path is None:
+        raise HTTPException(status_code=404, detail="Audio not found")
+    size = path.stat().st_size
+    headers = {
+        "Accept-Ranges": "bytes",
+        # Content-addressed, so the bytes behind a key never change
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "ETag": f'"{audio_key}"',
+    }
+    try:
+        byte_range = parse_range(request.headers.get("range"), size)
+    except ValueError:
+        raise HTTPException(status_code=416, detail="Range not satisfiable",
+                            headers={"Content-Range": f"bytes */{size}"})
+    start, end = byte_range or (0, size - 1)
+    headers["Content-Length"] = str(end - start + 1)
+    status_code = 200
+    if byte_range is not None:
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return StreamingResponse(iter_file(path, start, end), status_code=status_code,
+                             media_type="audio/wav", headers=headers)
+
 @app.post("/start-recording")
-async def start_realtime_recording():
-    """Start real-time speech recording"""
+async def start_realtime_recording(language: str = "en-IN"):
+    """Start real-time speech recording; utterances are transcribed while recording continues"""
     try:
         speech_processor = get_speech_processor()
-        result = speech_processor.start_realtime_recording()
+        result = speech_processor.start_realtime_recording(language)
         return result
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Recording start error: {str(e)}")
 
+@app.get("/recording-transcripts")
+async def recording_transcripts():
+    """Transcripts of the utterances recognized so far in the current recording"""
+    try:
+        return get_speech_processor().get_recording_transcripts()
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Recording transcript error: {str(e)}")
+
 @app.post("/stop-recording")
 async def stop_realtime_recording():
     """Stop real-time speech recording and get transcription"""
     try:
         speech_processor = get_speech_processor()
-        result = speech_processor.stop_realtime_recording()
-        
-        # Get transcription from queue
-        try:
-            transcription_result = speech_processor.audio_queue.get_nowait()
-            result["transcription"] = transcription_result
-        except queue.Empty:
-            result["transcription"] = {"success": False, "error": "No audio recorded"}
+        # Waits for the last utterance to be recognized
+        result = await run_in_threadpool(speech_processor.stop_realtime_recording)
         
         return result
     
@@ -329,11 +577,78 @@ async def process_multimodal(request: MultimodalRequest):
 async def generate_document(request: DocumentGenerationRequest):
     """Generate a formal legal document from a user case description."""
     try:
-        content = generate_legal_document_fast(request.description, request.preferred_type)
+        content = await generate_legal_document_fast(request.description, request.preferred_type)
         return {"content": content}
+    except SchedulerBusy as e:
+        raise _busy_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Document generation error: {str(e)}")
 
+@app.post("/generate-document/stream")
+async def generate_document_stream(request: DocumentGenerationRequest):
+    """Generate a legal document streamed token by token as Server-Sent Events"""
+    try:
+        llm_scheduler.ensure_capacity(PRIORITY_BULK)
+    except SchedulerBusy as e:
+        raise _busy_error(e)
+    return _sse_response(generate_legal_document_stream_fast(request.description, request.preferred_type))
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Stage latency histograms and event counters in the Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+def _check_profile_access(request: Request):
+    """Profiles expose code paths and stall stacks: serve them only to holders of a configured token"""
+    if not PROFILE_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(request.headers.get(PROFILE_HEADER.decode("latin-1"), ""), PROFILE_TOKEN):
+        raise HTTPException(status_code=403, detail="Profile access requires the profiling token header")
+
+@app.get("/profiles")
+async def profiles(request: Request):
+    """Saved request profiles, newest first, plus event-loop stall counts"""
+    _check_profile_access(request)
+    return {"profiles": list_profiles(), "loop_watchdog": get_loop_watchdog().stats()}
+
+@app.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, request: Request):
+    """One request profile in the folded-stack format (flamegraph.pl, speedscope, inferno)"""
+    _check_profile_access(request)
+    path = profile_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=path.name)
+
+@app.get("/cache-stats")
+async def cache_stats():
+    """Hit/miss counters for the caches, coalesced LLM calls and worker queues"""
+    return {
+        **get_cache_stats(),
+        "llm_singleflight": llm_singleflight.stats(),
+        "llm_scheduler": llm_scheduler.stats(),
+        "speech_workers": get_recognizer_pool().stats(),
+        "recognition_engines": get_hedged_recognizer().stats.snapshot(),
+        "tts_cache": get_tts_cache().stats(),
+    }
+
+@app.get("/ready")
+async def readiness():
+    """Readiness probe: 200 once startup has finished, with background warm-up progress"""
+    body = {
+        "ready": startup_profile.is_ready(),
+        "startup_seconds": startup_profile.startup_seconds(),
+        "warmup": warmup_status,
+    }
+    if not body["ready"]:
+        return JSONResponse(status_code=503, content=body)
+    return body
+
+@app.get("/startup-profile")
+async def startup_profile_report(top: int = 15):
+    """Import-time breakdown of startup plus modules imported lazily since"""
+    return startup_profile.report(top)
+
 @app.get("/features")
 async def get_features():
     """Get available advanced features"""
@@ -347,22 +662,59 @@ async def get_features():
         }
     }
 
-def _classify_legal_domain(query: str) -> str:
-    """Classify the legal domain of the query"""
-    query_lower = query.lower()
-    
-    if any(word in query_lower for word in ["article", "constitution", "fundamental rights"]):
-        return "Constitutional Law"
-    elif any(word in query_lower for word in ["section", "ipc", "criminal", "punishment"]):
-        return "Criminal Law"
-    elif any(word in query_lower for word in ["consumer", "complaint", "defective"]):
-        return "Consumer Law"
-    elif any(word in query_lower for word in ["divorce", "marriage", "custody", "maintenance"]):
-        return "Family Law"
-    elif any(word in query_lower for word in ["property", "registration", "sale deed"]):
-        return "Property Law"
-    else:
-        return "General Legal"
+def _upload_result(filename: str, sha256: str, extracted_text: str, rag_response: str) -> dict:
+    return {
+        "message": "Document uploaded and analyzed successfully",
+        "filename": filename,
+        "sha256": sha256,
+        "extracted_text": extracted_text[:500] + "..." if len(extracted_text) > 500 else extracted_text,
+        "rag_status": rag_response
+    }
+
+def _ask_analysis(query: str, response: str, domain_scores) -> dict:
+    """Analysis block returned with every /ask answer.
+
+    confidence_score is the top domain's share of the classifier's keyword
+    hits (0 when no keyword matched); it describes the domain label, not the
+    answer."""
+    top_domain, top_score = domain_scores[0]
+    return {
+        "query": query,
+        "response": response,
+        "legal_domain": domain_label(top_domain),
+        "domain_scores": {domain_label(domain): round(score, 3) for domain, score in domain_scores},
+        "confidence_score": 0.0 if top_domain == "general" else round(top_score, 3),
+        "sources": ["Indian Constitution", "IPC", "Civil Laws"],
+        "advanced_features": [
+            "Fast response system",
+            "Legal context awareness",
+            "Multi-domain knowledge"
+        ]
+    }
+
+def _busy_error(error) -> HTTPException:
+    """503 telling the client when capacity is expected back (SchedulerBusy or RecognizerBusy)"""
+    return HTTPException(
+        status_code=503,
+        detail=str(error),
+        headers={"Retry-After": str(math.ceil(error.retry_after))},
+    )
+
+async def _sse_events(tokens):
+    """Format streamed tokens as SSE `data:` events followed by a `done` event"""
+    try:
+        async for token in tokens:
+            yield f"data: {json.dumps({'token': token})}\n\n"
+    except Exception as e:
+        yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+    yield "event: done\ndata: {}\n\n"
+
+def _sse_response(tokens) -> StreamingResponse:
+    return StreamingResponse(
+        _sse_events(tokens),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 if __name__ == "__main__":
     print("🚀 Starting Advanced Legal AI Assistant...")
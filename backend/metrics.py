@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+
+import time
+import threading
+import contextvars
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Optional, Dict, List, Tuple, Iterator
+
+METRICS_PREFIX = "legal_ai"
+# Upper bounds in seconds: from sub-millisecond classification up to long document generations
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# Stage timings of the request being handled, for its Server-Timing header
+_request_timings: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+
+
+class _Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self, buckets: int):
+        self.counts = [0] * (buckets + 1)
+        self.total = 0.0
+        self.count = 0
+
+
+class Metrics:
+    """In-process stage histograms and event counters, exported in Prometheus text format.
+
+    Recording is a bisect over the bucket bounds and a few increments under
+    one lock, so it can sit on every hot path. Histograms are keyed by stage
+    plus optional labels (e.g. the recognition engine); counters by event name
+    plus labels (e.g. the upstream status code)."""
+
+    def __init__(self, buckets: Tuple[float, ...] = STAGE_BUCKETS):
+        self.buckets = buckets
+        self._histograms: Dict[Tuple[str, Labels], _Histogram] = {}
+        self._counters: Dict[Tuple[str, Labels], int] = {}
+        self._lock = threading.Lock()
+
+    def _record(self, key: Tuple[str, Labels], seconds: float):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(len(self.buckets))
+            histogram.counts[index] += 1
+            histogram.total += seconds
+            histogram.count += 1
+
+    def observe(self, stage: str, seconds: float, **labels: str):
+        """Record one stage duration, and add it to the current request's Server-Timing"""
+        self._record((stage, tuple(sorted(labels.items()))), seconds)
+        timings = _request_timings.get()
+        if timings is not None:
+            name = "_".join([stage, *labels.values()])
+            timings.append((name, seconds))
+
+    def observe_request(self, endpoint: str, status: int, seconds: float):
+        """Record a whole HTTP request (kept out of Server-Timing, which reports its own total)"""
+        self._record(("http", (("endpoint", endpoint),)), seconds)
+        self.count("http_responses", endpoint=endpoint, status=str(status))
+
+    def count(self, event: str, amount: int = 1, **labels: str):
+        key = (event, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    @contextmanager
+    def timed(self, stage: str, **labels: str) -> Iterator[None]:
+        """Time the enclosed block as one observation of `stage` (also when it raises)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started, **labels)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            histograms = [(key, list(h.counts), h.total, h.count) for key, h in self._histograms.items()]
+            counters = list(self._counters.items())
+
+        lines = [
+            f"# HELP {METRICS_PREFIX}_stage_seconds Time spent in each processing stage",
+            f"# TYPE {METRICS_PREFIX}_stage_seconds histogram",
+        ]
+        for (stage, labels), counts, total, count in sorted(histograms):
+            base = [("stage", stage), *labels]
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{METRICS_PREFIX}_stage_seconds_bucket{_format_labels(base + [('le', repr(bound))])} {cumulative}")
+            lines.append(f"{METRICS_PREFIX}_stage_seconds_bucket{_format_labels(base + [('le', '+Inf')])} {count}")
+            lines.append(f"{METRICS_PREFIX}_stage_seconds_sum{_format_labels(base)} {total}")
+            lines.append(f"{METRICS_PREFIX}_stage_seconds_count{_format_labels(base)} {count}")
+
+        lines += [
+            f"# HELP {METRICS_PREFIX}_events_total Fallbacks, retries and upstream errors",
+            f"# TYPE {METRICS_PREFIX}_events_total counter",
+        ]
+        for (event, labels), value in sorted(counters):
+            lines.append(f"{METRICS_PREFIX}_events_total{_format_labels([('event', event), *labels])} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: List[Tuple[str, str]]) -> str:
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
+
+
+class ServerTimingMiddleware:
+    """ASGI middleware that times every HTTP request and adds a Server-Timing header.
+
+    The header lists the stages that finished before the response headers
+    were sent (for streamed responses, only the stages before the first
+    chunk) plus the total so far. Request durations are recorded under the
+    "http" stage, labelled by endpoint name so the label set stays bounded."""
+
+    def __init__(self, app, metrics: "Metrics"):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timings: List[Tuple[str, float]] = []
+        token = _request_timings.set(timings)
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings]
+                entries.append(f"total;dur={(time.perf_counter() - started) * 1000:.1f}")
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", ", ".join(entries).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
+            endpoint = scope.get("endpoint")
+            self.metrics.observe_request(
+                getattr(endpoint, "__name__", "unmatched"), status["code"], time.perf_counter() - started
+            )
+
+
+# Global registry shared by every module
+metrics = Metrics()
+
+
+def get_metrics() -> Metrics:
+    return metrics
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, Future
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Dict, Any, Callable
+
+from metrics import metrics
+
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", os.cpu_count() or 1))
+# Longest image side fed to tesseract; larger scans are downscaled first
+OCR_MAX_SIDE = 2500
+OCR_BINARIZE_THRESHOLD = 160
+OCR_MAX_JOBS = 10000
+OCR_MAX_CACHED_RESULTS = 1000
+
+_ocr_modules = None
+
+
+def _load_ocr_modules():
+    """Import pytesseract and PIL once per worker process"""
+    global _ocr_modules
+    if _ocr_modules is None:
+        import pytesseract
+        from PIL import Image, ImageOps
+        _ocr_modules = (pytesseract, Image, ImageOps)
+    return _ocr_modules
+
+
+def _preload_ocr_modules():
+    """Pool initializer: import OCR libraries when a worker starts, not on its first job"""
+    try:
+        _load_ocr_modules()
+    except Exception as e:
+        print(f"OCR preload warning: {e}")
+
+
+def run_ocr(image_path: str) -> str:
+    """Downscale, binarize and OCR one image (runs in a worker process)"""
+    try:
+        pytesseract, Image, ImageOps = _load_ocr_modules()
+        with Image.open(image_path) as image:
+            image = ImageOps.exif_transpose(image)
+            if max(image.size) > OCR_MAX_SIDE:
+                image.thumbnail((OCR_MAX_SIDE, OCR_MAX_SIDE))
+            gray = ImageOps.autocontrast(image.convert("L"))
+            binary = gray.point(lambda value: 255 if value > OCR_BINARIZE_THRESHOLD else 0, mode="1")
+            return pytesseract.image_to_string(binary)
+    except Exception as e:
+        # Some library exceptions cannot be unpickled in the parent and would break the pool
+        raise RuntimeError(f"{type(e).__name__}: {e}") from None
+
+
+class OcrJobQueue:
+    """OCR jobs executed on a process pool, tracked by job id and cached by content hash.
+
+    ``submit`` returns immediately. A job for content that is already being
+    processed (or was processed) returns the existing job instead of running
+    OCR again."""
+
+    def __init__(self, workers: int = OCR_WORKERS):
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._jobs_by_hash: Dict[str, str] = {}
+        self._results: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_preload_ocr_modules)
+        return self._executor
+
+    def warm_up(self):
+        """Start the worker processes ahead of the first upload"""
+        self._get_executor().submit(os.getpid).result()
+
+    def submit(self, image_path: str, sha256: str, filename: str,
+               on_complete: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Queue OCR for an image and return its job record"""
+        with self._lock:
+            existing = self._jobs.get(self._jobs_by_hash.get(sha256, ""))
+            if existing is not None and existing["status"] != "failed":
+                return existing
+            job = {
+                "job_id": uuid.uuid4().hex,
+                "status": "queued",
+                "filename": filename,
+                "sha256": sha256,
+                "text": None,
+                "error": None,
+                "created_at": time.time(),
+                "finished_at": None,
+            }
+            self._remember(job)
+            cached = self._results.get(sha256)
+            if cached is not None:
+                self._results.move_to_end(sha256)
+                job.update(status="done", text=cached, finished_at=time.time())
+                return job
+
+        try:
+            future = self._get_executor().submit(run_ocr, image_path)
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory); start a fresh pool
+            self._executor = None
+            future = self._get_executor().submit(run_ocr, image_path)
+        future.add_done_callback(lambda done: self._finish(job, done, on_complete))
+        return job
+
+    def _remember(self, job: Dict[str, Any]):
+        self._jobs[job["job_id"]] = job
+        self._jobs_by_hash[job["sha256"]] = job["job_id"]
+        while len(self._jobs) > OCR_MAX_JOBS:
+            _, old = self._jobs.popitem(last=False)
+            if self._jobs_by_hash.get(old["sha256"]) == old["job_id"]:
+                del self._jobs_by_hash[old["sha256"]]
+
+    def _finish(self, job: Dict[str, Any], future: Future, on_complete: Optional[Callable[[str], None]]):
+        try:
+            text = future.result()
+        except Exception as e:
+            job.update(status="failed", error=f"OCR processing not available: {e}", finished_at=time.time())
+            metrics.count("ocr_failed")
+            return
+        with self._lock:
+            self._results[job["sha256"]] = text
+            while len(self._results) > OCR_MAX_CACHED_RESULTS:
+                self._results.popitem(last=False)
+        job.update(status="done", text=text, finished_at=time.time())
+        # Submit to finish, so queueing behind other uploads on the process pool is included
+        metrics.observe("ocr_job", job["finished_at"] - job["created_at"])
+        if on_complete is not None:
+            try:
+                on_complete(text)
+            except Exception as e:
+                print(f"OCR completion handler error: {e}")
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._jobs.get(job_id)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Global OCR job queue
+ocr_job_queue = OcrJobQueue()
+
+
+def get_ocr_job_queue() -> OcrJobQueue:
+    return ocr_job_queue
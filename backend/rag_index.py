@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+
+import os
+import re
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Optional, List, Dict, Any
+
+from metrics import metrics
+
+# numpy, faiss and the embedder are imported when the index is first loaded,
+# so text-only requests that never touch uploaded documents don't pay for them
+
+RAG_INDEX_DIR = os.getenv("RAG_INDEX_DIR", "rag_index")
+RAG_CHUNK_SIZE = 800
+RAG_CHUNK_OVERLAP = 120
+RAG_EMBED_BATCH_SIZE = 64
+RAG_TOP_K = int(os.getenv("RAG_TOP_K", 4))
+RAG_MIN_SCORE = float(os.getenv("RAG_MIN_SCORE", 0.3))
+
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?;:])\s+|\n{2,}")
+
+
+def _split_long_sentence(sentence: str, chunk_size: int, overlap: int) -> List[str]:
+    """Hard-split a sentence longer than a chunk at word boundaries, overlapping by whole words"""
+    pieces: List[str] = []
+    while len(sentence) > chunk_size:
+        cut = sentence.rfind(" ", 0, chunk_size + 1)
+        if cut <= 0:
+            cut = chunk_size
+        pieces.append(sentence[:cut].strip())
+        # Restart at the first word boundary inside the overlap window, never at or before the last start
+        restart = sentence.find(" ", max(1, cut - overlap))
+        sentence = sentence[restart + 1 if 0 < restart < cut else cut:].strip()
+    if sentence:
+        pieces.append(sentence)
+    return pieces
+
+
+def chunk_text(text: str, chunk_size: int = RAG_CHUNK_SIZE, overlap: int = RAG_CHUNK_OVERLAP) -> List[str]:
+    """Split text into chunks of roughly chunk_size characters on sentence boundaries.
+
+    Each chunk starts with the whole trailing sentences of the previous one
+    that fit in ``overlap`` characters, so a clause cut at a boundary still
+    appears whole in one of them. Sentences longer than a chunk are split at
+    word boundaries."""
+    sentences: List[str] = []
+    for sentence in _SENTENCE_BOUNDARY.split(text):
+        if sentence and sentence.strip():
+            sentences.extend(_split_long_sentence(sentence.strip(), chunk_size, overlap))
+    chunks: List[str] = []
+    current: List[str] = []
+    length = 0
+    for sentence in sentences:
+        if current and length + len(sentence) + 1 > chunk_size:
+            chunks.append(" ".join(current))
+            carried: List[str] = []
+            carried_length = 0
+            for previous in reversed(current):
+                if carried_length + len(previous) + 1 > overlap:
+                    break
+                carried.insert(0, previous)
+                carried_length += len(previous) + 1
+            # Drop carried sentences that would push the next chunk over size
+            while carried and carried_length + len(sentence) > chunk_size:
+                carried_length -= len(carried.pop(0)) + 1
+            current, length = carried, carried_length
+        current.append(sentence)
+        length += len(sentence) + 1
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+class RagIndex:
+    """FAISS inner-product index over embedded document chunks.
+
+    The index is persisted to ``index_dir/index.faiss`` and chunk metadata is
+    appended to ``index_dir/chunks.jsonl`` (line number == FAISS id).
+    Ingestion runs on a single background thread; searches may run
+    concurrently with it."""
+
+    def __init__(self, index_dir: str = RAG_INDEX_DIR):
+        import faiss
+
+        self._faiss = faiss
+        self.index_dir = index_dir
+        self.index_path = os.path.join(index_dir, "index.faiss")
+        self.chunks_path = os.path.join(index_dir, "chunks.jsonl")
+        self._lock = threading.RLock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rag-ingest")
+        self.chunks: List[Dict[str, Any]] = []
+        self.index = self._load()
+
+    def _load(self):
+        import numpy as np
+        from embeddings import EMBEDDING_DIM
+
+        faiss = self._faiss
+        if os.path.exists(self.chunks_path):
+            with open(self.chunks_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        self.chunks.append(json.loads(line))
+                    except ValueError:
+                        break  # a record cut short by a crash; everything after it is unusable too
+        if not os.path.exists(self.index_path):
+            index = faiss.IndexFlatIP(EMBEDDING_DIM)
+        else:
+            try:
+                index = faiss.read_index(self.index_path, faiss.IO_FLAG_MMAP)
+            except RuntimeError:
+                index = faiss.read_index(self.index_path)
+        if index.ntotal != len(self.chunks):
+            # A crash between appending chunks and writing the index; keep the consistent prefix
+            keep = min(index.ntotal, len(self.chunks))
+            print(f"RAG index warning: {index.ntotal} vectors but {len(self.chunks)} chunks, keeping the first {keep}")
+            if index.ntotal > keep:
+                vectors = index.reconstruct_n(0, keep) if keep else np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+                index = faiss.IndexFlatIP(EMBEDDING_DIM)
+                index.add(vectors)
+                self._write_index(index)
+            if len(self.chunks) > keep:
+                self.chunks = self.chunks[:keep]
+                self._write_chunks()
+        return index
+
+    def _write_chunks(self):
+        os.makedirs(self.index_dir, exist_ok=True)
+        tmp_path = f"{self.chunks_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in self.chunks:
+                f.write(json.dumps(record) + "\n")
+        os.replace(tmp_path, self.chunks_path)
+
+    def _write_index(self, index):
+        # Written beside the live file and swapped in, so a crash never leaves a half-written index
+        os.makedirs(self.index_dir, exist_ok=True)
+        tmp_path = f"{self.index_path}.tmp"
+        self._faiss.write_index(index, tmp_path)
+        os.replace(tmp_path, self.index_path)
+
+    def submit(self, text: str, source: str) -> Future:
+        """Queue a document for ingestion and return its Future (number of chunks added)"""
+        return self._executor.submit(self.ingest, text, source)
+
+    def ingest(self, text: str, source: str) -> int:
+        """Chunk, embed and index a document synchronously"""
+        import numpy as np
+        from embeddings import embed_texts
+
+        chunks = chunk_text(text)
+        if not chunks:
+            return 0
+        vectors = np.vstack([
+            embed_texts(chunks[start:start + RAG_EMBED_BATCH_SIZE])
+            for start in range(0, len(chunks), RAG_EMBED_BATCH_SIZE)
+        ])
+        records = [{"source": source, "text": chunk} for chunk in chunks]
+        with self._lock:
+            self.chunks.extend(records)
+            self.index.add(vectors)
+        # Only the ingestion thread mutates the index, so it can be written without blocking searches
+        self._save(records)
+        return len(chunks)
+
+    def _save(self, new_records: List[Dict[str, Any]]):
+        os.makedirs(self.index_dir, exist_ok=True)
+        with open(self.chunks_path, "a", encoding="utf-8") as f:
+            for record in new_records:
+                f.write(json.dumps(record) + "\n")
+        self._write_index(self.index)
+
+    def search(self, query: str, k: int = RAG_TOP_K, min_score: float = RAG_MIN_SCORE) -> List[Dict[str, Any]]:
+        """Return up to k chunks most similar to query, best first"""
+        from embeddings import embed_texts
+
+        if self.index.ntotal == 0:
+            return []
+        query_vector = embed_texts([query])
+        with self._lock:
+            scores, ids = self.index.search(query_vector, min(k, self.index.ntotal))
+            return [
+                {**self.chunks[chunk_id], "score": float(score)}
+                for score, chunk_id in zip(scores[0], ids[0])
+                if chunk_id >= 0 and score >= min_score
+            ]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"chunks": self.index.ntotal, "index_dir": self.index_dir}
+
+
+# Global RAG index instance, loaded on first use
+rag_index: Optional[RagIndex] = None
+_rag_index_lock = threading.Lock()
+_rag_unavailable = False
+
+
+def get_rag_index() -> Optional[RagIndex]:
+    """Get the RAG index instance, or None if faiss is unavailable"""
+    global rag_index, _rag_unavailable
+    if rag_index is None and not _rag_unavailable:
+        with _rag_index_lock:
+            if rag_index is None and not _rag_unavailable:
+                try:
+                    rag_index = RagIndex()
+                except ImportError:
+                    print("faiss not available, RAG retrieval disabled")
+                    _rag_unavailable = True
+    return rag_index
+
+
+def retrieve_context(query: str, k: int = RAG_TOP_K) -> str:
+    """Format the top-k uploaded document chunks for a prompt, or '' if none match"""
+    if rag_index is None and not os.path.exists(os.path.join(RAG_INDEX_DIR, "index.faiss")):
+        return ""  # nothing uploaded yet; don't load the index stack just to find that out
+    index = get_rag_index()
+    if index is None:
+        return ""
+    with metrics.timed("rag_retrieval"):
+        hits = index.search(query, k)
+    return "\n\n".join(f"[{hit['source']}] {hit['text']}" for hit in hits)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+
+import os
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Optional, Dict, Any, Callable, Tuple, List
+
+from metrics import metrics
+
+# An engine takes recorded audio and a language and returns (transcription, confidence),
+# raising when it cannot transcribe
+Engine = Callable[[Any, str], Tuple[str, float]]
+
+SPEECH_ENGINES = [name.strip() for name in os.getenv("SPEECH_ENGINES", "google,sphinx").split(",") if name.strip()]
+SPEECH_RECOGNITION_DEADLINE_SECONDS = float(os.getenv("SPEECH_RECOGNITION_DEADLINE_SECONDS", 8))
+# A result at least this confident is taken as soon as it arrives
+SPEECH_ACCEPT_CONFIDENCE = float(os.getenv("SPEECH_ACCEPT_CONFIDENCE", 0.7))
+ENGINE_LATENCY_WINDOW = 200
+# Engines abandoned at the deadline keep their thread until they return, so leave headroom
+ENGINE_THREADS = 32
+
+
+def google_engine(recognizer) -> Engine:
+    def recognize(audio, language: str) -> Tuple[str, float]:
+        result = recognizer.recognize_google(audio, language=language, show_all=True)
+        if not result or 'alternative' not in result:
+            raise ValueError("Google recognition returned no results")
+        best = result['alternative'][0]
+        return best['transcript'], best.get('confidence', 0.8)
+    return recognize
+
+
+def sphinx_engine(recognizer) -> Engine:
+    def recognize(audio, language: str) -> Tuple[str, float]:
+        # Offline and English-only, so its answers are trusted less than Google's
+        return recognizer.recognize_sphinx(audio), 0.6
+    return recognize
+
+
+ENGINE_FACTORIES = {"google": google_engine, "sphinx": sphinx_engine}
+
+
+def build_engines(recognizer, names: List[str] = SPEECH_ENGINES) -> Dict[str, Engine]:
+    """speech_recognition engines bound to one recognizer, in preference order"""
+    return {name: ENGINE_FACTORIES[name](recognizer) for name in names if name in ENGINE_FACTORIES}
+
+
+class EngineStats:
+    """Per-engine call counts and recent latencies"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._engines: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, name: str, outcome: str, seconds: Optional[float] = None):
+        with self._lock:
+            engine = self._engines.setdefault(name, {
+                "success": 0, "failed": 0, "abandoned": 0, "wins": 0,
+                "latencies": deque(maxlen=ENGINE_LATENCY_WINDOW),
+            })
+            engine[outcome] += 1
+            if seconds is not None:
+                engine["latencies"].append(seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            report = {}
+            for name, engine in self._engines.items():
+                latencies = sorted(engine["latencies"])
+                report[name] = {key: value for key, value in engine.items() if key != "latencies"}
+                report[name]["calls"] = engine["success"] + engine["failed"] + engine["abandoned"]
+                if latencies:
+                    report[name]["p50_ms"] = round(latencies[len(latencies) // 2] * 1000, 1)
+                    report[name]["p95_ms"] = round(latencies[int(0.95 * (len(latencies) - 1))] * 1000, 1)
+            return report
+
+
+class HedgedRecognizer:
+    """Runs every recognition engine at once and settles under a deadline.
+
+    The first result with confidence of at least ``accept_confidence`` wins
+    straight away. Otherwise the most confident result in hand when every
+    engine has finished, or when the deadline passes, wins. Engines still
+    queued are cancelled. Engines already running cannot be interrupted:
+    their results are discarded and counted as abandoned. Tail latency is
+    bounded by the deadline rather than the sum of engine timeouts."""
+
+    def __init__(self, deadline: float = SPEECH_RECOGNITION_DEADLINE_SECONDS,
+                 accept_confidence: float = SPEECH_ACCEPT_CONFIDENCE, max_workers: int = ENGINE_THREADS):
+        self.deadline = deadline
+        self.accept_confidence = accept_confidence
+        self.stats = EngineStats()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speech-engine")
+
+    def _run(self, engine: Engine, audio, language: str) -> Tuple[str, float, float]:
+        started = time.monotonic()
+        text, confidence = engine(audio, language)
+        return text, confidence, time.monotonic() - started
+
+    def recognize(self, engines: Dict[str, Engine], audio, language: str = 'en-IN',
+                  deadline: Optional[float] = None) -> Dict[str, Any]:
+        """Best transcription across engines, with per-engine outcomes and timings"""
+        deadline_at = time.monotonic() + (deadline or self.deadline)
+        futures: Dict[Future, str] = {
+            self._executor.submit(self._run, engine, audio, language): name
+            for name, engine in engines.items()
+        }
+        started = time.monotonic()
+        outcomes: Dict[str, Dict[str, Any]] = {}
+        best: Optional[Tuple[float, str, str]] = None  # (confidence, text, engine)
+        pending = set(futures)
+        while pending:
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = futures[future]
+                try:
+                    text, confidence, seconds = future.result()
+                    if not text:
+                        raise ValueError("empty transcription")
+                except Exception as e:
+                    seconds = time.monotonic() - started
+                    self.stats.record(name, "failed", seconds)
+                    metrics.count("speech_engine_failed", engine=name)
+                    outcomes[name] = {"status": "failed", "error": str(e) or type(e).__name__, "ms": round(seconds * 1000, 1)}
+                    continue
+                self.stats.record(name, "success", seconds)
+                metrics.observe("recognition_engine", seconds, engine=name)
+                outcomes[name] = {"status": "success", "confidence": confidence, "ms": round(seconds * 1000, 1)}
+                if best is None or confidence > best[0]:
+                    best = (confidence, text, name)
+            if best is not None and best[0] >= self.accept_confidence:
+                break
+
+        for future in pending:
+            name = futures[future]
+            future.cancel()
+            self.stats.record(name, "abandoned")
+            metrics.count("speech_engine_abandoned", engine=name)
+            outcomes[name] = {"status": "abandoned"}
+
+        result = {"engines": outcomes, "elapsed_ms": round((time.monotonic() - started) * 1000, 1)}
+        if best is None:
+            result.update(success=False, deadline_exceeded=bool(pending))
+            return result
+        confidence, text, name = best
+        self.stats.record(name, "wins")
+        result.update(success=True, transcription=text, confidence=confidence, engine=name)
+        return result
+
+
+# Global orchestrator shared by every recognition worker
+hedged_recognizer = HedgedRecognizer()
+
+
+def get_hedged_recognizer() -> HedgedRecognizer:
+    return hedged_recognizer
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+
+import os
+import re
+import sys
+import hmac
+import time
+import uuid
+import random
+import asyncio
+import threading
+import traceback
+from collections import Counter
+from pathlib import Path
+from typing import Optional, Dict, List, Any
+
+from metrics import metrics
+
+# Header that asks for a profile of one request; honoured only when its value equals PROFILE_TOKEN
+PROFILE_HEADER = os.getenv("PROFILE_HEADER", "X-Profile").lower().encode("latin-1")
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+# Fraction of requests profiled without being asked (0 disables sampling)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", 5))
+PROFILE_MAX_SECONDS = 30
+PROFILE_MAX_FILES = 200
+# Event-loop stalls longer than this are logged with the blocking stack (0 disables the watchdog)
+LOOP_STALL_THRESHOLD_MS = float(os.getenv("LOOP_STALL_THRESHOLD_MS", 250))
+# Innermost frames printed for a stall; the outer ones are the same server plumbing every time
+LOOP_STALL_STACK_DEPTH = 25
+
+_PROFILE_SUFFIX = ".folded"
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    # Semicolons separate frames in the folded format
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+
+
+def _folded_stack(frame, thread_name: str) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.append(thread_name.replace(";", ":"))
+    return ";".join(reversed(labels))
+
+
+class StackSampler:
+    """Samples the stacks of every thread at a fixed interval until stopped.
+
+    The result is written in the folded format ("thread;outer;...;inner
+    count" per line) that flamegraph.pl, speedscope and inferno read
+    directly. Samples are process-wide: on a shared event loop they include
+    whatever else ran while the request was in flight, which is exactly
+    what shows a blocking call in someone else's handler."""
+
+    def __init__(self, path: Path, interval: float = PROFILE_INTERVAL_MS / 1000,
+                 max_seconds: float = PROFILE_MAX_SECONDS):
+        self.path = path
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling; the profile is written from the sampler thread, so this never blocks"""
+        self._stop.set()
+
+    def _run(self):
+        own = {threading.get_ident()}
+        deadline = time.monotonic() + self.max_seconds
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident in own or names.get(ident) in ("request-profiler", "loop-watchdog"):
+                    continue
+                self.stacks[_folded_stack(frame, names.get(ident, str(ident)))] += 1
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "w") as f:
+                for stack, count in self.stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            _prune_profiles(self.path.parent)
+        except Exception as e:
+            print(f"Profile write warning ({self.path.name}): {e}")
+
+
+def _prune_profiles(directory: Path, keep: int = PROFILE_MAX_FILES):
+    profiles = sorted(directory.glob(f"*{_PROFILE_SUFFIX}"), key=lambda path: path.stat().st_mtime)
+    for path in profiles[:-keep]:
+        path.unlink(missing_ok=True)
+
+
+def list_profiles(directory: str = PROFILE_DIR) -> List[Dict[str, Any]]:
+    """Saved profiles, newest first"""
+    path = Path(directory)
+    if not path.is_dir():
+        return []
+    profiles = sorted(path.glob(f"*{_PROFILE_SUFFIX}"), key=lambda p: p.stat().st_mtime, reverse=True)
+    return [{"profile_id": p.stem, "bytes": p.stat().st_size, "created_at": p.stat().st_mtime} for p in profiles]
+
+
+def profile_path(profile_id: str, directory: str = PROFILE_DIR) -> Optional[Path]:
+    """Path of a saved profile, or None for unknown or malformed ids"""
+    if not profile_id.replace("-", "").replace("_", "").isalnum():
+        return None
+    path = Path(directory) / f"{profile_id}{_PROFILE_SUFFIX}"
+    return path if path.is_file() else None
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles opted-in requests with a StackSampler.
+
+    A request is profiled when it carries PROFILE_HEADER with the value of
+    PROFILE_TOKEN (header profiling is off while PROFILE_TOKEN is unset), or
+    when it is picked at PROFILE_SAMPLE_RATE. The profile id is returned in
+    an X-Profile-Id header and the profile is served from /profiles/{id},
+    which only answers requests carrying the token."""
+
+    def __init__(self, app, directory: str = PROFILE_DIR):
+        self.app = app
+        self.directory = Path(directory)
+
+    def _wanted(self, scope) -> bool:
+        if PROFILE_TOKEN:
+            for name, value in scope.get("headers", []):
+                if name == PROFILE_HEADER:
+                    return hmac.compare_digest(value.decode("latin-1"), PROFILE_TOKEN)
+        return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+        route = (re.sub(r"[^A-Za-z0-9-]+", "_", scope.get("path", "/").strip("/")) or "root")[:40]
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}_{route}_{uuid.uuid4().hex[:8]}"
+        sampler = StackSampler(self.directory / f"{profile_id}{_PROFILE_SUFFIX}")
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", profile_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        metrics.count("requests_profiled")
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            sampler.stop()
+
+
+class LoopStallWatchdog:
+    """Detects event-loop stalls and logs the stack of the blocking call.
+
+    A heartbeat task on the loop records when it last ran. A watchdog thread
+    checks it every threshold/2; once the heartbeat is older than the
+    threshold, the loop thread's current stack (the code that is blocking
+    it) is printed, once per stall. The stall duration is recorded in the
+    event_loop_stall histogram when the loop gets going again."""
+
+    def __init__(self, threshold: float = LOOP_STALL_THRESHOLD_MS / 1000):
+        self.threshold = threshold
+        self.interval = threshold / 4
+        self.stalls = 0
+        self._beat = time.monotonic()
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start watching the running event loop"""
+        if self.threshold <= 0 or self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._task = asyncio.ensure_future(self._heartbeat())
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._beat = now
+            if now - expected >= self.threshold:
+                metrics.observe("event_loop_stall", now - expected)
+
+    def _watch(self):
+        reported_beat = None
+        while not self._stop.wait(self.threshold / 2):
+            beat = self._beat
+            stalled_for = time.monotonic() - beat
+            if stalled_for < self.threshold or beat == reported_beat:
+                continue
+            reported_beat = beat
+            self.stalls += 1
+            metrics.count("event_loop_stall")
+            frame = sys._current_frames().get(self._loop_thread)
+            stack = "".join(traceback.format_stack(frame, LOOP_STALL_STACK_DEPTH)) if frame is not None else "(stack unavailable)\n"
+            print(f"⚠️ Event loop blocked for {stalled_for * 1000:.0f} ms so far; blocking stack:\n{stack}", flush=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"threshold_ms": self.threshold * 1000, "stalls": self.stalls, "running": self._task is not None}
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+# Global watchdog for the server's event loop
+loop_watchdog = LoopStallWatchdog()
+
+
+def get_loop_watchdog() -> LoopStallWatchdog:
+    return loop_watchdog
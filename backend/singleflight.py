@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+
+class _StreamBroadcast:
+    """Buffers one upstream token stream and replays it to any number of subscribers.
+
+    Once every subscriber has gone (finished or disconnected) while the
+    stream is still running, the upstream task is cancelled and on_abandoned
+    is called."""
+
+    def __init__(self, on_abandoned: Optional[Callable[[], None]] = None):
+        self.tokens: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.task: Optional[asyncio.Task] = None
+        self.subscribers = 0
+        self._on_abandoned = on_abandoned
+        self._changed = asyncio.Event()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def run(self, source: AsyncIterator[str]):
+        try:
+            async for token in source:
+                self.tokens.append(token)
+                self._notify()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._notify()
+
+    def subscribe(self) -> AsyncIterator[str]:
+        # Counted when handed out, not when first iterated, so a caller that has
+        # joined but not started reading keeps the upstream alive
+        self.subscribers += 1
+        return self._replay()
+
+    async def _replay(self) -> AsyncIterator[str]:
+        position = 0
+        try:
+            while True:
+                while position < len(self.tokens):
+                    yield self.tokens[position]
+                    position += 1
+                if self.done:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                await self._changed.wait()
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done and self.task is not None:
+                self.task.cancel()
+                if self._on_abandoned is not None:
+                    self._on_abandoned()
+
+
+class SingleFlight:
+    """Coalesces concurrent identical calls into one in-flight upstream call.
+
+    The first caller for a key starts the work as an independent task; callers
+    arriving while it runs await the same task (or subscribe to the same
+    stream). The key is released as soon as the call finishes, so later calls
+    go upstream again. A cancelled caller never cancels a shared call; a
+    shared stream is cancelled once all of its subscribers have gone, so an
+    abandoned request stops spending upstream tokens."""
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+        self._streams: Dict[str, _StreamBroadcast] = {}
+        self.upstream_calls = 0
+        self.coalesced_calls = 0
+        self.abandoned_streams = 0
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Run factory() once per key among concurrent callers and share its result"""
+        task = self._calls.get(key)
+        if task is None:
+            self.upstream_calls += 1
+            task = asyncio.ensure_future(factory())
+            self._calls[key] = task
+            task.add_done_callback(lambda finished: self._release(self._calls, key, finished))
+        else:
+            self.coalesced_calls += 1
+        return await asyncio.shield(task)
+
+    def stream(self, key: str, factory: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """Iterate factory() once per key among concurrent callers; late joiners replay from the start"""
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            self.upstream_calls += 1
+            broadcast = _StreamBroadcast(on_abandoned=lambda: self._abandon(key, broadcast))
+            broadcast.task = asyncio.ensure_future(broadcast.run(factory()))
+            self._streams[key] = broadcast
+            broadcast.task.add_done_callback(lambda _: self._release(self._streams, key, broadcast))
+        else:
+            self.coalesced_calls += 1
+        return broadcast.subscribe()
+
+    def _abandon(self, key: str, broadcast: _StreamBroadcast):
+        # Released now rather than when the cancelled task finishes, so a new caller starts afresh
+        self.abandoned_streams += 1
+        self._release(self._streams, key, broadcast)
+
+    @staticmethod
+    def _release(calls: Dict[str, Any], key: str, call: Any):
+        if calls.get(key) is call:
+            del calls[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._calls) + len(self._streams),
+            "upstream_calls": self.upstream_calls,
+            "coalesced_calls": self.coalesced_calls,
+            "abandoned_streams": self.abandoned_streams,
+        }
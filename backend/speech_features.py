@@ -1,33 +1,137 @@
 #!/usr/bin/env python3
 
-import speech_recognition as sr
-import pyttsx3
 import tempfile
 import os
 import threading
-import queue
 import time
 from pathlib import Path
 import wave
-import pyaudio
 import numpy as np
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Union, TYPE_CHECKING
 import json
 import subprocess
 import shutil
+import io
+
+from concurrent.futures import wait as futures_wait
+
+from tts_cache import get_tts_cache, tts_cache_key
+from voice_activity import PcmRingBuffer, UtteranceSegmenter, compact_speech
+from speech_workers import get_recognizer_pool, RecognizerBusy, SPEECH_JOB_TIMEOUT_SECONDS
+from recognition_engines import get_hedged_recognizer, build_engines, SPEECH_ENGINES, SPEECH_RECOGNITION_DEADLINE_SECONDS
+from metrics import metrics
+
+# speech_recognition, pyttsx3 and pyaudio are imported on first use so that
+# text-only workers never pay for the audio stack at startup
+if TYPE_CHECKING:
+    import speech_recognition as sr
+
+AUDIO_SAMPLE_RATE = 16000
+AUDIO_SAMPLE_WIDTH = 2
+FFMPEG_TIMEOUT_SECONDS = 30
+# Trim silence from clips before recognition; optionally shorten internal pauses to this many ms (0 keeps them)
+SPEECH_TRIM_SILENCE = os.getenv("SPEECH_TRIM_SILENCE", "true").lower() == "true"
+SPEECH_MAX_PAUSE_MS = int(os.getenv("SPEECH_MAX_PAUSE_MS", 0))
+# Audio held between the microphone thread and the segmenter; older audio is dropped if recognition falls behind
+RECORDING_BUFFER_SECONDS = 10
+
+
+def _detect_audio_backend() -> Optional[str]:
+    """Pick the audio decoder once at import: the ffmpeg binary, else pydub"""
+    if shutil.which('ffmpeg'):
+        return "ffmpeg"
+    try:
+        import pydub  # noqa: F401
+        return "pydub"
+    except ImportError:
+        return None
+
+
+AUDIO_BACKEND = _detect_audio_backend()
+
+
+def _is_wav_file(path: str) -> bool:
+    """True for a RIFF/WAVE file, whatever its name (uploads are stored without an extension)"""
+    if Path(path).suffix.lower() == '.wav':
+        return True
+    with open(path, 'rb') as f:
+        header = f.read(12)
+    return header[:4] == b'RIFF' and header[8:12] == b'WAVE'
+
+
+def _read_target_wav(audio_bytes: bytes) -> Optional[bytes]:
+    """Return the PCM frames of a WAV that is already 16 kHz mono 16-bit, else None"""
+    try:
+        with wave.open(io.BytesIO(audio_bytes), 'rb') as wav:
+            if (wav.getframerate(), wav.getnchannels(), wav.getsampwidth()) == (AUDIO_SAMPLE_RATE, 1, AUDIO_SAMPLE_WIDTH):
+                return wav.readframes(wav.getnframes())
+    except (wave.Error, EOFError):
+        pass
+    return None
+
+
+def _convert_wav(audio_bytes: bytes) -> Optional[bytes]:
+    """Downmix and resample any PCM WAV to 16 kHz mono 16-bit with numpy, for when ffmpeg is missing.
+
+    Returns None for data that is not an uncompressed PCM WAV."""
+    try:
+        with wave.open(io.BytesIO(audio_bytes), 'rb') as wav:
+            rate, channels, width = wav.getframerate(), wav.getnchannels(), wav.getsampwidth()
+            frames = wav.readframes(wav.getnframes())
+    except (wave.Error, EOFError):
+        return None
+    if width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128) * 256
+    elif width == 2:
+        samples = np.frombuffer(frames, dtype="<i2").astype(np.float32)
+    elif width == 3:
+        raw = np.frombuffer(frames, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        samples = ((raw[:, 0] | raw[:, 1] << 8 | raw[:, 2] << 16) << 8 >> 8).astype(np.float32) / 256
+    elif width == 4:
+        samples = np.frombuffer(frames, dtype="<i4").astype(np.float32) / 65536
+    else:
+        return None
+    samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+    if rate != AUDIO_SAMPLE_RATE and len(samples):
+        # Linear interpolation is plenty for speech recognition input
+        positions = np.arange(int(len(samples) * AUDIO_SAMPLE_RATE / rate)) * (rate / AUDIO_SAMPLE_RATE)
+        samples = np.interp(positions, np.arange(len(samples)), samples)
+    return np.clip(np.round(samples), -32768, 32767).astype("<i2").tobytes()
+
+
+def _pcm_to_wav_stream(pcm: bytes) -> io.BytesIO:
+    """Wrap 16 kHz mono PCM in an in-memory WAV container"""
+    stream = io.BytesIO()
+    with wave.open(stream, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(AUDIO_SAMPLE_WIDTH)
+        wav.setframerate(AUDIO_SAMPLE_RATE)
+        wav.writeframes(pcm)
+    stream.seek(0)
+    return stream
 
 class SpeechProcessor:
 
     
     def __init__(self):
-        self.recognizer = sr.Recognizer()
-        self.engine = pyttsx3.init()
-        self.audio_queue = queue.Queue()
+        self._engine = None
+        # pyttsx3 engines are not thread-safe
+        self._tts_lock = threading.Lock()
         self.is_recording = False
         self.audio_thread = None
-        
-        # Configure text-to-speech
-        self._setup_tts()
+        self._segment_thread = None
+        self._ring: Optional[PcmRingBuffer] = None
+        self._segment_futures = []
+        self.recording_segments = []
+    
+    @property
+    def engine(self):
+        """pyttsx3 engine, created and configured on first use"""
+        if self._engine is None:
+            import pyttsx3
+            self._engine = pyttsx3.init()
+            self._setup_tts()
+        return self._engine
         
     def _setup_tts(self):
         """Configure text-to-speech engine"""
@@ -52,180 +156,127 @@ class SpeechProcessor:
         except Exception as e:
             print(f"TTS setup warning: {e}")
     
-    def _convert_audio_format(self, input_path: str, output_format: str = 'wav') -> str:
-       
+    def _decode_audio(self, source: Union[str, bytes]) -> bytes:
+        """Decode an audio file path or in-memory bytes to 16 kHz mono 16-bit PCM.
+
+        No intermediate files are written: ffmpeg reads the file (or stdin)
+        and writes raw PCM to stdout. Without ffmpeg, PCM WAVs of any rate,
+        width and channel count are converted with numpy."""
+        audio_bytes = None
+        if isinstance(source, bytes):
+            audio_bytes = source
+        elif not os.path.exists(source):
+            raise FileNotFoundError(f"Input file not found: {source}")
+        elif _is_wav_file(source):
+            with open(source, 'rb') as f:
+                audio_bytes = f.read()
+
+        if audio_bytes is not None:
+            pcm = _read_target_wav(audio_bytes)
+            if pcm is None and AUDIO_BACKEND != "ffmpeg":
+                pcm = _convert_wav(audio_bytes)
+            if pcm is not None:
+                return pcm
+
+        if AUDIO_BACKEND == "ffmpeg":
+            input_arg = "pipe:0" if audio_bytes is not None else source
+            cmd = [
+                'ffmpeg', '-hide_banner', '-loglevel', 'error',
+                '-i', input_arg,
+                '-f', 's16le', '-acodec', 'pcm_s16le',
+                '-ar', str(AUDIO_SAMPLE_RATE), '-ac', '1',
+                'pipe:1'
+            ]
+            result = subprocess.run(cmd, input=audio_bytes, capture_output=True, timeout=FFMPEG_TIMEOUT_SECONDS)
+            if result.returncode == 0 and result.stdout:
+                return result.stdout
+            raise RuntimeError(f"FFmpeg conversion failed: {result.stderr.decode(errors='ignore')[-300:]}")
+
+        if AUDIO_BACKEND == "pydub":
+            from pydub import AudioSegment
+            audio = AudioSegment.from_file(io.BytesIO(audio_bytes) if audio_bytes is not None else source)
+            audio = audio.set_frame_rate(AUDIO_SAMPLE_RATE).set_channels(1).set_sample_width(AUDIO_SAMPLE_WIDTH)
+            return audio.raw_data
+
+        raise RuntimeError("No audio decoder available; install ffmpeg")
+    
+    def speech_to_text(self, audio_file_path: Union[str, bytes], language: str = 'en-IN',
+                       recognizer: Optional["sr.Recognizer"] = None) -> Dict[str, Any]:
+        """Transcribe an audio file (or in-memory audio bytes). Pass a worker-owned recognizer to reuse it;
+        otherwise a fresh one is used so calibration never leaks between calls"""
+        import speech_recognition as sr
+        recognizer = recognizer or sr.Recognizer()
         try:
-           
-            if not os.path.exists(input_path):
-                raise FileNotFoundError(f"Input file not found: {input_path}")
+            label = audio_file_path if isinstance(audio_file_path, str) else f"{len(audio_file_path)} bytes in memory"
+            print(f"🎤 Processing audio file: {label}")
+            timings: Dict[str, float] = {}
             
-           
-            input_ext = Path(input_path).suffix.lower()
-            output_ext = f".{output_format}"
-        
-            if input_ext == output_ext:
-                return input_path
-            output_path = str(Path(input_path).with_suffix(output_ext))
-            
-          
-            try:
-              
-                result = subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True, timeout=5)
-                if result.returncode == 0:
-                   
-                    cmd = [
-                        'ffmpeg', '-i', input_path, 
-                        '-acodec', 'pcm_s16le', 
-                        '-ar', '16000', 
-                        '-ac', '1', 
-                        output_path, 
-                        '-y'  
-                    ]
-                    
-                    result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-                    
-                    if result.returncode == 0 and os.path.exists(output_path):
-                        print(f"✅ FFmpeg conversion successful: {output_path}")
-                        return output_path
-                    else:
-                        print(f"FFmpeg conversion failed: {result.stderr}")
-                        
-            except (subprocess.TimeoutExpired, FileNotFoundError, subprocess.SubprocessError) as e:
-                print(f"FFmpeg not available or conversion failed: {e}")
+            started = time.perf_counter()
+            pcm = self._decode_audio(audio_file_path)
+            timings["decode_ms"] = (time.perf_counter() - started) * 1000
+            metrics.observe("audio_decode", timings["decode_ms"] / 1000, backend=AUDIO_BACKEND or "wav")
             
-          
-            try:
-                import ffmpeg
-                
-                stream = ffmpeg.input(input_path)
-                stream = ffmpeg.output(stream, output_path, acodec='pcm_s16le', ar=16000, ac=1)
-                ffmpeg.run(stream, overwrite_output=True, quiet=True)
-                
-                if os.path.exists(output_path):
-                    print(f"✅ FFmpeg-python conversion successful: {output_path}")
-                    return output_path
-                    
-            except ImportError:
-                print("ffmpeg-python not available")
-            except Exception as e:
-                print(f"FFmpeg-python conversion error: {e}")
-            
-         
-            try:
-                from pydub import AudioSegment
-                
-                # Load audio file
-                if input_ext == '.webm':
-                    audio = AudioSegment.from_file(input_path, format="webm")
-                elif input_ext == '.mp3':
-                    audio = AudioSegment.from_mp3(input_path)
-                elif input_ext == '.m4a':
-                    audio = AudioSegment.from_file(input_path, format="m4a")
+            audio_stats = None
+            if SPEECH_TRIM_SILENCE:
+                started = time.perf_counter()
+                compacted, audio_stats = compact_speech(pcm, max_pause_ms=SPEECH_MAX_PAUSE_MS)
+                timings["trim_ms"] = (time.perf_counter() - started) * 1000
+                metrics.observe("silence_trim", timings["trim_ms"] / 1000)
+                if compacted:
+                    pcm = compacted
+                    # Same calibration adjust_for_ambient_noise would make, without consuming audio
+                    recognizer.energy_threshold = audio_stats["threshold"]
                 else:
-                    audio = AudioSegment.from_file(input_path)
-                
-           
-                audio.export(output_path, format="wav")
-                
-                if os.path.exists(output_path):
-                    print(f"✅ Pydub conversion successful: {output_path}")
-                    return output_path
-                    
-            except ImportError:
-                print("pydub not available")
-            except Exception as e:
-                print(f"Pydub conversion error: {e}")
-            
-           
-            supported_formats = ['.wav', '.mp3', '.m4a', '.flac']
-            if input_ext in supported_formats:
-                print(f"⚠️  Using original file format: {input_path}")
-                return input_path
-            
-         
-            print(f"⚠️  Audio conversion failed, using original file: {input_path}")
-            return input_path
+                    # Nothing stood out from the noise; let the engines judge the untrimmed clip
+                    audio_stats["kept_seconds"] = audio_stats["original_seconds"]
             
-        except Exception as e:
-            print(f"Audio conversion error: {e}")
-            return input_path
-    
-    def speech_to_text(self, audio_file_path: str, language: str = 'en-IN') -> Dict[str, Any]:
-    
-        try:
-            print(f"🎤 Processing audio file: {audio_file_path}")
+            with sr.AudioFile(_pcm_to_wav_stream(pcm)) as source:
+                audio = recognizer.record(source)
             
-           
-            converted_audio_path = self._convert_audio_format(audio_file_path, 'wav')
-            print(f"🎵 Converted audio path: {converted_audio_path}")
+            print(f"🌐 Running recognition engines: {', '.join(SPEECH_ENGINES)}")
+            # Never outlive the caller's budget (the worker pool sets operation_timeout per job)
+            deadline = min(SPEECH_RECOGNITION_DEADLINE_SECONDS, recognizer.operation_timeout or SPEECH_RECOGNITION_DEADLINE_SECONDS)
+            recognition = get_hedged_recognizer().recognize(build_engines(recognizer), audio, language, deadline)
+            for name, outcome in recognition["engines"].items():
+                if "ms" in outcome:
+                    timings[f"{name}_ms"] = outcome["ms"]
+            timings["recognition_ms"] = recognition["elapsed_ms"]
+            metrics.observe("speech_recognition", recognition["elapsed_ms"] / 1000)
+            transcription = recognition.get("transcription")
+            confidence = recognition.get("confidence", 0.0)
             
-            with sr.AudioFile(converted_audio_path) as source:
-               
-                print("🔊 Adjusting for ambient noise...")
-                self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                audio = self.recognizer.record(source)
-                
-              
-                transcription = None
-                confidence = 0.0
-                
-              
-                print("🌐 Trying Google Speech Recognition...")
-                try:
-                    result = self.recognizer.recognize_google(
-                        audio, 
-                        language=language,
-                        show_all=True
-                    )
-                    if result and 'alternative' in result:
-                        transcription = result['alternative'][0]['transcript']
-                        confidence = result['alternative'][0].get('confidence', 0.8)
-                        print(f"✅ Google recognition successful: {transcription}")
-                    else:
-                        print("⚠️  Google recognition returned no results")
-                except sr.UnknownValueError:
-                    print("⚠️  Google recognition could not understand audio")
-                except sr.RequestError as e:
-                    print(f"⚠️  Google recognition request failed: {e}")
-                except Exception as e:
-                    print(f"⚠️  Google recognition error: {e}")
-                
-               
-                if not transcription:
-                    print("🔍 Trying Sphinx recognition...")
-                    try:
-                        transcription = self.recognizer.recognize_sphinx(audio)
-                        confidence = 0.6
-                        print(f"✅ Sphinx recognition successful: {transcription}")
-                    except Exception as e:
-                        print(f"⚠️  Sphinx recognition failed: {e}")
+            if transcription:
+                print(f"✅ {recognition['engine']} recognition successful: {transcription}")
+                return {
+                    "success": True,
+                    "transcription": transcription,
+                    "confidence": confidence,
+                    "language": language,
+                    "audio": audio_stats,
+                    "engine": recognition["engine"],
+                    "timings_ms": timings,
+                    "features": [
+                        "Silence trimming",
+                        "Hedged parallel recognition engines",
+                        "Confidence scoring",
+                        "Language detection",
+                        "Audio format conversion"
+                    ]
+                }
+            else:
+                return {
+                    "success": False,
+                    "error": "Could not transcribe audio",
+                    "engines": recognition["engines"],
+                    "timings_ms": timings,
+                    "suggestions": [
+                        "Speak more clearly",
+                        "Reduce background noise",
+                        "Try again",
+                        "Check microphone permissions"
+                    ]
+                }
                 
-                if transcription:
-                    return {
-                        "success": True,
-                        "transcription": transcription,
-                        "confidence": confidence,
-                        "language": language,
-                        "features": [
-                            "Ambient noise reduction",
-                            "Multiple recognition engines",
-                            "Confidence scoring",
-                            "Language detection",
-                            "Audio format conversion"
-                        ]
-                    }
-                else:
-                    return {
-                        "success": False,
-                        "error": "Could not transcribe audio",
-                        "suggestions": [
-                            "Speak more clearly",
-                            "Reduce background noise",
-                            "Try again",
-                            "Check microphone permissions"
-                        ]
-                    }
-                    
         except Exception as e:
             print(f"❌ Speech recognition error: {e}")
             return {
@@ -242,8 +293,7 @@ class SpeechProcessor:
             
             # Generate speech
             if output_path:
-                self.engine.save_to_file(processed_text, output_path)
-                self.engine.runAndWait()
+                self._render_to_file(processed_text, output_path)
                 
                 # Get audio file info
                 audio_info = self._get_audio_info(output_path)
@@ -262,8 +312,9 @@ class SpeechProcessor:
                 }
             else:
                 # Play 
-                self.engine.say(processed_text)
-                self.engine.runAndWait()
+                with self._tts_lock:
+                    self.engine.say(processed_text)
+                    self.engine.runAndWait()
                 
                 return {
                     "success": True,
@@ -282,6 +333,45 @@ class SpeechProcessor:
                 "features": ["Error handling"]
             }
     
+    def text_to_speech_cached(self, text: str) -> Dict[str, Any]:
+        """Synthesize into the shared TTS cache; repeated text is never re-rendered"""
+        try:
+            processed_text = self._process_legal_context(text)
+            key = tts_cache_key(processed_text, *self.tts_settings())
+            path, cached = get_tts_cache().get_or_create(
+                key, lambda tmp_path: self._render_to_file(processed_text, tmp_path)
+            )
+            audio_info = self._get_audio_info(str(path))
+            return {
+                "success": True,
+                "text": processed_text,
+                "audio_key": key,
+                "cached": cached,
+                "duration": audio_info.get("duration", 0),
+                "features": [
+                    "Legal context awareness",
+                    "Professional tone",
+                    "Cached audio reuse",
+                    "Streamed audio with range support"
+                ]
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Text-to-speech error: {str(e)}",
+                "features": ["Error handling"]
+            }
+    
+    def tts_settings(self) -> tuple:
+        """(voice, rate) of the engine; part of every TTS cache key"""
+        with self._tts_lock:
+            return self.engine.getProperty('voice'), self.engine.getProperty('rate')
+    
+    def _render_to_file(self, processed_text: str, output_path: str):
+        with self._tts_lock, metrics.timed("tts_render"):
+            self.engine.save_to_file(processed_text, output_path)
+            self.engine.runAndWait()
+    
     def _process_legal_context(self, text: str) -> str:
         legal_terms = [
             "Article", "Section", "Clause", "Subsection",
@@ -313,12 +403,22 @@ class SpeechProcessor:
         except Exception:
             return {}
     
-    def start_realtime_recording(self) -> Dict[str, Any]:
+    def start_realtime_recording(self, language: str = 'en-IN') -> Dict[str, Any]:
        
         try:
+            if self.is_recording:
+                return {
+                    "success": False,
+                    "error": "Recording already in progress"
+                }
             self.is_recording = True
-            self.audio_thread = threading.Thread(target=self._record_audio)
+            self.recording_segments = []
+            self._segment_futures = []
+            self._ring = PcmRingBuffer(int(RECORDING_BUFFER_SECONDS * AUDIO_SAMPLE_RATE * AUDIO_SAMPLE_WIDTH))
+            self.audio_thread = threading.Thread(target=self._record_audio, daemon=True)
+            self._segment_thread = threading.Thread(target=self._segment_audio, args=(language,), daemon=True)
             self.audio_thread.start()
+            self._segment_thread.start()
             
             return {
                 "success": True,
@@ -326,26 +426,33 @@ class SpeechProcessor:
                 "features": [
                     "Continuous recording",
                     "Background processing",
-                    "Real-time transcription"
+                    "Real-time transcription",
+                    "Voice activity segmentation"
                 ]
             }
         except Exception as e:
+            self.is_recording = False
             return {
                 "success": False,
                 "error": f"Recording start error: {str(e)}"
             }
     
     def stop_realtime_recording(self) -> Dict[str, Any]:
-        """Stop real-time speech recording"""
+        """Stop real-time speech recording and collect every segment's transcript"""
         try:
             self.is_recording = False
             if self.audio_thread:
                 self.audio_thread.join()
+            if self._segment_thread:
+                self._segment_thread.join()
+            futures_wait(self._segment_futures, timeout=SPEECH_JOB_TIMEOUT_SECONDS)
             
             return {
                 "success": True,
                 "message": "Real-time recording stopped",
-                "features": ["Recording control", "Thread management"]
+                "transcription": self._combined_transcription(),
+                "dropped_audio_seconds": round(self._ring.dropped_bytes / (AUDIO_SAMPLE_RATE * AUDIO_SAMPLE_WIDTH), 2) if self._ring else 0,
+                "features": ["Recording control", "Thread management", "Incremental transcription"]
             }
         except Exception as e:
             return {
@@ -353,48 +460,84 @@ class SpeechProcessor:
                 "error": f"Recording stop error: {str(e)}"
             }
     
+    def _combined_transcription(self) -> Dict[str, Any]:
+        segments = [dict(segment) for segment in self.recording_segments]
+        texts = [segment["transcription"] for segment in segments if segment.get("transcription")]
+        if not texts:
+            return {"success": False, "error": "No speech recognized", "segments": segments}
+        return {"success": True, "transcription": " ".join(texts), "segments": segments}
+    
     def _record_audio(self):
-        """Background audio recording thread"""
+        """Background capture thread: microphone -> ring buffer"""
         try:
+            import pyaudio
             p = pyaudio.PyAudio()
             stream = p.open(
                 format=pyaudio.paInt16,
                 channels=1,
-                rate=16000,
+                rate=AUDIO_SAMPLE_RATE,
                 input=True,
                 frames_per_buffer=1024
             )
-            
-            frames = []
-            
-            while self.is_recording:
-                try:
-                    data = stream.read(1024)
-                    frames.append(data)
-                except Exception:
-                    break
-            
-            stream.stop_stream()
-            stream.close()
-            p.terminate()
-            
-            # Save recorded audio
-            if frames:
-                output_path = f"uploads/realtime_recording_{int(time.time())}.wav"
-                os.makedirs("uploads", exist_ok=True)
-                
-                with wave.open(output_path, 'wb') as wf:
-                    wf.setnchannels(1)
-                    wf.setsampwidth(p.get_sample_size(pyaudio.paInt16))
-                    wf.setframerate(16000)
-                    wf.writeframes(b''.join(frames))
-                
-                # Process the recorded audio
-                result = self.speech_to_text(output_path)
-                self.audio_queue.put(result)
-                
+            try:
+                while self.is_recording:
+                    try:
+                        self._ring.write(stream.read(1024, exception_on_overflow=False))
+                    except Exception:
+                        break
+            finally:
+                stream.stop_stream()
+                stream.close()
+                p.terminate()
         except Exception as e:
             print(f"Recording error: {e}")
+        finally:
+            self._ring.close()
+    
+    def _segment_audio(self, language: str):
+        """Background thread: ring buffer -> utterances -> recognizer pool"""
+        segmenter = UtteranceSegmenter()
+        while True:
+            data = self._ring.read(AUDIO_SAMPLE_RATE * AUDIO_SAMPLE_WIDTH, timeout=0.5)
+            if data is None:
+                break
+            for start_seconds, pcm in segmenter.feed(data):
+                self._transcribe_segment(start_seconds, pcm, language)
+        for start_seconds, pcm in segmenter.flush():
+            self._transcribe_segment(start_seconds, pcm, language)
+    
+    def _transcribe_segment(self, start_seconds: float, pcm: bytes, language: str):
+        segment = {
+            "segment": len(self.recording_segments),
+            "start_seconds": round(start_seconds, 2),
+            "duration_seconds": round(len(pcm) / (AUDIO_SAMPLE_RATE * AUDIO_SAMPLE_WIDTH), 2),
+            "status": "pending",
+        }
+        self.recording_segments.append(segment)
+        try:
+            future = get_recognizer_pool().submit(_pcm_to_wav_stream(pcm).getvalue(), language)
+        except RecognizerBusy as e:
+            segment.update(status="failed", error=str(e))
+            return
+        self._segment_futures.append(future)
+        future.add_done_callback(lambda done: self._segment_done(segment, done))
+    
+    def _segment_done(self, segment: Dict[str, Any], future):
+        try:
+            result = future.result()
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+        if result.get("success"):
+            segment.update(status="done", transcription=result["transcription"], confidence=result.get("confidence"))
+        else:
+            segment.update(status="failed", error=result.get("error"))
+    
+    def get_recording_transcripts(self) -> Dict[str, Any]:
+        """Segments transcribed so far in the current or last recording"""
+        return {
+            "recording": self.is_recording,
+            **self._combined_transcription()
+        }
     
     def get_supported_languages(self) -> Dict[str, Any]:
     
@@ -412,9 +555,15 @@ class SpeechProcessor:
             ]
         }
 
-# Global speech processor instance
-speech_processor = SpeechProcessor()
+# Global speech processor instance, created on first use
+speech_processor = None
+_speech_processor_lock = threading.Lock()
 
 def get_speech_processor():
     """Get speech processor instance"""
+    global speech_processor
+    if speech_processor is None:
+        with _speech_processor_lock:
+            if speech_processor is None:
+                speech_processor = SpeechProcessor()
     return speech_processor 
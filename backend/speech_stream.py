@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+
+import os
+import asyncio
+import shutil
+from typing import Optional, Dict, Any, Callable, Awaitable
+
+from speech_workers import get_recognizer_pool, RecognizerBusy
+
+STREAM_SAMPLE_RATE = 16000
+STREAM_READ_BYTES = 8192
+# Seconds of new speech between interim transcripts of the utterance in progress
+STREAM_INTERIM_SECONDS = float(os.getenv("STREAM_INTERIM_SECONDS", 1.0))
+
+STREAM_FORMATS = ("webm", "pcm")
+
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+def _wav_bytes(pcm: bytes) -> bytes:
+    from speech_features import _pcm_to_wav_stream
+    return _pcm_to_wav_stream(pcm).getvalue()
+
+
+class SpeechStreamSession:
+    """Incremental speech-to-text for one client stream.
+
+    Audio chunks go to ``feed``. Browser MediaRecorder chunks (webm/opus)
+    are decoded by one long-lived ffmpeg process per session, reading stdin
+    and writing 16 kHz PCM to stdout; format "pcm" takes 16 kHz mono s16le
+    directly. The PCM runs through the VAD segmenter. While someone is
+    speaking, an interim transcript of the utterance so far is sent every
+    STREAM_INTERIM_SECONDS. When the utterance ends it is recognized and
+    sent as final, and ``on_final`` (if given) is started with the text."""
+
+    def __init__(self, send: Send, language: str = 'en-IN', audio_format: str = "webm",
+                 on_final: Optional[Callable[[int, str], Awaitable[None]]] = None):
+        if audio_format not in STREAM_FORMATS:
+            raise ValueError(f"Unsupported audio format '{audio_format}', use one of {', '.join(STREAM_FORMATS)}")
+        if audio_format == "webm" and not shutil.which("ffmpeg"):
+            raise RuntimeError("Streaming webm audio needs ffmpeg on the server; send audio_format=pcm instead")
+        self.send = send
+        self.language = language
+        self.audio_format = audio_format
+        self.on_final = on_final
+        # Imported per session so that numpy is only loaded once someone streams audio
+        from voice_activity import UtteranceSegmenter
+        self.segmenter = UtteranceSegmenter()
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._reader: Optional[asyncio.Task] = None
+        self._tasks: set = set()
+        self._segments = 0
+        self._interim_task: Optional[asyncio.Task] = None
+        self._interim_at = 0.0
+
+    async def start(self):
+        if self.audio_format == "webm":
+            self._process = await asyncio.create_subprocess_exec(
+                'ffmpeg', '-hide_banner', '-loglevel', 'error',
+                '-f', 'webm', '-i', 'pipe:0',
+                '-f', 's16le', '-acodec', 'pcm_s16le', '-ar', str(STREAM_SAMPLE_RATE), '-ac', '1',
+                'pipe:1',
+                stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+            self._reader = asyncio.ensure_future(self._read_decoded())
+
+    async def feed(self, chunk: bytes):
+        if self._process is None:
+            self._handle_pcm(chunk)
+            return
+        self._process.stdin.write(chunk)
+        await self._process.stdin.drain()
+
+    async def _read_decoded(self):
+        while True:
+            pcm = await self._process.stdout.read(STREAM_READ_BYTES)
+            if not pcm:
+                return
+            self._handle_pcm(pcm)
+
+    def _handle_pcm(self, pcm: bytes):
+        for start_seconds, utterance in self.segmenter.feed(pcm):
+            self._finalize_later(start_seconds, utterance)
+        self._maybe_interim()
+
+    def _finalize_later(self, start_seconds: float, pcm: bytes):
+        self._spawn(self._finalize(self._segments, start_seconds, pcm))
+        self._segments += 1
+        self._interim_at = 0.0
+
+    def _maybe_interim(self):
+        current = self.segmenter.current_utterance()
+        if current is None:
+            self._interim_at = 0.0
+            return
+        start_seconds, pcm = current
+        seconds = len(pcm) / (STREAM_SAMPLE_RATE * 2)
+        # One interim in flight at a time; finals always take priority
+        if seconds - self._interim_at < STREAM_INTERIM_SECONDS or (self._interim_task and not self._interim_task.done()):
+            return
+        self._interim_at = seconds
+        self._interim_task = self._spawn(self._interim(self._segments, start_seconds, pcm))
+
+    async def _interim(self, segment: int, start_seconds: float, pcm: bytes):
+        try:
+            result = await get_recognizer_pool().transcribe(_wav_bytes(pcm), self.language)
+        except RecognizerBusy:
+            return
+        if result.get("success"):
+            await self.send({"type": "interim", "segment": segment, "start_seconds": round(start_seconds, 2),
+                             "transcription": result["transcription"]})
+
+    async def _finalize(self, segment: int, start_seconds: float, pcm: bytes):
+        message = {"type": "final", "segment": segment, "start_seconds": round(start_seconds, 2),
+                   "duration_seconds": round(len(pcm) / (STREAM_SAMPLE_RATE * 2), 2)}
+        try:
+            result = await get_recognizer_pool().transcribe(_wav_bytes(pcm), self.language)
+        except RecognizerBusy as e:
+            result = {"success": False, "error": str(e)}
+        if result.get("success"):
+            message.update(success=True, transcription=result["transcription"], confidence=result.get("confidence"))
+        else:
+            message.update(success=False, error=result.get("error"))
+        await self.send(message)
+        if result.get("success") and self.on_final is not None:
+            await self.on_final(segment, result["transcription"])
+
+    def _spawn(self, coroutine) -> asyncio.Task:
+        task = asyncio.ensure_future(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def finish(self):
+        """End of audio: flush the decoder and segmenter and wait for the last transcripts"""
+        if self._process is not None:
+            self._process.stdin.close()
+            await self._reader
+            await self._process.wait()
+        for start_seconds, utterance in self.segmenter.flush():
+            self._finalize_later(start_seconds, utterance)
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    async def close(self):
+        """Abort: stop the decoder and drop pending work (client went away)"""
+        for task in list(self._tasks):
+            task.cancel()
+        if self._reader is not None:
+            self._reader.cancel()
+        if self._process is not None and self._process.returncode is None:
+            self._process.kill()
+            await self._process.wait()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+
+import os
+import time
+import queue
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Optional, Dict, Any, List, Union
+
+SPEECH_WORKERS = int(os.getenv("SPEECH_WORKERS", os.cpu_count() or 1))
+SPEECH_QUEUE_SIZE = int(os.getenv("SPEECH_QUEUE_SIZE", 32))
+SPEECH_JOB_TIMEOUT_SECONDS = float(os.getenv("SPEECH_JOB_TIMEOUT_SECONDS", 30))
+
+
+class RecognizerBusy(Exception):
+    """Raised when the recognition queue is full; clients should retry after retry_after seconds"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Speech recognition queue is full, retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class RecognizerUnavailable(RuntimeError):
+    """Raised for every job once the workers cannot set up speech recognition (e.g. the package is missing)"""
+
+
+class RecognizerPool:
+    """Speech recognition on a fixed set of worker threads, each owning its own Recognizer.
+
+    Recognizer state such as the ambient-noise energy threshold is reset
+    before every job, so one caller's calibration never carries over to the
+    next. Jobs wait in a bounded queue; when it is full ``submit`` raises
+    RecognizerBusy. ``transcribe`` gives up after the per-job timeout. If
+    recognition cannot be set up at all, jobs fail at once with
+    RecognizerUnavailable instead of waiting out the timeout."""
+
+    def __init__(self, workers: int = SPEECH_WORKERS, queue_size: int = SPEECH_QUEUE_SIZE,
+                 job_timeout: float = SPEECH_JOB_TIMEOUT_SECONDS):
+        self.workers = max(1, workers)
+        self.job_timeout = job_timeout
+        self._jobs: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=queue_size)
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._busy = 0
+        self.setup_error: Optional[str] = None
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.rejected = 0
+        self.average_seconds = 0.0
+
+    def _start(self):
+        with self._lock:
+            if self._threads or self.setup_error:
+                return
+            try:
+                import speech_recognition as sr
+                sr.Recognizer()
+            except Exception as e:
+                self._setup_failed(e)
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"speech-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _setup_failed(self, error: Exception):
+        self.setup_error = f"Speech recognition is unavailable: {error}"
+        print(f"Speech worker warning: {self.setup_error}")
+
+    def _work(self):
+        try:
+            import speech_recognition as sr
+            from speech_features import get_speech_processor
+
+            recognizer = sr.Recognizer()
+            initial_threshold = recognizer.energy_threshold
+        except Exception as e:
+            self._setup_failed(e)
+            recognizer = None
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            future, audio_path, language, deadline = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            if recognizer is None:
+                future.set_exception(RecognizerUnavailable(self.setup_error))
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                future.set_exception(TimeoutError("Speech recognition job expired in the queue"))
+                continue
+            recognizer.energy_threshold = initial_threshold
+            # Bounds each network call made by the recognition engines
+            recognizer.operation_timeout = remaining
+            with self._lock:
+                self._busy += 1
+            started = time.monotonic()
+            try:
+                future.set_result(get_speech_processor().speech_to_text(audio_path, language, recognizer=recognizer))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                elapsed = time.monotonic() - started
+                with self._lock:
+                    self._busy -= 1
+                    self.average_seconds = elapsed if not self.average_seconds else 0.9 * self.average_seconds + 0.1 * elapsed
+
+    def submit(self, audio_path: Union[str, bytes], language: str = 'en-IN', timeout: Optional[float] = None) -> Future:
+        """Queue a recognition job for an audio file path or WAV bytes and return its future"""
+        self._start()
+        future: Future = Future()
+        if self.setup_error:
+            future.set_exception(RecognizerUnavailable(self.setup_error))
+            return future
+        deadline = time.monotonic() + (timeout or self.job_timeout)
+        try:
+            self._jobs.put_nowait((future, audio_path, language, deadline))
+        except queue.Full:
+            self.rejected += 1
+            raise RecognizerBusy(self.retry_after_hint())
+        return future
+
+    def retry_after_hint(self) -> float:
+        """Rough seconds until the queue drains, for Retry-After headers"""
+        per_job = self.average_seconds or 1.0
+        return max(1.0, self._jobs.qsize() * per_job / self.workers)
+
+    async def transcribe(self, audio_path: str, language: str = 'en-IN',
+                         timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Recognize speech in a worker without blocking the event loop"""
+        timeout = timeout or self.job_timeout
+        future = self.submit(audio_path, language, timeout)
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except (asyncio.TimeoutError, TimeoutError):
+            self.timed_out += 1
+            return {
+                "success": False,
+                "error": f"Speech recognition timed out after {timeout:g}s",
+                "suggestions": ["Try a shorter recording", "Try again"]
+            }
+        except RecognizerUnavailable as e:
+            self.failed += 1
+            return {
+                "success": False,
+                "error": str(e),
+                "suggestions": ["Install the SpeechRecognition package on the server"]
+            }
+        except Exception:
+            self.failed += 1
+            raise
+        self.completed += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "busy": self._busy,
+            "queued": self._jobs.qsize(),
+            "queue_size": self._jobs.maxsize,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "rejected": self.rejected,
+            "average_seconds": round(self.average_seconds, 3),
+            "setup_error": self.setup_error,
+        }
+
+    def shutdown(self):
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            try:
+                self._jobs.put_nowait(None)
+            except queue.Full:
+                break  # daemon threads exit with the process
+
+
+# Global recognizer pool
+recognizer_pool = RecognizerPool()
+
+
+def get_recognizer_pool() -> RecognizerPool:
+    return recognizer_pool
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+
+import sys
+import time
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, List
+
+# Reference point for startup timings: this module is the first thing main imports
+PROFILE_STARTED = time.perf_counter()
+
+_imports: Dict[str, Dict[str, Any]] = {}
+_steps: Dict[str, float] = {}
+_ready_at: Optional[float] = None
+_local = threading.local()
+
+
+class _ImportTimer:
+    """Meta path finder that times each module's execution.
+
+    It defers to the remaining finders and wraps the found loader's
+    ``exec_module``. Self time excludes nested imports, so the per-package
+    totals add up to the real import cost."""
+
+    def find_spec(self, fullname, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        loader = spec.loader
+        # Builtin and frozen importers are classes shared by every module; leave them alone
+        if loader is None or isinstance(loader, type) or not hasattr(loader, "exec_module"):
+            return spec
+        exec_module = loader.exec_module
+
+        def timed_exec_module(module):
+            stack = _import_stack()
+            stack.append(0.0)
+            started = time.perf_counter()
+            try:
+                exec_module(module)
+            finally:
+                total = time.perf_counter() - started
+                nested = stack.pop()
+                if stack:
+                    stack[-1] += total
+                _imports[fullname] = {
+                    "self_ms": (total - nested) * 1000,
+                    "total_ms": total * 1000,
+                    "lazy": _ready_at is not None,
+                }
+
+        try:
+            loader.exec_module = timed_exec_module
+        except AttributeError:
+            pass
+        return spec
+
+
+def _import_stack() -> List[float]:
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+_import_timer = _ImportTimer()
+
+
+def install():
+    """Start timing imports; call before importing anything heavy"""
+    if _import_timer not in sys.meta_path:
+        sys.meta_path.insert(0, _import_timer)
+
+
+@contextmanager
+def timed_step(name: str):
+    """Record how long a named startup step takes"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _steps[name] = (time.perf_counter() - started) * 1000
+
+
+def mark_ready():
+    """Record that startup finished; later imports are reported as lazy"""
+    global _ready_at
+    if _ready_at is None:
+        _ready_at = time.perf_counter()
+
+
+def is_ready() -> bool:
+    return _ready_at is not None
+
+
+def startup_seconds() -> Optional[float]:
+    return None if _ready_at is None else _ready_at - PROFILE_STARTED
+
+
+def report(top: int = 15) -> Dict[str, Any]:
+    """Import-time breakdown: slowest modules, totals per top-level package and startup steps"""
+    startup = {name: info for name, info in _imports.items() if not info["lazy"]}
+    lazy = {name: info for name, info in _imports.items() if info["lazy"]}
+
+    def by_package(records: Dict[str, Dict[str, Any]]) -> Dict[str, float]:
+        totals: Dict[str, float] = defaultdict(float)
+        for name, info in records.items():
+            totals[name.split(".")[0]] += info["self_ms"]
+        ordered = sorted(totals.items(), key=lambda item: item[1], reverse=True)
+        return {package: round(ms, 1) for package, ms in ordered[:top]}
+
+    def slowest(records: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        ordered = sorted(records.items(), key=lambda item: item[1]["self_ms"], reverse=True)
+        return [
+            {"module": name, "self_ms": round(info["self_ms"], 1), "total_ms": round(info["total_ms"], 1)}
+            for name, info in ordered[:top]
+        ]
+
+    seconds = startup_seconds()
+    return {
+        "ready": is_ready(),
+        "startup_seconds": None if seconds is None else round(seconds, 3),
+        "import_ms": round(sum(info["self_ms"] for info in startup.values()), 1),
+        "modules_imported": len(startup),
+        "packages": by_package(startup),
+        "slowest_modules": slowest(startup),
+        "steps_ms": {name: round(ms, 1) for name, ms in _steps.items()},
+        "lazy_import_ms": round(sum(info["self_ms"] for info in lazy.values()), 1),
+        "lazy_packages": by_package(lazy),
+    }
+
+
+def print_report(top: int = 10):
+    """Short startup summary for the server log"""
+    summary = report(top)
+    print(f"🚀 Startup ready in {summary['startup_seconds']}s "
+          f"({summary['import_ms']:.0f} ms importing {summary['modules_imported']} modules)")
+    for package, ms in summary["packages"].items():
+        print(f"   {package:<24} {ms:>8.1f} ms")
+    for name, ms in summary["steps_ms"].items():
+        print(f"   step {name:<19} {ms:>8.1f} ms")
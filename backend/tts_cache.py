@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Dict, Any, Callable, Iterator, Tuple
+
+TTS_CACHE_DIR = Path(os.getenv("TTS_CACHE_DIR", "tts_cache"))
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+TTS_STREAM_CHUNK_SIZE = 64 * 1024
+
+_KEY_PATTERN = set("0123456789abcdef")
+
+
+def tts_cache_key(processed_text: str, voice: Optional[str], rate: Any) -> str:
+    """Content hash of everything that determines the synthesized audio"""
+    payload = json.dumps([processed_text, voice, rate], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def is_tts_cache_key(key: str) -> bool:
+    return len(key) == 64 and set(key) <= _KEY_PATTERN
+
+
+class TtsCache:
+    """Synthesized audio files keyed by content hash, evicted LRU under a disk quota.
+
+    ``get_or_create`` synthesizes at most once per key, even when several
+    requests ask for the same audio at the same time. Recency is tracked in
+    memory and seeded from file mtimes on startup, so the cache survives
+    restarts."""
+
+    def __init__(self, cache_dir: Path = TTS_CACHE_DIR, max_bytes: int = TTS_CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # key -> size, LRU order
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._load()
+
+    def _load(self):
+        if not self.cache_dir.exists():
+            return
+        files = []
+        for path in self.cache_dir.glob("*/*.wav"):
+            if not is_tts_cache_key(path.stem):
+                continue  # leftover from an interrupted synthesis
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, path.stem, stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._total_bytes += size
+        self._evict()
+
+    def path_for(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.wav"
+
+    def get(self, key: str) -> Optional[Path]:
+        """Cached audio for key, marking it recently used"""
+        with self._lock:
+            if key not in self._entries:
+                return None
+            path = self.path_for(key)
+            if not path.exists():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def get_or_create(self, key: str, synthesize: Callable[[str], None]) -> Tuple[Path, bool]:
+        """Return (path, cached); on a miss ``synthesize(tmp_path)`` renders the audio"""
+        path = self.get(key)
+        if path is not None:
+            self._count(hit=True)
+            return path, True
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            # Another request may have rendered it while we waited
+            path = self.get(key)
+            if path is not None:
+                self._count(hit=True)
+                return path, True
+            self._count(hit=False)
+            path = self.path_for(key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp.wav")
+            os.close(fd)
+            try:
+                synthesize(tmp_name)
+                if os.path.getsize(tmp_name) == 0:
+                    raise RuntimeError("Speech synthesis produced no audio")
+                os.replace(tmp_name, path)
+                # Registered before the key lock goes, so a request arriving in
+                # between sees a hit instead of rendering the audio again
+                self.add(key, path)
+            finally:
+                if os.path.exists(tmp_name):
+                    os.remove(tmp_name)
+                with self._lock:
+                    self._key_locks.pop(key, None)
+            return path, False
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def add(self, key: str, path: Path):
+        """Register a file already written to ``path_for(key)``"""
+        size = path.stat().st_size
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= self._entries.pop(key)
+            self._entries[key] = size
+            self._total_bytes += size
+            self._evict(keep=key)
+
+    def _evict(self, keep: Optional[str] = None):
+        while self._total_bytes > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            if key == keep:
+                break
+            self._drop(key)
+            self.evictions += 1
+            try:
+                os.remove(self.path_for(key))
+            except OSError:
+                pass
+
+    def _drop(self, key: str):
+        self._total_bytes -= self._entries.pop(key, 0)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+            entries, total_bytes = len(self._entries), self._total_bytes
+        lookups = hits + misses
+        return {
+            "entries": entries,
+            "bytes": total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+def parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single ``bytes=start-end`` range into inclusive offsets.
+
+    Returns None for a missing or multi-range header (serve the whole file)
+    and raises ValueError when the range cannot be satisfied."""
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+    start_text, _, end_text = range_header[len("bytes="):].strip().partition("-")
+    if not start_text:
+        # Suffix range: the last N bytes
+        length = int(end_text)
+        if length <= 0:
+            raise ValueError("Empty suffix range")
+        return max(0, size - length), size - 1
+    start = int(start_text)
+    end = int(end_text) if end_text else size - 1
+    if start >= size or end < start:
+        raise ValueError("Range not satisfiable")
+    return start, min(end, size - 1)
+
+
+def iter_file(path: Path, start: int, end: int) -> Iterator[bytes]:
+    """Yield bytes start..end (inclusive) of a file in fixed-size chunks"""
+    remaining = end - start + 1
+    with open(path, "rb") as f:
+        f.seek(start)
+        while remaining > 0:
+            chunk = f.read(min(TTS_STREAM_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+# Global TTS audio cache
+tts_cache = TtsCache()
+
+
+def get_tts_cache() -> TtsCache:
+    return tts_cache
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+
+import os
+import re
+import wave
+import struct
+import asyncio
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, List, Tuple, AsyncIterator
+
+from tts_cache import get_tts_cache, tts_cache_key
+from metrics import metrics
+
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", min(4, os.cpu_count() or 1)))
+TTS_CHUNK_MAX_CHARS = int(os.getenv("TTS_CHUNK_MAX_CHARS", 300))
+
+_HEADING = re.compile(r"^(#{1,6}\s+.+|\*\*[^*]+\*\*:?|[A-Z][^.!?]{0,80}:|\d+[.)]\s+[^.!?]{0,80})$")
+# Sentence ends, but not the " ... " pauses inserted by _process_legal_context
+_SENTENCE_END = re.compile(r"(?<=[^.][.!?])\s+")
+
+_worker_processor = None
+
+
+def split_for_speech(text: str, max_chars: int = TTS_CHUNK_MAX_CHARS) -> List[str]:
+    """Split text into speakable chunks at heading and sentence boundaries.
+
+    The first chunk is a single sentence so playback can start as soon as
+    it is rendered; later sentences are merged up to ``max_chars`` to keep
+    the number of synthesis calls down. Headings always start a new chunk."""
+    pieces: List[Tuple[str, bool]] = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if _HEADING.match(line):
+            pieces.append((line, True))
+            continue
+        for sentence in _SENTENCE_END.split(line):
+            sentence = sentence.strip()
+            while len(sentence) > max_chars:
+                cut = sentence.rfind(", ", 0, max_chars)
+                if cut <= 0:
+                    cut = sentence.rfind(" ", 0, max_chars)
+                if cut <= 0:
+                    cut = max_chars
+                pieces.append((sentence[:cut + 1].strip(), False))
+                sentence = sentence[cut + 1:].strip()
+            if sentence:
+                pieces.append((sentence, False))
+
+    chunks: List[str] = []
+    for piece, is_heading in pieces:
+        if (len(chunks) > 1 and not is_heading and not chunks[-1].endswith(":")
+                and len(chunks[-1]) + len(piece) + 1 <= max_chars):
+            chunks[-1] = f"{chunks[-1]} {piece}"
+        else:
+            chunks.append(piece)
+    return chunks
+
+
+def _synthesize_chunk(processed_text: str, output_path: str):
+    """Render one chunk to a WAV file (runs in a worker process with its own engine)"""
+    global _worker_processor
+    try:
+        if _worker_processor is None:
+            from speech_features import SpeechProcessor
+            _worker_processor = SpeechProcessor()
+        _worker_processor._render_to_file(processed_text, output_path)
+    except Exception as e:
+        # Driver exceptions may not unpickle in the parent and would break the pool
+        raise RuntimeError(f"{type(e).__name__}: {e}") from None
+
+
+def _streaming_wav_header(channels: int, sample_width: int, frame_rate: int) -> bytes:
+    """WAV header with open-ended sizes, for audio whose length is not known up front"""
+    block_align = channels * sample_width
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 0xFFFFFFFF, b"WAVE",
+        b"fmt ", 16, 1, channels, frame_rate, frame_rate * block_align, block_align, sample_width * 8,
+        b"data", 0xFFFFFFFF,
+    )
+
+
+def _read_wav(path: str) -> Tuple[Tuple[int, int, int], bytes]:
+    with wave.open(path, "rb") as wav:
+        return (wav.getnchannels(), wav.getsampwidth(), wav.getframerate()), wav.readframes(wav.getnframes())
+
+
+class ChunkedSynthesizer:
+    """Sentence-chunked text-to-speech rendered on a process pool and streamed in order.
+
+    pyttsx3 engines are not thread-safe, so each worker process owns one.
+    Chunks go through the TTS cache, so repeated sentences are never
+    re-rendered. At most ``workers + 1`` chunks are in flight ahead of the
+    listener, so an abandoned stream stops costing synthesis quickly."""
+
+    def __init__(self, workers: int = TTS_WORKERS):
+        self.workers = max(1, workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def _render(self, processed_text: str, tmp_path: str):
+        with metrics.timed("tts_chunk_render"):
+            self._render_on_pool(processed_text, tmp_path)
+
+    def _render_on_pool(self, processed_text: str, tmp_path: str):
+        try:
+            future = self._get_executor().submit(_synthesize_chunk, processed_text, tmp_path)
+        except BrokenProcessPool:
+            self._executor = None
+            future = self._get_executor().submit(_synthesize_chunk, processed_text, tmp_path)
+        future.result()
+
+    def _chunk_audio(self, processed_text: str, voice, rate) -> Tuple[Tuple[int, int, int], bytes]:
+        key = tts_cache_key(processed_text, voice, rate)
+        path, _ = get_tts_cache().get_or_create(key, lambda tmp_path: self._render(processed_text, tmp_path))
+        return _read_wav(str(path))
+
+    async def stream(self, text: str) -> AsyncIterator[bytes]:
+        """Yield a WAV header followed by each chunk's PCM frames in order"""
+        from speech_features import get_speech_processor
+
+        processor = get_speech_processor()
+        chunks = split_for_speech(processor._process_legal_context(text))
+        if not chunks:
+            return
+        loop = asyncio.get_running_loop()
+        voice, rate = await loop.run_in_executor(None, processor.tts_settings)
+        remaining = iter(chunks)
+        pending: deque = deque()
+
+        def schedule():
+            chunk = next(remaining, None)
+            if chunk is not None:
+                pending.append(loop.run_in_executor(None, self._chunk_audio, chunk, voice, rate))
+
+        for _ in range(self.workers + 1):
+            schedule()
+        params = None
+        try:
+            while pending:
+                chunk_params, frames = await pending.popleft()
+                schedule()
+                if params is None:
+                    params = chunk_params
+                    yield _streaming_wav_header(*params)
+                if chunk_params != params:
+                    print(f"TTS chunk skipped: format {chunk_params} does not match {params}")
+                    continue
+                yield frames
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def warm_up(self):
+        """Start the worker processes ahead of the first request"""
+        self._get_executor().submit(os.getpid).result()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Global chunked synthesizer
+chunked_synthesizer = ChunkedSynthesizer()
+
+
+def get_chunked_synthesizer() -> ChunkedSynthesizer:
+    return chunked_synthesizer
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+
+import os
+import re
+import json
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", "uploads"))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", 25 * 1024 * 1024))
+
+_SAFE_SUFFIX = re.compile(r"^\.[a-z0-9]{1,8}$")
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds the configured size limit"""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"File exceeds the {max_bytes / (1024 * 1024):.0f} MB upload limit")
+        self.max_bytes = max_bytes
+
+
+class StoredUpload:
+    """An upload saved under its content hash.
+
+    The stored file has no extension, so identical bytes uploaded under
+    different names share one copy; ``suffix`` records this upload's
+    (sanitised, lower-cased) extension."""
+
+    def __init__(self, path: Path, sha256: str, size: int, filename: str, suffix: str, duplicate: bool):
+        self.path = path
+        self.sha256 = sha256
+        self.size = size
+        self.filename = filename
+        self.suffix = suffix
+        self.duplicate = duplicate
+
+    @property
+    def result_path(self) -> Path:
+        return self.path.with_name(f"{self.sha256}.result.json")
+
+
+def _content_path(sha256: str) -> Path:
+    # Two levels of sharding keep directories small: uploads/ab/cd/abcd...
+    return UPLOAD_DIR / sha256[:2] / sha256[2:4] / sha256
+
+
+def _suffix(filename: Optional[str]) -> str:
+    suffix = Path(filename or "").suffix.lower()
+    return suffix if _SAFE_SUFFIX.match(suffix) else ""
+
+
+def _write_chunk(out, hasher, chunk: bytes):
+    hasher.update(chunk)
+    out.write(chunk)
+
+
+async def store_upload(file: UploadFile, max_bytes: int = UPLOAD_MAX_BYTES) -> StoredUpload:
+    """Stream an upload to disk in fixed-size chunks while hashing it.
+
+    The file ends up at a hash-sharded path; if identical content was already
+    stored, the new copy is discarded and ``duplicate`` is True."""
+    tmp_dir = UPLOAD_DIR / "tmp"
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=tmp_dir)
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(max_bytes)
+                await run_in_threadpool(_write_chunk, out, hasher, chunk)
+
+        sha256 = hasher.hexdigest()
+        path = _content_path(sha256)
+        duplicate = path.exists()
+        if duplicate:
+            os.remove(tmp_name)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp_name, path)
+        return StoredUpload(path, sha256, size, file.filename or path.name, _suffix(file.filename), duplicate)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+        raise
+
+
+def load_upload_result(stored: StoredUpload) -> Optional[Dict[str, Any]]:
+    """Processing result saved for this content by an earlier upload, if any"""
+    if not stored.duplicate or not stored.result_path.exists():
+        return None
+    try:
+        with open(stored.result_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def save_upload_result(stored: StoredUpload, result: Dict[str, Any]):
+    """Remember the processing result so re-uploads of the same content can skip it"""
+    tmp_path = stored.result_path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+    os.replace(tmp_path, stored.result_path)
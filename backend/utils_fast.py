@@ -2,9 +2,25 @@
 
 
 import os
-import requests
+import json
 import time
-from typing import Dict, Any
+import asyncio
+from typing import Dict, Any, AsyncIterator
+
+from starlette.concurrency import run_in_threadpool
+
+from groq_client import get_groq_client
+from answer_cache import answer_cache, document_cache, document_cache_key, normalize_text
+from rag_index import get_rag_index, retrieve_context
+from legal_classifier import primary_domain
+from singleflight import SingleFlight
+from groq_scheduler import llm_scheduler, SchedulerBusy, PRIORITY_INTERACTIVE, PRIORITY_BULK
+from document_drafting import (
+    DOCUMENT_DRAFTING_MODE, DOCUMENT_TITLES, resolve_document_type, build_section_messages,
+    format_section, assemble_document,
+)
+from document_templates import build_slot_messages, parse_slots, render_document
+from metrics import metrics
 
 # Fast legal knowledge base
 LEGAL_KNOWLEDGE = {
@@ -41,62 +57,96 @@ LEGAL_KNOWLEDGE = {
     ]
 }
 
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-GROQ_API_KEY = os.getenv("GROQ_API_KEY", "your-groq-api-key-here")
 GROQ_MODEL = "llama-3.3-70b-versatile"
 
 MAX_TOKENS_PER_CALL = 1500
 REQUEST_TIMEOUT_SECONDS = 45
 MAX_CONTINUE_CALLS = 3
+CONTINUE_PROMPT = "Continue from where you left off. Do not repeat."
+# Questions from one /ask/batch request answered concurrently
+ASK_BATCH_CONCURRENCY = int(os.getenv("ASK_BATCH_CONCURRENCY", 8))
+# Retries after a 429, as long as Retry-After is short enough to be worth waiting for
+GROQ_MAX_RETRIES = 2
+GROQ_MAX_RETRY_WAIT_SECONDS = 10
+
+# Optional serialized BM25 index; built from LEGAL_KNOWLEDGE when absent
+KNOWLEDGE_INDEX_PATH = os.getenv("KNOWLEDGE_INDEX_PATH", "")
+# Built on first use: the fallback path is the only user, and it pulls in numpy
+knowledge_index = None
+
+# Identical prompts in flight at the same time share one upstream call
+llm_singleflight = SingleFlight()
 
 def classify_legal_domain(query: str) -> str:
     """Fast legal domain classification"""
-    query_lower = query.lower()
-    
-    if any(word in query_lower for word in ["consumer", "complaint", "defective", "service"]):
-        return "consumer"
-    elif any(word in query_lower for word in ["criminal", "murder", "punishment", "ipc", "section"]):
-        return "criminal"
-    elif any(word in query_lower for word in ["constitution", "article", "fundamental rights", "rti"]):
-        return "constitutional"
-    elif any(word in query_lower for word in ["divorce", "marriage", "custody", "maintenance", "domestic violence"]):
-        return "family"
-    elif any(word in query_lower for word in ["employment", "wages", "factory", "worker", "industrial"]):
-        return "employment"
-    else:
-        return "general"
+    return primary_domain(query)
+
+def get_knowledge_index():
+    """BM25 index over LEGAL_KNOWLEDGE, loaded or built on first use"""
+    global knowledge_index
+    if knowledge_index is None:
+        from knowledge_index import build_knowledge_index
+        knowledge_index = build_knowledge_index(LEGAL_KNOWLEDGE, KNOWLEDGE_INDEX_PATH)
+    return knowledge_index
 
 def get_relevant_knowledge(query: str) -> str:
-    """Get relevant legal knowledge quickly"""
+    """Get the top BM25-ranked legal knowledge passages for the query"""
+    with metrics.timed("knowledge_retrieval"):
+        passages = get_knowledge_index().top_passages(query)
+    if passages:
+        return "\n".join(passages)
     domain = classify_legal_domain(query)
     knowledge = LEGAL_KNOWLEDGE.get(domain, LEGAL_KNOWLEDGE["general"])
     return "\n".join(knowledge)
 
-def _groq_chat_with_autocontinue(messages: list[dict]) -> str:
-    """Low-level Groq chat helper with auto-continue."""
+def _prompt_key(messages: list[dict]) -> str:
+    """Single-flight key for a conversation: roles plus normalized contents"""
+    return json.dumps([[m["role"], normalize_text(m["content"])] for m in messages])
+
+def _estimate_tokens(messages: list[dict]) -> int:
+    """Rough token cost of a call: ~4 characters per prompt token plus the completion budget"""
+    return sum(len(m["content"]) for m in messages) // 4 + MAX_TOKENS_PER_CALL
+
+def _should_retry(status_code: int, attempt: int) -> bool:
+    if status_code != 200:
+        metrics.count("groq_error", status=str(status_code))
+    retry = (
+        status_code == 429
+        and attempt < GROQ_MAX_RETRIES
+        and llm_scheduler.retry_wait() <= GROQ_MAX_RETRY_WAIT_SECONDS
+    )
+    if retry:
+        metrics.count("groq_retry")
+    return retry
+
+async def _groq_chat_with_autocontinue(messages: list[dict], priority: int = PRIORITY_INTERACTIVE) -> str:
+    """Low-level Groq chat helper with auto-continue, coalescing identical in-flight prompts."""
+    return await llm_singleflight.do(_prompt_key(messages), lambda: _groq_chat_upstream(messages, priority))
+
+def _groq_stream_with_autocontinue(messages: list[dict], priority: int = PRIORITY_INTERACTIVE) -> AsyncIterator[str]:
+    """Streaming Groq chat helper; concurrent identical prompts share one upstream stream."""
+    return llm_singleflight.stream(_prompt_key(messages), lambda: _groq_stream_upstream(messages, priority))
+
+async def _groq_chat_upstream(messages: list[dict], priority: int = PRIORITY_INTERACTIVE) -> str:
+    """Call Groq through the scheduler, issuing continue requests while the answer is cut off by max_tokens."""
     try:
+        client = get_groq_client(timeout=REQUEST_TIMEOUT_SECONDS)
         accumulated_response_parts: list[str] = []
         for i in range(MAX_CONTINUE_CALLS + 1):
-            headers = {
-                "Authorization": f"Bearer {GROQ_API_KEY}",
-                "Content-Type": "application/json",
-            }
             data = {
                 "model": GROQ_MODEL,
                 "messages": messages,
                 "temperature": 0.5,
                 "max_tokens": MAX_TOKENS_PER_CALL,
             }
-            response = requests.post(
-                "https://api.groq.com/openai/v1/chat/completions",
-                headers=headers,
-                json=data,
-                timeout=REQUEST_TIMEOUT_SECONDS,
-            )
+            for attempt in range(GROQ_MAX_RETRIES + 1):
+                with metrics.timed("groq_queue"):
+                    await llm_scheduler.acquire(priority, _estimate_tokens(messages))
+                with metrics.timed("groq_call", call="continue" if i else "initial"):
+                    response = await client.chat(data)
+                llm_scheduler.observe(response)
+                if not _should_retry(response.status_code, attempt):
+                    break
             if response.status_code != 200:
                 break
             payload = response.json()
@@ -107,85 +157,335 @@ def _groq_chat_with_autocontinue(messages: list[dict]) -> str:
                 accumulated_response_parts.append(content)
             if finish_reason != "length" or i == MAX_CONTINUE_CALLS:
                 break
+            metrics.count("groq_continue")
             messages.append({"role": "assistant", "content": content})
-            messages.append({"role": "user", "content": "Continue from where you left off. Do not repeat."})
+            messages.append({"role": "user", "content": CONTINUE_PROMPT})
         return "".join(accumulated_response_parts).strip()
-    except Exception:
+    except SchedulerBusy:
+        raise
+    except Exception as e:
+        metrics.count("groq_error", status=type(e).__name__)
         return ""
 
+async def _groq_stream_upstream(messages: list[dict], priority: int = PRIORITY_INTERACTIVE) -> AsyncIterator[str]:
+    """Stream Groq tokens as they arrive, chaining continue requests without a gap."""
+    client = get_groq_client(timeout=REQUEST_TIMEOUT_SECONDS)
+    for i in range(MAX_CONTINUE_CALLS + 1):
+        data = {
+            "model": GROQ_MODEL,
+            "messages": messages,
+            "temperature": 0.5,
+            "max_tokens": MAX_TOKENS_PER_CALL,
+        }
+        segment_parts: list[str] = []
+        finish_reason = None
+        for attempt in range(GROQ_MAX_RETRIES + 1):
+            with metrics.timed("groq_queue"):
+                await llm_scheduler.acquire(priority, _estimate_tokens(messages))
+            statuses: list[int] = []
+            started = time.perf_counter()
+
+            def observe(response):
+                llm_scheduler.observe(response)
+                statuses.append(response.status_code)
+
+            async for content, reason in client.stream_chat(data, on_response=observe):
+                if content:
+                    segment_parts.append(content)
+                    yield content
+                if reason:
+                    finish_reason = reason
+            metrics.observe("groq_stream", time.perf_counter() - started, call="continue" if i else "initial")
+            if not statuses or not _should_retry(statuses[0], attempt):
+                break
+        if finish_reason != "length" or i == MAX_CONTINUE_CALLS:
+            break
+        metrics.count("groq_continue")
+        messages.append({"role": "assistant", "content": "".join(segment_parts)})
+        messages.append({"role": "user", "content": CONTINUE_PROMPT})
+
+def _build_question_messages(question: str, context: str = "") -> list[dict]:
+    """Chat messages for a legal Q&A request, grounded in uploaded document excerpts if any"""
+    grounding = (
+        "Use these excerpts from the user's uploaded documents where relevant:\n"
+        f"{context}\n\n"
+        if context else ""
+    )
+    return [
+        {
+            "role": "user",
+            "content": (
+                "Answer this legal question in the context of Indian law. "
+                "Be thorough, structured with headings and steps, and concise where possible.\n\n"
+                f"{grounding}"
+                f"Question: {question}"
+            ),
+        }
+    ]
 
-def ask_groq_fast(question: str) -> str:
+def _build_document_messages(case_description: str, preferred_type: str | None = None) -> list[dict]:
+    """Chat messages for a legal document generation request"""
+    doc_type_instruction = (
+        f"Preferred document type: {preferred_type}. If inappropriate, choose the most suitable from: "
+        "Legal notice, Affidavit, Consumer complaint, RTI application, Property document."
+        if preferred_type else
+        "Choose the most suitable type from: Legal notice, Affidavit, Consumer complaint, RTI application, Property document."
+    )
+    prompt = (
+        "Act as an Indian legal document generator. Produce a professionally formatted document in Markdown.\n"
+        f"{doc_type_instruction}\n"
+        "Requirements:\n"
+        "- Use formal Indian legal drafting style.\n"
+        "- Include appropriate headings, party details placeholders, jurisdiction, facts, legal provisions, reliefs/prayers, verification/affirmation (if applicable).\n"
+        "- Add placeholders like [Client Name], [Address], [Opposite Party], [Police Station], [Court], [Date], [Case Details].\n"
+        "- Cite relevant statutory provisions (e.g., IPC, CrPC, CPC, Consumer Protection Act, RTI Act) where applicable.\n"
+        "- End with a short 'Filing/Submission Instructions' section.\n"
+        "- Keep confidential data as placeholders; do not invent personal details.\n"
+        "Case Description:\n" + case_description
+    )
+    return [{"role": "user", "content": prompt}]
+
+
+async def ask_groq_fast(question: str, priority: int = PRIORITY_INTERACTIVE) -> str:
     """Fast Groq API call with auto-continue to avoid truncation"""
     try:
-        messages = [
-            {
-                "role": "user",
-                "content": (
-                    "Answer this legal question in the context of Indian law. "
-                    "Be thorough, structured with headings and steps, and concise where possible.\n\n"
-                    f"Question: {question}"
-                ),
-            }
-        ]
+        # Answers grounded in uploaded documents depend on the corpus, so skip the cache for them.
+        # Retrieval embeds the query and searches under the index lock, so keep it off the event loop
+        context = await run_in_threadpool(retrieve_context, question)
+        if not context:
+            cached = answer_cache.get(question)
+            if cached is not None:
+                return cached
+        messages = _build_question_messages(question, context)
 
-        content = _groq_chat_with_autocontinue(messages)
+        content = await _groq_chat_with_autocontinue(messages, priority)
         if content:
+            if not context:
+                answer_cache.set(question, content)
             return content
+        metrics.count("knowledge_fallback")
         knowledge = get_relevant_knowledge(question)
         return f"Based on Indian legal knowledge: {knowledge}"
+    except SchedulerBusy:
+        raise
     except Exception:
+        metrics.count("knowledge_fallback")
         knowledge = get_relevant_knowledge(question)
         return f"Based on Indian legal knowledge: {knowledge}"
 
 
-def generate_legal_document_fast(case_description: str, preferred_type: str | None = None) -> str:
+async def ask_groq_stream_fast(question: str) -> AsyncIterator[str]:
+    """Streaming variant of ask_groq_fast; yields answer text as it arrives"""
+    context = await run_in_threadpool(retrieve_context, question)
+    if not context:
+        cached = answer_cache.get(question)
+        if cached is not None:
+            yield cached
+            return
+    parts: list[str] = []
+    try:
+        async for token in _groq_stream_with_autocontinue(_build_question_messages(question, context)):
+            parts.append(token)
+            yield token
+        if parts and not context:
+            answer_cache.set(question, "".join(parts).strip())
+    except Exception:
+        pass
+    if not parts:
+        metrics.count("knowledge_fallback")
+        knowledge = get_relevant_knowledge(question)
+        yield f"Based on Indian legal knowledge: {knowledge}"
+
+
+def _start_section_drafts(case_description: str, preferred_type: str | None = None) -> tuple[str, list[asyncio.Task]]:
+    """Start one concurrent Groq call per section of the document"""
+    doc_type = resolve_document_type(case_description, preferred_type)
+    tasks = [
+        asyncio.ensure_future(_groq_chat_with_autocontinue(messages, PRIORITY_BULK))
+        for messages in build_section_messages(case_description, doc_type)
+    ]
+    return doc_type, tasks
+
+
+async def _draft_document_sections(case_description: str, preferred_type: str | None = None) -> str:
+    """Draft every section concurrently and assemble them in order.
+    Returns "" if any section failed, so the caller can fall back to a single-call draft."""
+    doc_type, tasks = _start_section_drafts(case_description, preferred_type)
+    try:
+        sections = await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    if not all(sections):
+        return ""
+    return assemble_document(doc_type, sections)
+
+
+async def _draft_document_from_template(case_description: str, preferred_type: str | None = None) -> str:
+    """Ask only for the case-specific slots and render the rest from the local template.
+    Returns "" if the reply could not be parsed, so the caller can fall back to drafting."""
+    doc_type = resolve_document_type(case_description, preferred_type)
+    content = await _groq_chat_with_autocontinue(build_slot_messages(case_description, doc_type), PRIORITY_BULK)
+    slots = parse_slots(content, doc_type)
+    if slots is None:
+        print(f"Document template slots unusable for {doc_type}; drafting sections instead")
+        return ""
+    return render_document(doc_type, slots)
+
+
+async def _draft_document(case_description: str, preferred_type: str | None = None) -> str:
+    """Draft with the configured mode, falling back template -> sections -> single call"""
+    content = ""
+    if DOCUMENT_DRAFTING_MODE == "template":
+        content = await _draft_document_from_template(case_description, preferred_type)
+    if not content and DOCUMENT_DRAFTING_MODE in ("template", "sections"):
+        if DOCUMENT_DRAFTING_MODE == "template":
+            metrics.count("document_fallback", mode="template")
+        content = await _draft_document_sections(case_description, preferred_type)
+    if not content:
+        if DOCUMENT_DRAFTING_MODE in ("template", "sections"):
+            metrics.count("document_fallback", mode="sections")
+        messages = _build_document_messages(case_description, preferred_type)
+        content = await _groq_chat_with_autocontinue(messages, PRIORITY_BULK)
+    return content
+
+
+async def generate_legal_document_fast(case_description: str, preferred_type: str | None = None) -> str:
     """Generate a formal Indian legal document from a case description using Groq.
     preferred_type can be one of: notice, affidavit, consumer complaint, rti application, property document.
     Returns Markdown content suitable for display or download."""
     try:
-        doc_type_instruction = (
-            f"Preferred document type: {preferred_type}. If inappropriate, choose the most suitable from: "
-            "Legal notice, Affidavit, Consumer complaint, RTI application, Property document."
-            if preferred_type else
-            "Choose the most suitable type from: Legal notice, Affidavit, Consumer complaint, RTI application, Property document."
-        )
-        prompt = (
-            "Act as an Indian legal document generator. Produce a professionally formatted document in Markdown.\n"
-            f"{doc_type_instruction}\n"
-            "Requirements:\n"
-            "- Use formal Indian legal drafting style.\n"
-            "- Include appropriate headings, party details placeholders, jurisdiction, facts, legal provisions, reliefs/prayers, verification/affirmation (if applicable).\n"
-            "- Add placeholders like [Client Name], [Address], [Opposite Party], [Police Station], [Court], [Date], [Case Details].\n"
-            "- Cite relevant statutory provisions (e.g., IPC, CrPC, CPC, Consumer Protection Act, RTI Act) where applicable.\n"
-            "- End with a short 'Filing/Submission Instructions' section.\n"
-            "- Keep confidential data as placeholders; do not invent personal details.\n"
-            "Case Description:\n" + case_description
-        )
-        messages = [{"role": "user", "content": prompt}]
-        content = _groq_chat_with_autocontinue(messages)
+        cache_key = document_cache_key(case_description, preferred_type)
+        cached = document_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        content = await _draft_document(case_description, preferred_type)
+        if content:
+            document_cache.set(cache_key, content)
         return content or "Unable to generate the document. Please provide more details."
+    except SchedulerBusy:
+        raise
     except Exception:
         return "Unable to generate the document. Please try again later."
 
-def ask_indian_legalgpt_fast(query: str) -> str:
+
+async def generate_legal_document_stream_fast(case_description: str, preferred_type: str | None = None) -> AsyncIterator[str]:
+    """Streaming variant of generate_legal_document_fast; yields Markdown as it arrives"""
+    cache_key = document_cache_key(case_description, preferred_type)
+    cached = document_cache.get(cache_key)
+    if cached is not None:
+        yield cached
+        return
+    if DOCUMENT_DRAFTING_MODE == "template":
+        # Only the slots are generated, so the rendered document is sent in one piece
+        try:
+            content = await _draft_document_from_template(case_description, preferred_type)
+        except Exception:
+            content = ""
+        if content:
+            document_cache.set(cache_key, content)
+            yield content
+            return
+    if DOCUMENT_DRAFTING_MODE in ("template", "sections"):
+        # Sections are drafted concurrently and each is sent whole, in order, as soon as it is ready
+        sections: list[str] = []
+        try:
+            doc_type, tasks = _start_section_drafts(case_description, preferred_type)
+            try:
+                for index, task in enumerate(tasks):
+                    section = await task
+                    if not section:
+                        break
+                    prefix = f"# {DOCUMENT_TITLES[doc_type]}\n\n" if index == 0 else "\n\n"
+                    sections.append(section)
+                    yield prefix + format_section(doc_type, index, section)
+            finally:
+                for task in tasks:
+                    task.cancel()
+            if len(sections) == len(tasks):
+                document_cache.set(cache_key, assemble_document(doc_type, sections))
+                return
+        except Exception:
+            pass
+        if sections:
+            yield "\n\n[Some sections could not be generated. Please try again later.]"
+            return
+    parts: list[str] = []
+    try:
+        messages = _build_document_messages(case_description, preferred_type)
+        async for token in _groq_stream_with_autocontinue(messages, PRIORITY_BULK):
+            parts.append(token)
+            yield token
+        if parts:
+            document_cache.set(cache_key, "".join(parts).strip())
+    except Exception:
+        if not parts:
+            yield "Unable to generate the document. Please try again later."
+        return
+    if not parts:
+        yield "Unable to generate the document. Please provide more details."
+
+async def ask_indian_legalgpt_fast(query: str, priority: int = PRIORITY_INTERACTIVE) -> str:
     """Ultra-fast legal response"""
     try:
         # Try Groq first (fast)
-        response = ask_groq_fast(query)
+        response = await ask_groq_fast(query, priority)
         return response
+    except SchedulerBusy:
+        raise
     except Exception as e:
         # Fallback to knowledge base
+        metrics.count("knowledge_fallback")
         knowledge = get_relevant_knowledge(query)
         return f"Based on Indian legal knowledge: {knowledge}"
 
-def upload_document_to_rag_fast(file_path: str) -> str:
-    """Fast document upload (placeholder)"""
-    return f"Document {os.path.basename(file_path)} uploaded successfully (fast mode)"
+async def ask_batch_fast(queries: list[str], concurrency: int = ASK_BATCH_CONCURRENCY) -> AsyncIterator[tuple[list[int], str | None, Exception | None]]:
+    """Answer many questions at bulk priority with at most `concurrency` upstream at once.
+    Questions that normalize to the same text are answered once. Yields
+    (indexes of the queries answered, response, error) as each answer completes;
+    one question failing does not stop the others."""
+    unique: dict[str, list[int]] = {}
+    for index, query in enumerate(queries):
+        unique.setdefault(normalize_text(query), []).append(index)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def answer(indexes: list[int]):
+        async with semaphore:
+            try:
+                return indexes, await ask_indian_legalgpt_fast(queries[indexes[0]], PRIORITY_BULK), None
+            except Exception as e:
+                return indexes, None, e
+
+    tasks = [asyncio.ensure_future(answer(indexes)) for indexes in unique.values()]
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
+
+def upload_document_to_rag_fast(file_path: str, text: str | None = None, source: str | None = None) -> str:
+    """Queue a document for chunking, embedding and indexing in the background.
+    Pass text when it has already been extracted (e.g. by OCR); otherwise the file is read as UTF-8.
+    source names the document in retrieved excerpts and defaults to the file name."""
+    source = source or os.path.basename(file_path)
+    try:
+        index = get_rag_index()
+        if index is None:
+            return f"Document {source} uploaded (RAG indexing unavailable)"
+        if text is None:
+            with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+                text = f.read()
+        index.submit(text, source)
+        return f"Document {source} queued for RAG indexing"
+    except Exception as e:
+        return f"Document {source} uploaded (RAG indexing failed: {e})"
 
 def process_voice_input_fast(audio_path: str) -> str:
     """Fast voice processing (placeholder)"""
     return "Voice input processed (fast mode)"
 
-def process_query_with_context_fast(query: str) -> str:
+async def process_query_with_context_fast(query: str) -> str:
     """Fast query processing"""
-    return ask_indian_legalgpt_fast(query) 
+    return await ask_indian_legalgpt_fast(query) 
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+
+import os
+import threading
+from collections import deque
+from typing import Optional, List, Tuple, Dict, Any
+
+import numpy as np
+
+VAD_SAMPLE_RATE = 16000
+VAD_FRAME_MS = 30
+# Frame energy must exceed the noise floor by this factor to count as speech
+VAD_SPEECH_RATIO = float(os.getenv("VAD_SPEECH_RATIO", 3.0))
+VAD_MIN_ENERGY = float(os.getenv("VAD_MIN_ENERGY", 200.0))
+VAD_START_MS = 90
+VAD_END_SILENCE_MS = int(os.getenv("VAD_END_SILENCE_MS", 700))
+VAD_PRE_ROLL_MS = 300
+VAD_MAX_UTTERANCE_SECONDS = float(os.getenv("VAD_MAX_UTTERANCE_SECONDS", 30))
+# The noise floor is the quietest frame seen over this window
+VAD_NOISE_WINDOW_SECONDS = 3.0
+
+
+def frame_energies(pcm: bytes, frame_samples: int) -> np.ndarray:
+    """RMS energy of each complete frame of 16-bit mono PCM, computed in one pass"""
+    samples = np.frombuffer(pcm, dtype="<i2")
+    frames = samples[:len(samples) - len(samples) % frame_samples].reshape(-1, frame_samples)
+    return np.sqrt(np.mean(frames.astype(np.float32) ** 2, axis=1))
+
+
+def compact_speech(pcm: bytes, sample_rate: int = VAD_SAMPLE_RATE, frame_ms: int = VAD_FRAME_MS,
+                   pad_ms: int = 200, max_pause_ms: int = 0) -> Tuple[bytes, Dict[str, Any]]:
+    """Trim leading/trailing silence (and optionally shorten long pauses) from a whole clip.
+
+    Frame energies are computed in one vectorized pass. The noise floor is
+    their 10th percentile and the speech threshold is derived from it, so
+    quiet recordings are judged against their own background rather than a
+    fixed level. Frames within ``pad_ms`` of speech are kept. With
+    ``max_pause_ms`` set, internal pauses are cut down to that length.
+    Returns the compacted PCM (b"" when no frame stood out from the noise)
+    and statistics about what was removed."""
+    frame_samples = sample_rate * frame_ms // 1000
+    samples = np.frombuffer(pcm, dtype="<i2")
+    energies = frame_energies(pcm, frame_samples)
+    original_seconds = len(samples) / sample_rate
+    stats: Dict[str, Any] = {"original_seconds": round(original_seconds, 3)}
+    if not len(energies):
+        stats.update(kept_seconds=round(original_seconds, 3), noise_floor=0.0, threshold=0.0)
+        return pcm, stats
+
+    noise_floor, loud = (float(value) for value in np.percentile(energies, [10, 95]))
+    # A clip that is all speech has a "noise floor" at speech level; never demand more than a quarter of the loud frames
+    threshold = min(noise_floor * VAD_SPEECH_RATIO, 0.25 * loud)
+    voiced = energies > threshold
+    stats.update(noise_floor=round(noise_floor, 1), threshold=round(threshold, 1))
+    if not voiced.any():
+        stats["kept_seconds"] = 0.0
+        return b"", stats
+
+    pad = pad_ms // frame_ms
+    keep = np.convolve(voiced, np.ones(2 * pad + 1), mode="same") > 0
+    first, last = np.flatnonzero(keep)[[0, -1]]
+    keep[:first] = False
+    keep[last + 1:] = False
+    if max_pause_ms:
+        # Position of each frame inside its run of dropped frames; keep the first max_pause frames of every run
+        index = np.arange(len(keep))
+        run_start = np.maximum.accumulate(np.where(keep, index + 1, 0))
+        keep[first:last + 1] |= (index - run_start < max_pause_ms // frame_ms)[first:last + 1]
+    else:
+        keep[first:last + 1] = True
+
+    frames = samples[:len(energies) * frame_samples].reshape(-1, frame_samples)
+    kept = frames[keep]
+    # The partial frame at the end belongs to the clip's tail; keep it only if the last frame was kept
+    tail = samples[len(energies) * frame_samples:] if keep[-1] else samples[:0]
+    compacted = kept.tobytes() + tail.tobytes()
+    stats["kept_seconds"] = round(len(compacted) / 2 / sample_rate, 3)
+    return compacted, stats
+
+
+class PcmRingBuffer:
+    """Fixed-capacity byte ring between an audio capture thread and its consumer.
+
+    ``write`` never blocks: when the consumer falls behind, the oldest audio
+    is overwritten and counted in ``dropped_bytes``, so memory stays flat no
+    matter how long recording runs."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._buffer = bytearray(capacity)
+        self._start = 0
+        self._size = 0
+        self._closed = False
+        self._ready = threading.Condition()
+        self.dropped_bytes = 0
+
+    def write(self, data: bytes):
+        with self._ready:
+            if len(data) >= self.capacity:
+                self.dropped_bytes += self._size + len(data) - self.capacity
+                data = data[-self.capacity:]
+                self._start, self._size = 0, 0
+            overflow = self._size + len(data) - self.capacity
+            if overflow > 0:
+                self._start = (self._start + overflow) % self.capacity
+                self._size -= overflow
+                self.dropped_bytes += overflow
+            end = (self._start + self._size) % self.capacity
+            first = min(len(data), self.capacity - end)
+            self._buffer[end:end + first] = data[:first]
+            self._buffer[:len(data) - first] = data[first:]
+            self._size += len(data)
+            self._ready.notify()
+
+    def read(self, max_bytes: int, timeout: Optional[float] = None) -> Optional[bytes]:
+        """Up to max_bytes of buffered audio; b"" on timeout, None once closed and drained"""
+        with self._ready:
+            if not self._size and not self._closed:
+                self._ready.wait(timeout)
+            if not self._size:
+                return None if self._closed else b""
+            count = min(max_bytes, self._size)
+            first = min(count, self.capacity - self._start)
+            data = bytes(self._buffer[self._start:self._start + first]) + bytes(self._buffer[:count - first])
+            self._start = (self._start + count) % self.capacity
+            self._size -= count
+            return data
+
+    def close(self):
+        with self._ready:
+            self._closed = True
+            self._ready.notify_all()
+
+
+class UtteranceSegmenter:
+    """Energy-based voice activity detection that cuts a PCM stream into utterances.
+
+    Feed 16 kHz mono 16-bit PCM in any chunk size; ``feed`` returns the
+    utterances completed so far as ``(start_seconds, pcm)``. An utterance
+    starts after VAD_START_MS of speech (with a short pre-roll so the first
+    syllable is kept) and ends after VAD_END_SILENCE_MS of silence or at
+    VAD_MAX_UTTERANCE_SECONDS. The noise floor is the minimum frame energy
+    over the last VAD_NOISE_WINDOW_SECONDS, starting from a quiet-room guess,
+    so it follows changing background noise without being pulled up by speech."""
+
+    def __init__(self, sample_rate: int = VAD_SAMPLE_RATE, frame_ms: int = VAD_FRAME_MS,
+                 end_silence_ms: int = VAD_END_SILENCE_MS,
+                 max_utterance_seconds: float = VAD_MAX_UTTERANCE_SECONDS):
+        self.sample_rate = sample_rate
+        self.frame_samples = sample_rate * frame_ms // 1000
+        self.frame_bytes = self.frame_samples * 2
+        self.frame_seconds = frame_ms / 1000
+        self.start_frames = max(1, VAD_START_MS // frame_ms)
+        self.end_frames = max(1, end_silence_ms // frame_ms)
+        self.max_frames = int(max_utterance_seconds * 1000 // frame_ms)
+        window_frames = max(1, int(VAD_NOISE_WINDOW_SECONDS * 1000 // frame_ms))
+        self._recent_energies: deque = deque([VAD_MIN_ENERGY / VAD_SPEECH_RATIO] * window_frames, maxlen=window_frames)
+        self._pending = bytearray()
+        self._pre_roll: deque = deque(maxlen=max(1, VAD_PRE_ROLL_MS // frame_ms))
+        self._utterance: List[bytes] = []
+        self._utterance_start = 0
+        self._voiced_run = 0
+        self._silent_run = 0
+        self._frame_index = 0
+
+    @property
+    def in_speech(self) -> bool:
+        return bool(self._utterance)
+
+    @property
+    def noise_floor(self) -> float:
+        return min(self._recent_energies)
+
+    def threshold(self) -> float:
+        return max(VAD_MIN_ENERGY, self.noise_floor * VAD_SPEECH_RATIO)
+
+    def feed(self, pcm: bytes) -> List[Tuple[float, bytes]]:
+        self._pending.extend(pcm)
+        usable = len(self._pending) - len(self._pending) % self.frame_bytes
+        if not usable:
+            return []
+        block = bytes(self._pending[:usable])
+        del self._pending[:usable]
+        energies = frame_energies(block, self.frame_samples)
+        completed = []
+        for i, energy in enumerate(energies):
+            frame = block[i * self.frame_bytes:(i + 1) * self.frame_bytes]
+            utterance = self._step(frame, float(energy))
+            if utterance is not None:
+                completed.append(utterance)
+            self._frame_index += 1
+        return completed
+
+    def _step(self, frame: bytes, energy: float) -> Optional[Tuple[float, bytes]]:
+        self._recent_energies.append(energy)
+        voiced = energy > self.threshold()
+
+        if not self._utterance:
+            self._pre_roll.append(frame)
+            self._voiced_run = self._voiced_run + 1 if voiced else 0
+            if self._voiced_run >= self.start_frames:
+                self._utterance = list(self._pre_roll)
+                self._utterance_start = self._frame_index + 1 - len(self._utterance)
+                self._pre_roll.clear()
+                self._silent_run = 0
+            return None
+
+        self._utterance.append(frame)
+        self._silent_run = 0 if voiced else self._silent_run + 1
+        if self._silent_run >= self.end_frames or len(self._utterance) >= self.max_frames:
+            return self._finish()
+        return None
+
+    def _finish(self) -> Optional[Tuple[float, bytes]]:
+        # Keep a little of the trailing silence; recognizers cope better with a soft ending
+        keep = len(self._utterance) - max(0, self._silent_run - self._pre_roll.maxlen)
+        utterance = (self._utterance_start * self.frame_seconds, b"".join(self._utterance[:keep]))
+        self._utterance = []
+        self._voiced_run = 0
+        self._silent_run = 0
+        return utterance
+
+    def current_utterance(self) -> Optional[Tuple[float, bytes]]:
+        """The utterance still in progress, for interim transcripts"""
+        if not self._utterance:
+            return None
+        return self._utterance_start * self.frame_seconds, b"".join(self._utterance)
+
+    def flush(self) -> List[Tuple[float, bytes]]:
+        """Return the utterance in progress, if any, at the end of the stream"""
+        self._pending.clear()
+        if not self._utterance:
+            return []
+        return [self._finish()]